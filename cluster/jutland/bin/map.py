@@ -1,48 +1,33 @@
 #! /usr/bin/env streamlit run --server.runOnSave true
 # Copyright 2021 John Hanley. MIT licensed.
-from palettable.colorbrewer import qualitative
 import pandas as pd
 import pydeck as pdk
 import streamlit as st
 
-from cluster.jutland.dataset import Dataset
+from cluster.jutland.tiles import TilePyramid, View, get_tile_pyramid
 
 
-@st.cache  # type: ignore
-def _get_points(only_show_favorites: bool = False) -> pd.DataFrame:
-    df = pd.DataFrame(Dataset.get_df())
+@st.cache_resource  # type: ignore
+def _get_pyramid() -> TilePyramid:
+    return get_tile_pyramid()
 
-    # These are simply the first couple, in sorted order.
-    favorite_roads = {
-        144552912,  # Svingelbjerg
-        93323205,  # Vidstrup
-    }
-    if only_show_favorites:
-        df = df[df.osm_id.isin(favorite_roads)]
 
-    colors = qualitative.Paired_12.colors
-    # Argument 1 to "hash_array" has incompatible type "Series[Any]";
-    # expected "ExtensionArray | ndarray[Any, Any]"  [arg-type]
-    df["road_hash"] = pd.util.hash_array(df.osm_id.apply(str)) % len(colors)
-
-    # In https://discuss.streamlit.io/t/tooltip-and-labels-in-pydeck-chart/1727
-    # godot63 suggests we may need an annoying 3 (r,g,b) color columns.
-    df["color"] = df.road_hash
-
-    return df
+@st.cache_data  # type: ignore
+def _get_view(view: View) -> pd.DataFrame:
+    return _get_pyramid().view(view)
 
 
 AALBORG = (57.050, 9.917)
 
 
-def column_layer(df: pd.DataFrame) -> None:
+def column_layer(df: pd.DataFrame, view: View) -> None:
     st.pydeck_chart(
         pdk.Deck(
             map_style="mapbox://styles/mapbox/light-v9",
             initial_view_state=pdk.ViewState(
-                latitude=AALBORG[0],
-                longitude=AALBORG[1],
-                zoom=9,
+                latitude=view.lat,
+                longitude=view.lon,
+                zoom=view.zoom,
                 pitch=30,
             ),
             layers=[
@@ -53,7 +38,7 @@ def column_layer(df: pd.DataFrame) -> None:
                     get_elevation=90,
                     elevation_scale=1,
                     radius=20,
-                    get_fill_color=[10, 10, "[20 * color]"],
+                    get_fill_color="[r, g, b]",
                 ),
             ],
         )
@@ -62,7 +47,10 @@ def column_layer(df: pd.DataFrame) -> None:
 
 if __name__ == "__main__":
     st.markdown("# DK roads")
-    st.map(_get_points())
-    column_layer(_get_points())
-
-    st.dataframe(_get_points())
+    lat = st.sidebar.number_input("latitude", value=AALBORG[0], format="%.3f")
+    lon = st.sidebar.number_input("longitude", value=AALBORG[1], format="%.3f")
+    zoom = st.sidebar.slider("zoom", 6, 15, 9)
+    view = View(lon, lat, zoom)
+    df = _get_view(view)
+    st.write(f"{len(df):_} points in view")
+    column_layer(df, view)
@@ -1,70 +1,27 @@
 #! /usr/bin/env python
 # Copyright 2021 John Hanley. MIT licensed.
-#
-# Alas, the pypi package autoPyTorch wants auto-sklearn 0.24.x, not e.g. 1.1.3.
-from autoPyTorch import AutoNetClassification
-from numpy import nan
 import pandas as pd
-import pyarrow as pa
-import pyarrow.parquet as pq
-import sklearn.datasets
-import sklearn.metrics
-import sklearn.model_selection
-
-from cluster.jutland.dataset import Dataset
-
-
-def _get_northern_subset() -> pd.DataFrame:
-    cache = Dataset.TMP / "northern_subset.parquet"
-    if not cache.exists():
-        df = Dataset.get_df().reset_index(drop=True)
-        pq.write_table(pa.Table.from_pandas(df), cache)
-    return pd.DataFrame(pq.read_table(cache).to_pandas())
-
-
-def _train_and_test(ground_truth: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-    train = ground_truth.copy()
-    train = train[train.index % 2 == 0]
-    assert 12716 == len(train)
-
-    test = ground_truth.copy()
-    test = test[test.index % 2 == 1]
-    test["osm_id"] = nan
-    test.osm_id = nan
-
-    return train, test
-
-
-def find_clusters() -> None:
-    ground_truth = _get_northern_subset()
-
-    X = ground_truth.copy().drop(columns=["osm_id"])
-    y = ground_truth.copy()[["osm_id"]]
-
-    X_train, _X_test, y_train, _y_test = sklearn.model_selection.train_test_split(
-        X, y, random_state=1
-    )
-
-    autonet = AutoNetClassification(
-        "tiny_cs",
-        budget_type="epochs",
-        min_budget=1,
-        max_budget=9,
-        num_iterations=1,
-        log_level="debug",
-        use_pynisher=False,
-    )
-
-    res = autonet.fit(
-        X_train=X_train,
-        Y_train=y_train,
-        cross_validator="k_fold",
-        cross_validator_args={"n_splits": 3},
+import typer
+
+from cluster.jutland.clustering import cluster_report
+from cluster.jutland.dataset import NORTHERN_TIP, Dataset
+
+
+def find_clusters(
+    full: bool = True,
+    min_samples: int = 4,
+    n_clusters: int = 1000,
+    alt_scale: float = 1.0,
+) -> None:
+    """Clusters the road points, and scores each method against osm_id."""
+    df = Dataset.get_df(None if full else NORTHERN_TIP)
+    print(f"{len(df):_} points, {df.osm_id.nunique():_} roads")
+    report = cluster_report(
+        df, min_samples=min_samples, n_clusters=n_clusters, alt_scale=alt_scale
     )
-
-    print(res)
-    print("Score:", autonet.score(X_test=X_train, Y_test=y_train))
+    with pd.option_context("display.float_format", "{:,.3f}".format):
+        print(report.to_string(index=False))
 
 
 if __name__ == "__main__":
-    find_clusters()
+    typer.run(find_clusters)
@@ -0,0 +1,173 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Density and centroid clustering of the road points, at full-dataset scale.
+
+Points are projected to local meters. A KD-tree answers k-nearest-neighbor
+queries one chunk at a time, across all cores, so the neighborhood graph
+costs n * k entries however many rows there are. From it we take an
+HDBSCAN-style minimum spanning tree over mutual reachability distances;
+cutting that tree at eps yields approximate DBSCAN* clusters, and any
+number of eps values can be tried without repeating a neighbor query.
+
+It is an approximation, not DBSCAN: we never gather the eps-radius
+neighborhoods. Two core points within eps of each other are joined only
+if some chain of kNN edges links them, so with a small k a dense region
+can split in two, though clusters never merge that DBSCAN would keep
+apart. And border points, which DBSCAN would attach to a cluster, are
+noise here, as in DBSCAN*. With k = n - 1 the core points match exactly.
+Mini-batch k-means, fed chunk by chunk, gives a centroid-based comparison.
+"""
+
+from collections.abc import Iterator
+from time import perf_counter
+from typing import NamedTuple
+
+from numpy.typing import NDArray
+from scipy.sparse import csr_array
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from scipy.spatial import cKDTree
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score
+import numpy as np
+import pandas as pd
+
+from cluster.jutland.spatial_index import M_PER_DEG
+
+NOISE = -1
+CHUNK = 1 << 16
+
+
+def project(df: pd.DataFrame, alt_scale: float = 1.0) -> NDArray[np.float64]:
+    """(x, y, z) in meters, relative to the centroid, with altitude optionally weighted."""
+    lat0 = float(df.lat.mean())
+    x = (
+        (df.lon.to_numpy(np.float64) - df.lon.mean())
+        * M_PER_DEG
+        * np.cos(np.radians(lat0))
+    )
+    y = (df.lat.to_numpy(np.float64) - lat0) * M_PER_DEG
+    z = df.alt.to_numpy(np.float64) * alt_scale
+    return np.stack((x, y, z), axis=1)
+
+
+def _chunks(n: int, chunk: int) -> Iterator[slice]:
+    for start in range(0, n, chunk):
+        yield slice(start, min(start + chunk, n))
+
+
+class Neighbors(NamedTuple):
+    dist: NDArray[np.float64]  # (n, k), ascending, self excluded
+    idx: NDArray[np.int64]
+
+
+def knn(
+    xyz: NDArray[np.float64], k: int, chunk: int = CHUNK, workers: int = -1
+) -> Neighbors:
+    """The k nearest neighbors of every point, querying chunk rows at a time on all cores."""
+    tree = cKDTree(xyz)
+    n = len(xyz)
+    dist = np.empty((n, k))
+    idx = np.empty((n, k), np.int64)
+    for s in _chunks(n, chunk):
+        d, i = tree.query(xyz[s], k=k + 1, workers=workers)
+        # Column 0 is normally the point itself, but duplicates may tie with it.
+        dist[s], idx[s] = d[:, 1:], i[:, 1:]
+    return Neighbors(dist, idx)
+
+
+def reachability_mst(nbrs: Neighbors, min_samples: int) -> csr_array:
+    """
+    Minimum spanning forest of the kNN graph, weighted by mutual reachability,
+    max(core(a), core(b), d(a, b)), where core is the distance to the
+    min_samples-th neighbor (counting the point itself, as DBSCAN does).
+    """
+    n, k = nbrs.idx.shape
+    assert 1 < min_samples <= k + 1, (min_samples, k)
+    core = nbrs.dist[:, min_samples - 2]
+    # csgraph routines want 32-bit indices.
+    a = np.repeat(np.arange(n, dtype=np.int32), k)
+    b = nbrs.idx.ravel().astype(np.int32)
+    w = np.maximum(np.maximum(core[a], core[b]), nbrs.dist.ravel())
+    # Zero would read as "no edge", so nudge coincident points apart.
+    w = np.maximum(w, np.finfo(np.float64).tiny)
+    graph = csr_array((w, (a, b)), shape=(n, n))
+    return csr_array(minimum_spanning_tree(graph))
+
+
+def knn_dbscan_labels(
+    mst: csr_array, core: NDArray[np.float64], eps: float
+) -> NDArray[np.int64]:
+    """kNN-approximate DBSCAN* at radius eps: components of the MST cut at eps, non-core points are noise."""
+    coo = mst.tocoo()
+    keep = coo.data <= eps
+    n = mst.shape[0]
+    cut = csr_array((coo.data[keep], (coo.row[keep], coo.col[keep])), shape=(n, n))
+    _, labels = connected_components(cut, directed=False)
+    labels = labels.astype(np.int64)
+    labels[core > eps] = NOISE
+    return labels
+
+
+def minibatch_kmeans(
+    xyz: NDArray[np.float64], n_clusters: int, chunk: int = CHUNK, seed: int = 0
+) -> NDArray[np.int64]:
+    km = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, n_init=1)
+    for s in _chunks(len(xyz), max(chunk, n_clusters)):
+        km.partial_fit(xyz[s])
+    return np.concatenate([km.predict(xyz[s]) for s in _chunks(len(xyz), chunk)])
+
+
+def adjusted_rand(truth: NDArray[np.integer], labels: NDArray[np.integer]) -> float:
+    """Adjusted Rand index, with each noise point counted as a cluster of its own."""
+    labels = labels.copy()
+    noise = labels == NOISE
+    labels[noise] = labels.max() + 1 + np.arange(noise.sum())
+    return float(adjusted_rand_score(truth, labels))
+
+
+def cluster_report(
+    df: pd.DataFrame,
+    eps: tuple[float, ...] = (10.0, 25.0, 50.0),
+    min_samples: int = 4,
+    n_clusters: int = 1000,
+    alt_scale: float = 1.0,
+) -> pd.DataFrame:
+    """One row per method: clusters found, noise fraction, ARI vs osm_id, and rows/s."""
+    truth = df.osm_id.to_numpy()
+    xyz = project(df, alt_scale)
+    n = len(xyz)
+    rows = []
+
+    t0 = perf_counter()
+    nbrs = knn(xyz, k=min_samples)
+    mst = reachability_mst(nbrs, min_samples)
+    graph_s = perf_counter() - t0
+    core = nbrs.dist[:, min_samples - 2]
+    for e in eps:
+        t0 = perf_counter()
+        labels = knn_dbscan_labels(mst, core, e)
+        elapsed = graph_s + perf_counter() - t0
+        rows.append(_row(f"knn-dbscan* eps={e:g}", truth, labels, n, elapsed))
+
+    t0 = perf_counter()
+    labels = minibatch_kmeans(xyz, min(n_clusters, n))
+    rows.append(_row(f"kmeans k={n_clusters}", truth, labels, n, perf_counter() - t0))
+    return pd.DataFrame(rows)
+
+
+def _row(
+    method: str,
+    truth: NDArray[np.integer],
+    labels: NDArray[np.int64],
+    n: int,
+    elapsed: float,
+) -> dict[str, float | int | str]:
+    found = labels[labels != NOISE]
+    return {
+        "method": method,
+        "clusters": len(np.unique(found)),
+        "noise": 1 - len(found) / n,
+        "ari": adjusted_rand(truth, labels),
+        "seconds": elapsed,
+        "rows_per_sec": n / elapsed,
+    }
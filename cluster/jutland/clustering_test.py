@@ -0,0 +1,59 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import adjusted_rand_score
+import numpy as np
+
+from cluster.jutland.clustering import (
+    NOISE,
+    adjusted_rand,
+    cluster_report,
+    knn,
+    knn_dbscan_labels,
+    minibatch_kmeans,
+    project,
+    reachability_mst,
+)
+from cluster.jutland.road_graph_test import street_grid
+
+
+class ClusteringTest(unittest.TestCase):
+    def test_matches_dbscan_on_core_points(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = np.concatenate([rng.normal(c, 1.0, (60, 3)) for c in (0, 8, 16)])
+        xyz = np.concatenate((xyz, rng.uniform(-5, 25, (20, 3))))
+        min_samples, eps = 5, 1.2
+        # With k = n - 1 the neighbor graph is complete, so the result is exact.
+        nbrs = knn(xyz, k=len(xyz) - 1, chunk=50)
+        labels = knn_dbscan_labels(
+            reachability_mst(nbrs, min_samples), nbrs.dist[:, min_samples - 2], eps
+        )
+
+        db = DBSCAN(eps=eps, min_samples=min_samples).fit(xyz)
+        core = db.core_sample_indices_
+        self.assertEqual(set(core), set(np.flatnonzero(labels != NOISE)))
+        self.assertEqual(1.0, adjusted_rand_score(db.labels_[core], labels[core]))
+
+    def test_adjusted_rand(self) -> None:
+        truth = np.array([1, 1, 2, 2])
+        self.assertEqual(1.0, adjusted_rand(truth, np.array([5, 5, 7, 7])))
+        # Noise points do not all land in one shared cluster.
+        self.assertLess(adjusted_rand(truth, np.array([NOISE] * 4)), 1.0)
+
+    def test_report(self) -> None:
+        df = street_grid(6, 20)
+        xyz = project(df, alt_scale=0.0)
+        self.assertAlmostEqual(0.0, xyz[:, 0].mean())
+        self.assertEqual(0.0, np.abs(xyz[:, 2]).max())
+        labels = minibatch_kmeans(xyz, n_clusters=12, chunk=256)
+        self.assertEqual(12, len(np.unique(labels)))
+
+        report = cluster_report(df, eps=(5.0, 500.0), n_clusters=12)
+        self.assertEqual(
+            ["knn-dbscan* eps=5", "knn-dbscan* eps=500", "kmeans k=12"],
+            report.method.tolist(),
+        )
+        self.assertTrue((report.rows_per_sec > 0).all())
+        self.assertEqual(1.0, report.noise[0])  # points are 60 m or more apart
+        self.assertEqual(0.0, report.noise[1])
@@ -1,48 +1,71 @@
 # Copyright 2021 John Hanley. MIT licensed.
-from collections import Counter
 from pathlib import Path
-import re
+from typing import NamedTuple
 
 from ydata_profiling import ProfileReport
 import pandas as pd
 import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 
 
+class BBox(NamedTuple):
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+
+# Typed columns: Open Street Map ID, deg, deg, meters.
+# At these latitudes a float32 ULP is about a decimeter, plenty for road points.
+SCHEMA = pa.schema(
+    [
+        ("osm_id", pa.int64()),
+        ("lon", pa.float32()),
+        ("lat", pa.float32()),
+        ("alt", pa.float32()),
+    ]
+)
+OSM_BUCKET_BITS = 24  # Each partition holds a 16 M range of osm_id values.
+
+NORTHERN_TIP = BBox(8.0, 57.55, 11.5, 58.0)
+
+
 class Dataset:
     TMP = Path("/tmp")
     SPATIAL = TMP / "3D_spatial_network.txt"
+    STORE = TMP / "3D_spatial_network"
+    GRID = TMP / "3D_spatial_network_grid.parquet"
 
     @classmethod
-    def get_df(cls) -> pd.DataFrame:
-        """Densifies (filters) the somewhat sparse UCI roadway dataset."""
-        base = re.sub(r"\.txt$", "", f"{cls.SPATIAL}")
-        cache = Path(f"{base}.parquet")
-        if not cache.exists():
-            cols = "osm_id lon lat alt"  # Open Street Map ID, deg, deg, meters
-            df = pd.read_csv(cls.SPATIAL, names=cols.split())
+    def get_df(cls, bbox: BBox | None = NORTHERN_TIP) -> pd.DataFrame:
+        """Densifies (filters) the somewhat sparse UCI roadway dataset.
+
+        The Parquet store holds all of Denmark, and we select a region at read time.
+        """
+        if not cls.STORE.exists():
+            n_raw = ingest(cls.SPATIAL, cls.STORE)
+            assert 434874 == n_raw, n_raw
+            df = read_store(cls.STORE, None)
             assert (df.alt < 135).all()  # All mentioned roads are near sea level.
             assert (df.lat > 56.58).all()
             assert (df.lat < 57.76).all()
             assert (df.lon > 8.14).all()
             assert (df.lon < 11.20).all()
-            assert 434874 == len(df), len(df)
-
-            df = cls.filter_short_segments(df)
             # assert 405_241 == len(df), len(df)  # 3
             assert 388_147 == len(df), len(df)  # 4
             # assert 352_220 == len(df), len(df)  # 6
             # assert 287_331 == len(df), len(df)  # 10
             # assert 55_972 == len(df), len(df)  # 50
 
-            df = df[df.lat > 57.55]
-            assert 25_431 == len(df), len(df)
+            # Was 25_431 rows with float64 coords. Rounding to float32
+            # might nudge a point or two across the 57.55 boundary.
+            northern = read_store(cls.STORE, NORTHERN_TIP)
+            assert 25_400 < len(northern) < 25_460, len(northern)
+            cls.profile(northern, cls.TMP / "3D_spatial_network.html")
 
-            cls.profile(df, Path(f"{base}.html"))
-            pq.write_table(pa.Table.from_pandas(df), cache)
-
-        # Elapsed time is less than two seconds.
-        return pd.DataFrame(pq.read_table(cache).to_pandas())
+        return read_store(cls.STORE, bbox)
 
     @staticmethod
     def filter_short_segments(df: pd.DataFrame, k: int = 4) -> pd.DataFrame:
@@ -50,11 +73,68 @@ class Dataset:
 
         So e.g. singleton "roads", containing just a single point, are discarded.
         """
-        counts = Counter(df.osm_id)
-        small_roads = {osm_id for osm_id, count in counts.items() if count < k}
-        return df[~df.osm_id.isin(small_roads)]
+        counts = df.osm_id.map(df.osm_id.value_counts())
+        return df[counts >= k]
 
     @staticmethod
     def profile(df: pd.DataFrame, out: Path) -> None:
         if not out.exists():
             ProfileReport(df).to_file(out)
+
+
+def _bucket_path(store: Path, bucket: int) -> Path:
+    return store / f"osm_bucket={bucket}" / "part-0.parquet"
+
+
+def ingest(src: Path, store: Path, k: int = 4, block_size: int = 1 << 22) -> int:
+    """
+    Streams the CSV into Parquet files partitioned by osm_id range,
+    never holding more than one block of text in memory.
+    Every point of a road lands in the same partition, so we can
+    filter_short_segments() one partition at a time. Returns raw row count.
+    """
+    names = SCHEMA.names
+    reader = pv.open_csv(
+        src,
+        read_options=pv.ReadOptions(column_names=names, block_size=block_size),
+        convert_options=pv.ConvertOptions(column_types=SCHEMA),
+    )
+    writers: dict[int, pq.ParquetWriter] = {}
+    n_raw = 0
+    try:
+        for batch in reader:
+            n_raw += batch.num_rows
+            df = batch.to_pandas()
+            buckets = df.osm_id.to_numpy() >> OSM_BUCKET_BITS
+            for bucket, group in df.groupby(buckets, sort=False):
+                if bucket not in writers:
+                    out = _bucket_path(store, int(bucket))
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    writers[bucket] = pq.ParquetWriter(out, SCHEMA)
+                table = pa.Table.from_pandas(group, SCHEMA, preserve_index=False)
+                writers[bucket].write_table(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    # Partitions are small, so the second pass can afford to load each one.
+    for bucket in writers:
+        out = _bucket_path(store, int(bucket))
+        df = Dataset.filter_short_segments(pq.read_table(out).to_pandas(), k)
+        pq.write_table(pa.Table.from_pandas(df, SCHEMA, preserve_index=False), out)
+    return n_raw
+
+
+def read_store(store: Path, bbox: BBox | None = None) -> pd.DataFrame:
+    """Reads just the rows within bbox, letting Arrow push the predicate down."""
+    dataset = ds.dataset(store, schema=SCHEMA, partitioning="hive")
+    filt = None
+    if bbox:
+        lon, lat = ds.field("lon"), ds.field("lat")
+        filt = (
+            (lon >= bbox.min_lon)
+            & (lon <= bbox.max_lon)
+            & (lat >= bbox.min_lat)
+            & (lat <= bbox.max_lat)
+        )
+    return dataset.to_table(filter=filt).to_pandas()
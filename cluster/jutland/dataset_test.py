@@ -0,0 +1,89 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cluster.jutland.dataset import BBox, Dataset, ingest, read_store
+from cluster.jutland.spatial_index import GridIndex, haversine_m
+
+
+def synthetic_roads(out: Path, n_roads: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Random-walk roads around North Jutland, in the UCI CSV format."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n_roads):
+        osm_id = int(rng.integers(1e6, 5e8))
+        n = int(rng.integers(1, 12))
+        lon = rng.uniform(8.2, 11.1) + np.cumsum(rng.normal(0, 0.002, n))
+        lat = rng.uniform(56.6, 57.7) + np.cumsum(rng.normal(0, 0.002, n))
+        alt = rng.uniform(0, 100, n)
+        frames.append(
+            pd.DataFrame({"osm_id": osm_id, "lon": lon, "lat": lat, "alt": alt})
+        )
+    df = pd.concat(frames, ignore_index=True)
+    df.to_csv(out, header=False, index=False)
+    return df
+
+
+class DatasetTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.folder = Path(self.temp.name)
+        self.raw = synthetic_roads(self.folder / "roads.txt")
+        self.store = self.folder / "store"
+        self.n_raw = ingest(self.folder / "roads.txt", self.store, block_size=1 << 12)
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def test_filter_short_segments(self) -> None:
+        df = pd.DataFrame({"osm_id": [1, 1, 2, 3, 3, 3], "lon": range(6)})
+        self.assertEqual([3, 4, 5], Dataset.filter_short_segments(df, 3).lon.tolist())
+        self.assertEqual(6, len(Dataset.filter_short_segments(df, 1)))
+
+    def test_ingest(self) -> None:
+        self.assertEqual(len(self.raw), self.n_raw)
+        df = read_store(self.store)
+        expected = Dataset.filter_short_segments(self.raw)
+        self.assertEqual(len(expected), len(df))
+        self.assertEqual(np.float32, df.lat.dtype)
+        self.assertTrue(len(list(self.store.glob("osm_bucket=*"))) > 1)
+
+        # Each road's points keep their original order.
+        road = expected.osm_id.iloc[0]
+        got = df[df.osm_id == road].alt.to_numpy()
+        want = expected[expected.osm_id == road].alt.to_numpy(np.float32)
+        self.assertTrue(np.array_equal(want, got))
+
+        box = BBox(9.0, 57.0, 10.0, 57.5)
+        sub = read_store(self.store, box)
+        self.assertTrue(0 < len(sub) < len(df))
+        self.assertTrue(sub.lat.between(57.0, 57.5).all())
+
+    def test_grid_index(self) -> None:
+        df = read_store(self.store)
+        index = GridIndex.build(self.store, self.folder / "grid.parquet", cell_deg=0.05)
+        self.assertEqual(len(df), len(index.cells))
+
+        box = BBox(9.0, 57.0, 10.0, 57.5)
+        got = index.bbox(box).sort_values(["osm_id", "alt"]).reset_index(drop=True)
+        want = (
+            read_store(self.store, box)
+            .sort_values(["osm_id", "alt"])
+            .reset_index(drop=True)
+        )
+        pd.testing.assert_frame_equal(want, got)
+        self.assertEqual(0, len(index.bbox(BBox(0.0, 0.0, 1.0, 1.0))))
+
+        for lon, lat in [(9.9, 57.05), (8.0, 56.0), (10.5, 57.6)]:
+            near = index.nearest(lon, lat, k=5)
+            meters = np.sort(haversine_m(lon, lat, df.lon, df.lat))[:5]
+            self.assertTrue(np.allclose(meters, near.meters))
+
+    def test_haversine(self) -> None:
+        # One degree of latitude is about 111.2 km.
+        self.assertAlmostEqual(111_195, haversine_m(9.0, 57.0, 9.0, 58.0), delta=1)
+        self.assertEqual(0.0, haversine_m(9.0, 57.0, 9.0, 57.0))
@@ -0,0 +1,488 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Routable road network, built from the per-road point sequences.
+
+Points that share a coordinate (to within snap_deg) become one node, so
+roads meeting at an intersection are joined. Consecutive points along a road
+become a pair of directed edges, weighted by distance plus a penalty for
+climbing. Queries run as numba A* (or plain Dijkstra) over CSR arrays, or,
+after a one-time contraction, as bidirectional searches over a contraction
+hierarchy, which settle only a few hundred nodes apiece.
+"""
+
+from heapq import heappop, heappush
+from pathlib import Path
+
+from numba import get_num_threads, njit, prange
+from numpy.typing import NDArray
+from scipy.sparse import csr_array
+from scipy.spatial import cKDTree
+import numpy as np
+import pandas as pd
+
+from cluster.jutland.dataset import Dataset
+from cluster.jutland.spatial_index import EARTH_RADIUS_M, haversine_m
+
+INF = np.inf
+
+
+@njit  # type: ignore [misc]
+def _haversine(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    y1, y2 = np.radians(lat1), np.radians(lat2)
+    a = (
+        np.sin((y2 - y1) / 2) ** 2
+        + np.cos(y1) * np.cos(y2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    )
+    return float(2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a)))
+
+
+@njit  # type: ignore [misc]
+def _astar(  # noqa: PLR0913, PLR0917
+    indptr: NDArray[np.int64],
+    indices: NDArray[np.int64],
+    weights: NDArray[np.float64],
+    lon: NDArray[np.float64],
+    lat: NDArray[np.float64],
+    src: int,
+    dst: int,
+    use_heuristic: bool,
+    dist: NDArray[np.float64],
+    pred: NDArray[np.int64],
+    touched: list[int],
+) -> float:
+    """
+    Point-to-point search. Caller supplies dist (all INF) and pred scratch,
+    and we note each node we touch, so the caller can reset just those.
+    The straight-line heuristic is admissible, as no edge is shorter than
+    the great circle between its ends.
+    """
+    dist[src] = 0.0
+    pred[src] = -1
+    touched.append(src)
+    h = _haversine(lon[src], lat[src], lon[dst], lat[dst]) if use_heuristic else 0.0
+    heap = [(h, src)]
+    while heap:
+        _, u = heappop(heap)
+        if u == dst:
+            return float(dist[dst])
+        du = dist[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            dv = du + weights[k]
+            if dv < dist[v]:
+                if dist[v] == INF:
+                    touched.append(v)
+                dist[v] = dv
+                pred[v] = u
+                h = (
+                    _haversine(lon[v], lat[v], lon[dst], lat[dst])
+                    if use_heuristic
+                    else 0.0
+                )
+                heappush(heap, (dv + h, v))
+    return INF
+
+
+@njit  # type: ignore [misc]
+def _astar_path(  # noqa: PLR0913, PLR0917
+    indptr: NDArray[np.int64],
+    indices: NDArray[np.int64],
+    weights: NDArray[np.float64],
+    lon: NDArray[np.float64],
+    lat: NDArray[np.float64],
+    src: int,
+    dst: int,
+) -> tuple[float, NDArray[np.int64]]:
+    dist = np.full(len(lon), INF)
+    pred = np.full(len(lon), -1, np.int64)
+    touched = [0]
+    touched.pop()
+    use_heuristic = True
+    cost = _astar(
+        indptr, indices, weights, lon, lat, src, dst, use_heuristic, dist, pred, touched
+    )
+    return cost, pred
+
+
+@njit(parallel=True)  # type: ignore [misc]
+def _astar_batch(  # noqa: PLR0913, PLR0917
+    indptr: NDArray[np.int64],
+    indices: NDArray[np.int64],
+    weights: NDArray[np.float64],
+    lon: NDArray[np.float64],
+    lat: NDArray[np.float64],
+    pairs: NDArray[np.int64],
+    use_heuristic: bool,
+    n_chunks: int,
+) -> NDArray[np.float64]:
+    out = np.empty(len(pairs))
+    n = len(lon)
+    for c in prange(n_chunks):
+        # Scratch is allocated once per chunk, and reset sparsely after each query.
+        dist = np.full(n, INF)
+        pred = np.full(n, -1, np.int64)
+        for q in range(c, len(pairs), n_chunks):
+            touched = [0]
+            touched.pop()
+            out[q] = _astar(
+                indptr, indices, weights, lon, lat,
+                pairs[q, 0], pairs[q, 1], use_heuristic, dist, pred, touched,
+            )  # fmt: skip
+            for v in touched:
+                dist[v] = INF
+    return out
+
+
+@njit  # type: ignore [misc]
+def _ch_query(  # noqa: PLR0913, PLR0917
+    up_ptr: NDArray[np.int64],
+    up_idx: NDArray[np.int64],
+    up_w: NDArray[np.float64],
+    dn_ptr: NDArray[np.int64],
+    dn_idx: NDArray[np.int64],
+    dn_w: NDArray[np.float64],
+    src: int,
+    dst: int,
+    dist_f: NDArray[np.float64],
+    dist_b: NDArray[np.float64],
+    touched: list[int],
+) -> float:
+    """Bidirectional Dijkstra, forward upward from src and backward upward from dst."""
+    best = INF
+    dist_f[src] = 0.0
+    dist_b[dst] = 0.0
+    touched.append(src)
+    touched.append(dst)
+    heap_f = [(0.0, src)]
+    heap_b = [(0.0, dst)]
+    while heap_f or heap_b:
+        for forward in (True, False):
+            heap = heap_f if forward else heap_b
+            if not heap:
+                continue
+            d, u = heappop(heap)
+            if d >= best:
+                heap.clear()  # nothing left on this side can improve on best
+                continue
+            dist = dist_f if forward else dist_b
+            other = dist_b if forward else dist_f
+            if d > dist[u]:
+                continue  # stale entry
+            best = min(best, d + other[u])
+            ptr, idx, w = (up_ptr, up_idx, up_w) if forward else (dn_ptr, dn_idx, dn_w)
+            for k in range(ptr[u], ptr[u + 1]):
+                v = idx[k]
+                dv = d + w[k]
+                if dv < dist[v]:
+                    if dist_f[v] == INF and dist_b[v] == INF:
+                        touched.append(v)
+                    dist[v] = dv
+                    heappush(heap, (dv, v))
+    return best
+
+
+@njit(parallel=True)  # type: ignore [misc]
+def _ch_batch(  # noqa: PLR0913, PLR0917
+    up_ptr: NDArray[np.int64],
+    up_idx: NDArray[np.int64],
+    up_w: NDArray[np.float64],
+    dn_ptr: NDArray[np.int64],
+    dn_idx: NDArray[np.int64],
+    dn_w: NDArray[np.float64],
+    pairs: NDArray[np.int64],
+    n_chunks: int,
+) -> NDArray[np.float64]:
+    out = np.empty(len(pairs))
+    n = len(up_ptr) - 1
+    for c in prange(n_chunks):
+        dist_f = np.full(n, INF)
+        dist_b = np.full(n, INF)
+        for q in range(c, len(pairs), n_chunks):
+            touched = [0]
+            touched.pop()
+            out[q] = _ch_query(
+                up_ptr, up_idx, up_w, dn_ptr, dn_idx, dn_w,
+                pairs[q, 0], pairs[q, 1], dist_f, dist_b, touched,
+            )  # fmt: skip
+            for v in touched:
+                dist_f[v] = INF
+                dist_b[v] = INF
+    return out
+
+
+def _to_csr_arrays(
+    n: int, u: NDArray[np.int64], v: NDArray[np.int64], w: NDArray[np.float64]
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.float64]]:
+    """Sorts edges by source, keeping only the lightest of any parallel edges."""
+    order = np.lexsort((w, v, u))
+    u, v, w = u[order], v[order], w[order]
+    first = np.ones(len(u), np.bool_)
+    first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+    u, v, w = u[first], v[first], w[first]
+    indptr = np.zeros(n + 1, np.int64)
+    np.cumsum(np.bincount(u, minlength=n), out=indptr[1:])
+    return indptr, v.astype(np.int64), w.astype(np.float64)
+
+
+def _n_chunks(n_queries: int) -> int:
+    return max(1, min(n_queries, 4 * get_num_threads()))
+
+
+class RoadGraph:
+    """Directed road network in CSR form, with a lon, lat, alt per node."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        lon: NDArray[np.float64],
+        lat: NDArray[np.float64],
+        alt: NDArray[np.float64],
+        indptr: NDArray[np.int64],
+        indices: NDArray[np.int64],
+        weights: NDArray[np.float64],
+    ) -> None:
+        self.lon, self.lat, self.alt = lon, lat, alt
+        self.indptr, self.indices, self.weights = indptr, indices, weights
+        self._kdtree: cKDTree | None = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.lon)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_df(
+        cls, df: pd.DataFrame, climb_penalty: float = 8.0, snap_deg: float = 1e-6
+    ) -> "RoadGraph":
+        """
+        Expects rows of osm_id, lon, lat, alt, with each road's points
+        contiguous and in order, as Dataset.get_df() supplies them.
+        Each meter of climb costs as much as climb_penalty meters of travel.
+        """
+        lon = df.lon.to_numpy(np.float64)
+        lat = df.lat.to_numpy(np.float64)
+        alt = df.alt.to_numpy(np.float64)
+        osm_id = df.osm_id.to_numpy()
+        snapped = np.stack((np.round(lon / snap_deg), np.round(lat / snap_deg)), axis=1)
+        _, first, node = np.unique(
+            snapped.astype(np.int64), axis=0, return_index=True, return_inverse=True
+        )
+        node = node.ravel()
+
+        same_road = osm_id[1:] == osm_id[:-1]
+        a, b = node[:-1][same_road], node[1:][same_road]
+        keep = a != b  # repeated points would be self-loops
+        a, b = a[keep], b[keep]
+        n_lon, n_lat, n_alt = lon[first], lat[first], alt[first]
+        meters = haversine_m(n_lon[a], n_lat[a], n_lon[b], n_lat[b])
+        climb = n_alt[b] - n_alt[a]
+        u = np.concatenate((a, b))
+        v = np.concatenate((b, a))
+        w = np.concatenate(
+            (
+                meters + climb_penalty * np.maximum(climb, 0),
+                meters + climb_penalty * np.maximum(-climb, 0),
+            )
+        )
+        return cls(n_lon, n_lat, n_alt, *_to_csr_arrays(len(first), u, v, w))
+
+    def to_csr(self) -> csr_array:
+        n = self.num_nodes
+        return csr_array((self.weights, self.indices, self.indptr), shape=(n, n))
+
+    def nearest_node(
+        self, lon: NDArray[np.floating], lat: NDArray[np.floating]
+    ) -> NDArray[np.int64]:
+        """Snaps arbitrary points to their closest graph nodes."""
+        scale = np.cos(np.radians(np.median(self.lat)))
+        if self._kdtree is None:
+            self._kdtree = cKDTree(np.stack((self.lon * scale, self.lat), axis=1))
+        query = np.stack((np.asarray(lon) * scale, np.asarray(lat)), axis=1)
+        _, idx = self._kdtree.query(query)
+        return np.asarray(idx, np.int64)
+
+    def distances(
+        self, pairs: NDArray[np.integer], heuristic: bool = True
+    ) -> NDArray[np.float64]:
+        """Cost of the cheapest route for each (src, dst) node pair, by A* or Dijkstra."""
+        pairs = np.asarray(pairs, np.int64).reshape(-1, 2)
+        return _astar_batch(
+            self.indptr, self.indices, self.weights, self.lon, self.lat,
+            pairs, heuristic, _n_chunks(len(pairs)),
+        )  # fmt: skip
+
+    def path(self, src: int, dst: int) -> list[int]:
+        """Node sequence of the cheapest route, empty if dst is unreachable."""
+        cost, pred = _astar_path(
+            self.indptr, self.indices, self.weights, self.lon, self.lat, src, dst
+        )
+        if cost == INF:
+            return []
+        nodes = [dst]
+        while nodes[-1] != src:
+            nodes.append(int(pred[nodes[-1]]))
+        return nodes[::-1]
+
+    def contract(self, witness_settle_limit: int = 64) -> "ContractionHierarchy":
+        return ContractionHierarchy.build(self, witness_settle_limit)
+
+
+class _Contractor:
+    """Mutable adjacency, as dicts, while we contract nodes in priority order."""
+
+    def __init__(self, g: RoadGraph, witness_settle_limit: int) -> None:
+        n = g.num_nodes
+        self.witness_settle_limit = witness_settle_limit
+        self.out_adj: list[dict[int, float]] = [{} for _ in range(n)]
+        self.in_adj: list[dict[int, float]] = [{} for _ in range(n)]
+        src = np.repeat(np.arange(n), np.diff(g.indptr))
+        for u, v, w in zip(src.tolist(), g.indices.tolist(), g.weights.tolist()):
+            self.out_adj[u][v] = w
+            self.in_adj[v][u] = w
+        self.contracted = np.zeros(n, np.bool_)
+        self.deleted_nbrs = np.zeros(n, np.int64)
+
+    def _witness_dist(self, u: int, v: int, limit: float) -> dict[int, float]:
+        """Local search from u, avoiding v, which settles a bounded number of nodes."""
+        dist = {u: 0.0}
+        heap = [(0.0, u)]
+        settled = 0
+        while heap and settled < self.witness_settle_limit:
+            d, x = heappop(heap)
+            if d > limit:
+                break
+            if d > dist[x]:
+                continue
+            settled += 1
+            for y, c in self.out_adj[x].items():
+                if y != v and not self.contracted[y] and d + c < dist.get(y, INF):
+                    dist[y] = d + c
+                    heappush(heap, (d + c, y))
+        return dist
+
+    def shortcuts(self, v: int) -> list[tuple[int, int, float]]:
+        """Shortcuts needed if we were to contract v now."""
+        outs = {w: c for w, c in self.out_adj[v].items() if not self.contracted[w]}
+        if not outs:
+            return []
+        max_out = max(outs.values())
+        found = []
+        for u, c_uv in self.in_adj[v].items():
+            if self.contracted[u]:
+                continue
+            dist = self._witness_dist(u, v, c_uv + max_out)
+            for w, c_vw in outs.items():
+                if w != u and dist.get(w, INF) > c_uv + c_vw:
+                    found.append((u, w, c_uv + c_vw))
+        return found
+
+    def priority(self, v: int) -> int:
+        live = ~self.contracted
+        degree = sum(live[x] for x in self.out_adj[v]) + sum(
+            live[x] for x in self.in_adj[v]
+        )
+        return len(self.shortcuts(v)) - int(degree) + int(self.deleted_nbrs[v])
+
+    def _contract(self, v: int) -> None:
+        for u, w, c in self.shortcuts(v):
+            if c < self.out_adj[u].get(w, INF):
+                self.out_adj[u][w] = c
+                self.in_adj[w][u] = c
+        self.contracted[v] = True
+        for x in set(self.out_adj[v]) | set(self.in_adj[v]):
+            self.deleted_nbrs[x] += 1
+
+    def run(self) -> NDArray[np.int64]:
+        """Contracts every node, and returns the order in which we did so."""
+        n = len(self.contracted)
+        heap = [(self.priority(v), v) for v in range(n)]
+        heap.sort()
+        rank = np.zeros(n, np.int64)
+        next_rank = 0
+        while heap:
+            _, v = heappop(heap)
+            # Lazy update: if v's priority got worse, put it back.
+            p = self.priority(v)
+            if heap and p > heap[0][0]:
+                heappush(heap, (p, v))
+                continue
+            self._contract(v)
+            rank[v] = next_rank
+            next_rank += 1
+        return rank
+
+
+class ContractionHierarchy:
+    """
+    Every node gets a rank, and shortcuts preserve shortest distances
+    once lower-ranked nodes are removed. A query need only climb:
+    forward from src along up edges, and backward from dst along down edges.
+    """
+
+    def __init__(
+        self,
+        rank: NDArray[np.int64],
+        up: tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.float64]],
+        down: tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.float64]],
+    ) -> None:
+        self.rank = rank
+        self.up = up  # u -> v, where rank[v] > rank[u]
+        self.down = down  # u -> v, where rank[u] > rank[v], stored as v -> u
+
+    @classmethod
+    def build(
+        cls, g: RoadGraph, witness_settle_limit: int = 64
+    ) -> "ContractionHierarchy":
+        c = _Contractor(g, witness_settle_limit)
+        rank = c.run()
+        n = g.num_nodes
+        us, vs, ws = [], [], []
+        for u in range(n):
+            for v, w in c.out_adj[u].items():
+                us.append(u)
+                vs.append(v)
+                ws.append(w)
+        u_arr, v_arr, w_arr = np.array(us), np.array(vs), np.array(ws)
+        upward = rank[v_arr] > rank[u_arr]
+        up = _to_csr_arrays(n, u_arr[upward], v_arr[upward], w_arr[upward])
+        down = _to_csr_arrays(n, v_arr[~upward], u_arr[~upward], w_arr[~upward])
+        return cls(rank, up, down)
+
+    def distances(self, pairs: NDArray[np.integer]) -> NDArray[np.float64]:
+        pairs = np.asarray(pairs, np.int64).reshape(-1, 2)
+        return _ch_batch(*self.up, *self.down, pairs, _n_chunks(len(pairs)))
+
+    def save(self, out: Path) -> None:
+        up_ptr, up_idx, up_w = self.up
+        dn_ptr, dn_idx, dn_w = self.down
+        np.savez(
+            out,
+            rank=self.rank,
+            up_ptr=up_ptr,
+            up_idx=up_idx,
+            up_w=up_w,
+            dn_ptr=dn_ptr,
+            dn_idx=dn_idx,
+            dn_w=dn_w,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "ContractionHierarchy":
+        with np.load(path) as z:
+            up = z["up_ptr"], z["up_idx"], z["up_w"]
+            down = z["dn_ptr"], z["dn_idx"], z["dn_w"]
+            return cls(z["rank"], up, down)
+
+
+def get_road_graph() -> RoadGraph:
+    return RoadGraph.from_df(Dataset.get_df(None))
+
+
+def get_hierarchy(g: RoadGraph) -> ContractionHierarchy:
+    """Contraction takes minutes, so we keep the result next to the store."""
+    path = Dataset.TMP / f"3D_spatial_network_ch_{g.num_nodes}.npz"
+    if not path.exists():
+        g.contract().save(path)
+    return ContractionHierarchy.load(path)
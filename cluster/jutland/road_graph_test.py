@@ -0,0 +1,70 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from itertools import pairwise
+import unittest
+
+from scipy.sparse.csgraph import dijkstra
+import numpy as np
+import pandas as pd
+
+from cluster.jutland.road_graph import RoadGraph
+
+
+def street_grid(n: int = 12, step: int = 4, seed: int = 0) -> pd.DataFrame:
+    """An n x n grid of streets, each with step points between intersections."""
+    rng = np.random.default_rng(seed)
+    ticks = np.linspace(0, 0.1, (n - 1) * step + 1)
+    alt = rng.uniform(0, 50, (len(ticks), len(ticks)))
+    frames = []
+    for i in range(n):
+        k = i * step
+        # Streets cross at exactly the same coordinates, so they will share a node.
+        frames.append(
+            pd.DataFrame({"lon": 9.8 + ticks, "lat": 57.0 + ticks[k], "alt": alt[k]})
+        )
+        frames.append(
+            pd.DataFrame({"lon": 9.8 + ticks[k], "lat": 57.0 + ticks, "alt": alt[:, k]})
+        )
+    for osm_id, frame in enumerate(frames):
+        frame.insert(0, "osm_id", osm_id)
+    return pd.concat(frames, ignore_index=True)
+
+
+class RoadGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.g = RoadGraph.from_df(street_grid())
+        rng = np.random.default_rng(1)
+        self.pairs = rng.integers(0, self.g.num_nodes, (200, 2))
+        full = dijkstra(self.g.to_csr(), indices=np.unique(self.pairs[:, 0]))
+        row = {s: r for r, s in enumerate(np.unique(self.pairs[:, 0]))}
+        self.want = np.array([full[row[s], d] for s, d in self.pairs])
+
+    def test_build(self) -> None:
+        # Intersections are shared, so a 12 x 12 grid of 45-point streets has
+        # 24 * 45 - 144 nodes, and each street contributes 44 edge pairs.
+        self.assertEqual(24 * 45 - 144, self.g.num_nodes)
+        self.assertEqual(2 * 24 * 44, self.g.num_edges)
+        # Uphill costs more than downhill, so the two directions differ.
+        csr = self.g.to_csr()
+        self.assertGreater(abs(csr - csr.T).max(), 0)
+
+    def test_astar_and_dijkstra(self) -> None:
+        self.assertTrue(np.allclose(self.want, self.g.distances(self.pairs)))
+        self.assertTrue(
+            np.allclose(self.want, self.g.distances(self.pairs, heuristic=False))
+        )
+
+        src, dst = map(int, self.pairs[0])
+        path = self.g.path(src, dst)
+        self.assertEqual([src, dst], [path[0], path[-1]])
+        csr = self.g.to_csr()
+        cost = sum(csr[a, b] for a, b in pairwise(path))
+        self.assertAlmostEqual(self.want[0], cost)
+
+    def test_contraction_hierarchy(self) -> None:
+        ch = self.g.contract()
+        self.assertEqual(self.g.num_nodes, len(set(ch.rank.tolist())))
+        self.assertTrue(np.allclose(self.want, ch.distances(self.pairs)))
+
+    def test_nearest_node(self) -> None:
+        idx = self.g.nearest_node(self.g.lon[[5, 50]] + 1e-7, self.g.lat[[5, 50]])
+        self.assertEqual([5, 50], idx.tolist())
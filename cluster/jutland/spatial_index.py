@@ -0,0 +1,162 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Grid index over the road points, for bounding-box and k-nearest queries.
+
+We write a copy of the points sorted by grid cell, in small row groups.
+Opening the index loads only the cell column, a few bytes per point.
+A query maps its region to runs of cells, hence to runs of rows,
+and reads just the row groups that hold them.
+"""
+
+from pathlib import Path
+
+from numpy.typing import ArrayLike, NDArray
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cluster.jutland.dataset import SCHEMA, BBox, Dataset, read_store
+
+EARTH_RADIUS_M = 6_371_008.8
+M_PER_DEG = EARTH_RADIUS_M * np.pi / 180
+
+
+def haversine_m(
+    lon1: ArrayLike,
+    lat1: ArrayLike,
+    lon2: ArrayLike,
+    lat2: ArrayLike,
+) -> NDArray[np.float64]:
+    """Great circle distance in meters, vectorized."""
+    x1, y1, x2, y2 = (
+        np.radians(np.asarray(a, np.float64)) for a in (lon1, lat1, lon2, lat2)
+    )
+    a = (
+        np.sin((y2 - y1) / 2) ** 2
+        + np.cos(y1) * np.cos(y2) * np.sin((x2 - x1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def _cell_num(
+    coord: NDArray[np.floating], origin: float, cell_deg: float
+) -> NDArray[np.int64]:
+    # Build and query must agree exactly on which side of a boundary a point lies.
+    return np.floor((coord.astype(np.float64) - origin) / cell_deg).astype(np.int64)
+
+
+class GridIndex:
+    """Points bucketed into square cells, cell_deg on a side."""
+
+    ROW_GROUP = 4096
+
+    def __init__(self, path: Path) -> None:
+        self.pf = pq.ParquetFile(path)
+        meta = self.pf.schema_arrow.metadata
+        self.origin = float(meta[b"min_lon"]), float(meta[b"min_lat"])
+        self.cell_deg = float(meta[b"cell_deg"])
+        self.nx = int(meta[b"nx"])
+        self.ny = int(meta[b"ny"])
+        self.cells = self.pf.read(columns=["cell"]).column("cell").to_numpy()
+
+    @classmethod
+    def build(cls, store: Path, out: Path, cell_deg: float = 0.01) -> "GridIndex":
+        df = read_store(store)
+        min_lon, min_lat = float(df.lon.min()), float(df.lat.min())
+        ix = _cell_num(df.lon.to_numpy(), min_lon, cell_deg)
+        iy = _cell_num(df.lat.to_numpy(), min_lat, cell_deg)
+        nx, ny = int(ix.max()) + 1, int(iy.max()) + 1
+        df.insert(0, "cell", iy * nx + ix)
+        df = df.sort_values("cell", kind="stable")
+
+        schema = pa.schema([("cell", pa.int64()), *SCHEMA]).with_metadata(
+            {
+                "min_lon": str(min_lon),
+                "min_lat": str(min_lat),
+                "cell_deg": str(cell_deg),
+                "nx": str(nx),
+                "ny": str(ny),
+            }
+        )
+        table = pa.Table.from_pandas(df, schema, preserve_index=False)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, out, row_group_size=cls.ROW_GROUP)
+        return cls(out)
+
+    def _cell_xy(self, lon: float, lat: float) -> tuple[int, int]:
+        return (
+            int(_cell_num(np.array([lon]), self.origin[0], self.cell_deg)[0]),
+            int(_cell_num(np.array([lat]), self.origin[1], self.cell_deg)[0]),
+        )
+
+    def _read_cells(self, x0: int, y0: int, x1: int, y1: int) -> pd.DataFrame:
+        """Points in the (inclusive) rectangle of cells, reading only the row groups needed."""
+        x0, x1 = max(x0, 0), min(x1, self.nx - 1)
+        y0, y1 = max(y0, 0), min(y1, self.ny - 1)
+        if x0 > x1 or y0 > y1:
+            return pd.DataFrame(columns=["cell", *SCHEMA.names])
+        # Each row of cells is a contiguous run of cell ids, hence of rows.
+        rows = np.arange(y0, y1 + 1) * self.nx
+        starts = np.searchsorted(self.cells, rows + x0, side="left")
+        stops = np.searchsorted(self.cells, rows + x1, side="right")
+        groups: set[int] = set()
+        for start, stop in zip(starts, stops):
+            if start < stop:
+                groups.update(
+                    range(start // self.ROW_GROUP, (stop - 1) // self.ROW_GROUP + 1)
+                )
+        if not groups:
+            return pd.DataFrame(columns=["cell", *SCHEMA.names])
+        df = self.pf.read_row_groups(sorted(groups)).to_pandas()
+        x = df.cell % self.nx
+        y = df.cell // self.nx
+        return df[(x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)]
+
+    def bbox(self, bbox: BBox) -> pd.DataFrame:
+        x0, y0 = self._cell_xy(bbox.min_lon, bbox.min_lat)
+        x1, y1 = self._cell_xy(bbox.max_lon, bbox.max_lat)
+        df = self._read_cells(x0, y0, x1, y1)
+        inside = (
+            (df.lon >= bbox.min_lon)
+            & (df.lon <= bbox.max_lon)
+            & (df.lat >= bbox.min_lat)
+            & (df.lat <= bbox.max_lat)
+        )
+        return df[inside].drop(columns="cell").reset_index(drop=True)
+
+    def nearest(self, lon: float, lat: float, k: int = 1) -> pd.DataFrame:
+        """The k points closest to (lon, lat), nearest first, with a meters column."""
+        assert 0 < k <= len(self.cells), k
+        cx, cy = self._cell_xy(lon, lat)
+        # Meters covered by one cell's width, at the narrowest latitude in the grid.
+        top = self.origin[1] + self.ny * self.cell_deg
+        cell_m = (
+            self.cell_deg
+            * M_PER_DEG
+            * np.cos(np.radians(max(abs(top), abs(self.origin[1]))))
+        )
+        r = 0
+        while True:
+            df = self._read_cells(cx - r, cy - r, cx + r, cy + r)
+            covers_all = (
+                cx - r <= 0
+                and cy - r <= 0
+                and cx + r >= self.nx - 1
+                and cy + r >= self.ny - 1
+            )
+            if len(df) >= k:
+                meters = haversine_m(lon, lat, df.lon.to_numpy(), df.lat.to_numpy())
+                kth = np.partition(meters, k - 1)[k - 1]
+                # Any point outside this square of cells is at least r cells away.
+                if kth <= r * cell_m or covers_all:
+                    df = df.assign(meters=meters).nsmallest(k, "meters")
+                    return df.drop(columns="cell").reset_index(drop=True)
+            r = max(1, 2 * r)
+
+
+def get_grid_index() -> GridIndex:
+    if not Dataset.GRID.exists():
+        Dataset.get_df()  # ensure the store exists
+        return GridIndex.build(Dataset.STORE, Dataset.GRID)
+    return GridIndex(Dataset.GRID)
@@ -0,0 +1,149 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Web Mercator tile pyramid over the road points, for level-of-detail maps.
+
+At each zoom a 256 pixel tile is divided into cells a few pixels across,
+and we keep just one point per cell, so no tile holds more than a few
+thousand points however dense the roads. The deepest zoom keeps every point.
+Rows are sorted by (zoom, tile), so a view is a handful of contiguous
+slices, one per row of tiles on screen.
+"""
+
+from pathlib import Path
+from typing import NamedTuple
+
+from numpy.typing import NDArray
+from palettable.colorbrewer import qualitative
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cluster.jutland.dataset import Dataset
+
+TILE_BITS = 8  # 256 pixels on a side
+PALETTE = np.array(qualitative.Paired_12.colors, np.uint8)
+
+
+def road_colors(osm_id: NDArray[np.integer]) -> NDArray[np.uint8]:
+    """An (n, 3) array of palette colors, the same for every point of a road."""
+    # Fibonacci hashing scatters adjacent ids across the palette.
+    h = osm_id.astype(np.uint64) * np.uint64(0x9E37_79B9_7F4A_7C15)
+    return PALETTE[(h >> np.uint64(32)) % np.uint64(len(PALETTE))]
+
+
+def mercator_px(
+    lon: NDArray[np.floating], lat: NDArray[np.floating], zoom: int
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Global pixel coordinates at the given zoom, with y increasing southward."""
+    scale = 2.0 ** (zoom + TILE_BITS)
+    x = (np.asarray(lon, np.float64) + 180) / 360 * scale
+    phi = np.radians(np.asarray(lat, np.float64))
+    y = (1 - np.log(np.tan(phi) + 1 / np.cos(phi)) / np.pi) / 2 * scale
+    return np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+
+
+class View(NamedTuple):
+    """An on-screen viewport, width x height pixels, centered on (lon, lat)."""
+
+    lon: float
+    lat: float
+    zoom: int
+    width: int = 1024
+    height: int = 768
+
+
+class TilePyramid:
+    """Decimated copies of the points for zooms min_zoom .. max_zoom."""
+
+    def __init__(self, path: Path) -> None:
+        pf = pq.ParquetFile(path)
+        meta = pf.schema_arrow.metadata
+        self.min_zoom = int(meta[b"min_zoom"])
+        self.max_zoom = int(meta[b"max_zoom"])
+        self.df = pf.read().to_pandas()
+        zoom = self.df.zoom.to_numpy()
+        self.tile = self.df.tile.to_numpy()
+        # Each zoom's rows are contiguous, so record where they start.
+        levels = np.arange(self.min_zoom, self.max_zoom + 2)
+        self.start = dict(zip(levels.tolist(), np.searchsorted(zoom, levels).tolist()))
+
+    @classmethod
+    def build(
+        cls,
+        df: pd.DataFrame,
+        out: Path,
+        min_zoom: int = 6,
+        max_zoom: int = 15,
+        cell_bits: int = 2,
+    ) -> "TilePyramid":
+        """Keeps one point per 2 ** cell_bits pixel cell, except at max_zoom."""
+        lon, lat = df.lon.to_numpy(), df.lat.to_numpy()
+        px, py = mercator_px(lon, lat, max_zoom)
+        rgb = road_colors(df.osm_id.to_numpy())
+        frames = []
+        for zoom in range(min_zoom, max_zoom + 1):
+            shift = max_zoom - zoom
+            tx, ty = px >> (shift + TILE_BITS), py >> (shift + TILE_BITS)
+            tile = (ty << zoom) | tx
+            if zoom < max_zoom:
+                cx, cy = px >> (shift + cell_bits), py >> (shift + cell_bits)
+                cells = (cy << (zoom + TILE_BITS - cell_bits)) | cx
+                _, keep = np.unique(cells, return_index=True)
+            else:
+                keep = np.arange(len(df))
+            keep = keep[np.argsort(tile[keep], kind="stable")]
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "zoom": np.int8(zoom),
+                        "tile": tile[keep],
+                        "osm_id": df.osm_id.to_numpy()[keep],
+                        "lon": lon[keep],
+                        "lat": lat[keep],
+                        "alt": df.alt.to_numpy()[keep],
+                        "r": rgb[keep, 0],
+                        "g": rgb[keep, 1],
+                        "b": rgb[keep, 2],
+                    }
+                )
+            )
+        table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True))
+        table = table.replace_schema_metadata(
+            {"min_zoom": str(min_zoom), "max_zoom": str(max_zoom)}
+        )
+        out.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, out)
+        return cls(out)
+
+    def tiles_in_view(self, view: View) -> tuple[int, int, int, int, int]:
+        """(zoom, tx0, ty0, tx1, ty1), an inclusive range of tiles covering the view."""
+        zoom = min(max(view.zoom, self.min_zoom), self.max_zoom)
+        px, py = mercator_px(np.array([view.lon]), np.array([view.lat]), zoom)
+        cx, cy = int(px[0]), int(py[0])
+        hw, hh = view.width // 2, view.height // 2
+        last = (1 << zoom) - 1
+        return (
+            zoom,
+            max(0, (cx - hw) >> TILE_BITS),
+            max(0, (cy - hh) >> TILE_BITS),
+            min(last, (cx + hw) >> TILE_BITS),
+            min(last, (cy + hh) >> TILE_BITS),
+        )
+
+    def view(self, view: View) -> pd.DataFrame:
+        """Points of just the tiles on screen, decimated for the view's zoom."""
+        zoom, tx0, ty0, tx1, ty1 = self.tiles_in_view(view)
+        lo, hi = self.start[zoom], self.start[zoom + 1]
+        rows = np.arange(ty0, ty1 + 1) << zoom
+        starts = lo + np.searchsorted(self.tile[lo:hi], rows | tx0, side="left")
+        stops = lo + np.searchsorted(self.tile[lo:hi], rows | tx1, side="right")
+        idx = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+        return self.df.iloc[idx]
+
+
+def get_tile_pyramid() -> TilePyramid:
+    path = Dataset.TMP / "3D_spatial_network_tiles.parquet"
+    if not path.exists():
+        return TilePyramid.build(Dataset.get_df(None), path)
+    return TilePyramid(path)
@@ -0,0 +1,88 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cluster.jutland.tiles import (
+    PALETTE,
+    TILE_BITS,
+    TilePyramid,
+    View,
+    mercator_px,
+    road_colors,
+)
+
+
+def dense_roads(n: int = 50_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "osm_id": rng.integers(1, 2_000, n),
+            "lon": rng.uniform(9.8, 10.0, n).astype(np.float32),
+            "lat": rng.uniform(57.0, 57.1, n).astype(np.float32),
+            "alt": rng.uniform(0, 50, n).astype(np.float32),
+        }
+    )
+
+
+class TilesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp = TemporaryDirectory()
+        self.df = dense_roads()
+        self.pyramid = TilePyramid.build(
+            self.df, Path(self.temp.name) / "tiles.parquet", 6, 14
+        )
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+
+    def test_mercator(self) -> None:
+        # Zoom 0 is a single 256 pixel tile, with the equator halfway down.
+        x, y = mercator_px(np.array([0.0, -180.0]), np.array([0.0, 0.0]), 0)
+        self.assertEqual([128, 0], x.tolist())
+        self.assertEqual([128, 128], y.tolist())
+
+    def test_colors(self) -> None:
+        rgb = road_colors(np.array([7, 8, 7]))
+        self.assertEqual((3, 3), rgb.shape)
+        self.assertTrue(np.array_equal(rgb[0], rgb[2]))
+        self.assertEqual(
+            len(PALETTE), len(np.unique(road_colors(np.arange(1000)), axis=0))
+        )
+
+    def test_pyramid(self) -> None:
+        df = self.pyramid.df
+        counts = df.groupby(["zoom", "tile"]).size()
+        # One point per 4 x 4 pixel cell bounds each decimated tile.
+        self.assertLessEqual(counts.drop(14, level="zoom").max(), 64 * 64)
+        self.assertEqual(len(self.df), (df.zoom == 14).sum())
+        self.assertLess((df.zoom == 6).sum(), len(self.df) // 10)
+        self.assertTrue(df.zoom.is_monotonic_increasing)
+
+    def test_view(self) -> None:
+        view = View(9.9, 57.05, 14, width=512, height=512)
+        got = self.pyramid.view(view)
+        self.assertTrue(0 < len(got) < len(self.df))
+        zoom, tx0, ty0, tx1, ty1 = self.pyramid.tiles_in_view(view)
+        px, py = mercator_px(got.lon.to_numpy(), got.lat.to_numpy(), zoom)
+        self.assertTrue(
+            ((px >> TILE_BITS) >= tx0).all() and ((px >> TILE_BITS) <= tx1).all()
+        )
+        self.assertTrue(
+            ((py >> TILE_BITS) >= ty0).all() and ((py >> TILE_BITS) <= ty1).all()
+        )
+
+        # Every full-detail point in those tiles comes back.
+        px, py = mercator_px(self.df.lon.to_numpy(), self.df.lat.to_numpy(), zoom)
+        tx, ty = px >> TILE_BITS, py >> TILE_BITS
+        inside = (tx >= tx0) & (tx <= tx1) & (ty >= ty0) & (ty <= ty1)
+        self.assertEqual(inside.sum(), len(got))
+
+        # Zooming far out shows everything, decimated.
+        self.assertEqual(
+            (self.pyramid.df.zoom == 6).sum(),
+            len(self.pyramid.view(View(9.9, 57.05, 3))),
+        )
@@ -0,0 +1,203 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Solves many puzzles at once, on a pool of worker processes.
+
+Before solving, each puzzle is put in a canonical form: of its eight
+rotations and reflections, each with digits relabeled in order of first
+appearance, we keep the lexicographically least. Puzzles that differ only
+by such a symmetry share one solve, and one slot in an LRU cache.
+(Band and stack permutations are also symmetries, but we don't canonicalize
+over those, as that group is far larger.)
+"""
+
+from collections import OrderedDict
+from collections.abc import Generator, Iterable
+from concurrent.futures import Executor, Future, as_completed
+from threading import Lock
+from typing import NamedTuple
+
+from numpy.typing import NDArray
+import numpy as np
+
+from dojo.sudoku.puzzle import DIGITS
+from dojo.sudoku.solver import Solver
+
+_CHAR_TO_DIGIT = {ch: i for i, ch in enumerate(DIGITS)} | {"-": 0, ".": 0, "_": 0}
+
+
+def parse(line: str) -> NDArray[np.uint8] | None:
+    """A square array of digits, or None if the line isn't a puzzle."""
+    try:
+        digits = [_CHAR_TO_DIGIT[ch] for ch in line.strip().upper()]
+    except KeyError:
+        return None
+    size = round(len(digits) ** 0.25)
+    n = size**2
+    if size < 2 or n * n != len(digits) or max(digits) > n:
+        return None
+    return np.array(digits, np.uint8).reshape(n, n)
+
+
+def _transform(a: NDArray[np.uint8], t: int) -> NDArray[np.uint8]:
+    a = np.rot90(a, t % 4)
+    return a.T if t >= 4 else a
+
+
+def _untransform(a: NDArray[np.uint8], t: int) -> NDArray[np.uint8]:
+    a = a.T if t >= 4 else a
+    return np.rot90(a, -(t % 4))
+
+
+class Canonical(NamedTuple):
+    key: bytes  # the canonical puzzle
+    transform: int  # which of the eight rotations and reflections
+    digits: NDArray[np.uint8]  # label k + 1 stands for digits[k]
+
+
+def canonical(puzzle: NDArray[np.uint8]) -> Canonical:
+    n = len(puzzle)
+    a = np.stack([_transform(puzzle, t).ravel() for t in range(8)])
+    rows = np.arange(8)[:, None]
+    # Where each digit first appears. Absent digits sort last, in numeric order.
+    first = np.tile(a.shape[1] + np.arange(n + 1), (8, 1))
+    np.minimum.at(first, (rows, a), np.arange(a.shape[1]))
+    first[:, 0] = -1
+    digits = np.argsort(first, axis=1)[:, 1:].astype(np.uint8)
+    label = np.zeros((8, n + 1), np.uint8)
+    label[rows, digits] = np.arange(1, n + 1)
+    keys = [bytes([n]) + row.tobytes() for row in label[rows, a]]
+    t = min(range(8), key=keys.__getitem__)
+    return Canonical(keys[t], t, digits[t])
+
+
+def restore(solution: bytes, c: Canonical) -> NDArray[np.uint8]:
+    """Maps a solution of the canonical puzzle back to the original puzzle."""
+    n = c.key[0]
+    a = np.frombuffer(solution, np.uint8).reshape(n, n)
+    return _untransform(c.digits[a - 1], c.transform)
+
+
+class Outcome(NamedTuple):
+    solutions: int  # 1, or 0 for unsolvable, or -1 for gave up
+    solution: bytes
+
+
+class LRUCache:
+    """Thread-safe map from canonical puzzle to outcome, evicting the least recently used."""
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        self.d: OrderedDict[bytes, Outcome] = OrderedDict()
+        self.lock = Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: bytes) -> Outcome | None:
+        with self.lock:
+            outcome = self.d.get(key)
+            if outcome is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.d.move_to_end(key)
+            return outcome
+
+    def put(self, key: bytes, outcome: Outcome) -> None:
+        with self.lock:
+            self.d[key] = outcome
+            self.d.move_to_end(key)
+            if len(self.d) > self.maxsize:
+                self.d.popitem(last=False)
+
+
+_solvers: dict[int, Solver] = {}
+
+
+def _solve_chunk(keys: list[bytes], max_guesses: int) -> list[Outcome]:
+    """Runs in a worker process, which keeps one Solver per grid size."""
+    outcomes = []
+    for key in keys:
+        n = key[0]
+        size = round(n**0.5)
+        if size not in _solvers:
+            _solvers[size] = Solver(size)
+        puzzle = np.frombuffer(key, np.uint8, offset=1).reshape(n, n)
+        result = _solvers[size].run(puzzle, max_guesses=max_guesses)
+        solution = b"" if result.solution is None else result.solution.tobytes()
+        outcomes.append(Outcome(result.solutions, solution))
+    return outcomes
+
+
+def _format(outcome: Outcome, c: Canonical) -> str:
+    if outcome.solutions < 0:
+        return "timeout"
+    if outcome.solutions == 0:
+        return "unsolvable"
+    return "".join(DIGITS[v] for v in restore(outcome.solution, c).ravel())
+
+
+class _InFlight:
+    """Puzzles handed to the pool, and the input lines waiting on each."""
+
+    def __init__(self, pool: Executor, cache: LRUCache, max_guesses: int) -> None:
+        self.pool, self.cache, self.max_guesses = pool, cache, max_guesses
+        self.waiting: dict[bytes, list[tuple[int, Canonical]]] = {}
+        self.futures: dict[Future[list[Outcome]], list[bytes]] = {}
+        self.batch: list[bytes] = []
+
+    def add(self, i: int, c: Canonical) -> None:
+        if c.key in self.waiting:
+            self.waiting[c.key].append((i, c))  # a symmetric twin is already in flight
+        else:
+            self.waiting[c.key] = [(i, c)]
+            self.batch.append(c.key)
+
+    def submit(self) -> None:
+        if self.batch:
+            self.futures[
+                self.pool.submit(_solve_chunk, self.batch, self.max_guesses)
+            ] = self.batch
+            self.batch = []
+
+    def harvest(self, future: Future[list[Outcome]]) -> Generator[tuple[int, str]]:
+        for key, outcome in zip(self.futures.pop(future), future.result()):
+            # A timeout says only that max_guesses was too small, so don't keep it.
+            if outcome.solutions >= 0:
+                self.cache.put(key, outcome)
+            for i, c in self.waiting.pop(key):
+                yield i, _format(outcome, c)
+
+
+def solve_batch(
+    lines: Iterable[str],
+    pool: Executor,
+    cache: LRUCache,
+    max_guesses: int = 100_000,
+    chunk: int = 64,
+) -> Generator[tuple[int, str]]:
+    """
+    Yields (line number, answer) pairs in whatever order they finish.
+    An answer is a solution string, or one of "invalid", "unsolvable", "timeout".
+    max_guesses is the per-puzzle work limit, and chunk puzzles travel together,
+    to amortize the cost of talking to a worker.
+    """
+    flight = _InFlight(pool, cache, max_guesses)
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        puzzle = parse(line)
+        if puzzle is None:
+            yield i, "invalid"
+            continue
+        c = canonical(puzzle)
+        if outcome := cache.get(c.key):
+            yield i, _format(outcome, c)
+            continue
+        flight.add(i, c)
+        if len(flight.batch) >= chunk:
+            flight.submit()
+            # Stream back whatever has finished while we keep reading.
+            for future in [f for f in flight.futures if f.done()]:
+                yield from flight.harvest(future)
+    flight.submit()
+    for future in as_completed(list(flight.futures)):
+        yield from flight.harvest(future)
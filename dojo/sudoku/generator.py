@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Generates graded Sudoku puzzles that each have a unique solution.
+
+A full grid comes from shuffling a fixed valid pattern by the Sudoku
+symmetries: relabel digits, permute rows within a band, permute bands, and
+likewise for columns. Then we visit the cells in random order, blanking each
+one unless that would admit a second solution. The solver stops counting at
+two, so each check costs about as much as a solve.
+
+Puzzle p always draws from child p of a single SeedSequence, so a corpus is
+reproducible for any worker count.
+"""
+
+from collections.abc import Generator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from enum import IntEnum
+from multiprocessing import get_context
+from pathlib import Path
+from typing import NamedTuple
+import os
+
+from numpy.typing import NDArray
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import typer
+
+from dojo.sudoku.solver import Solver
+
+
+class Grade(IntEnum):
+    """The weakest technique set that solves a puzzle without guessing."""
+
+    NAKED_SINGLES = 0
+    HIDDEN_SINGLES = 1
+    GUESSING = 2
+
+
+def pattern(size: int = 3) -> NDArray[np.uint8]:
+    """A valid full grid: each row shifts the one above, by a block at block boundaries."""
+    n = size**2
+    r, c = np.indices((n, n))
+    return ((size * (r % size) + r // size + c) % n + 1).astype(np.uint8)
+
+
+def _line_order(size: int, rng: np.random.Generator) -> NDArray[np.int64]:
+    """Shuffles bands, and lines within each band."""
+    bands = rng.permutation(size)
+    within = np.array([rng.permutation(size) for _ in range(size)])
+    return (bands[:, None] * size + within).ravel()
+
+
+def full_grid(size: int, rng: np.random.Generator) -> NDArray[np.uint8]:
+    grid = pattern(size)
+    digits = np.concatenate(([0], rng.permutation(size**2) + 1)).astype(np.uint8)
+    grid = digits[grid][_line_order(size, rng)][:, _line_order(size, rng)]
+    return grid.T.copy() if rng.random() < 0.5 else grid
+
+
+class Puzzle(NamedTuple):
+    puzzle: NDArray[np.uint8]
+    solution: NDArray[np.uint8]
+    grade: Grade
+    guesses: int  # needed even with hidden singles, a finer measure of difficulty
+
+
+def grade(solver: Solver, puzzle: NDArray[np.uint8]) -> tuple[Grade, int]:
+    if solver.run(puzzle, hidden=False).guesses == 0:
+        return Grade.NAKED_SINGLES, 0
+    guesses = solver.run(puzzle).guesses
+    return (Grade.GUESSING if guesses else Grade.HIDDEN_SINGLES), guesses
+
+
+def make_puzzle(solver: Solver, rng: np.random.Generator) -> Puzzle:
+    solution = full_grid(solver.size, rng)
+    puzzle = solution.copy().ravel()
+    for cell in rng.permutation(len(puzzle)):
+        puzzle[cell] = 0
+        if solver.count(puzzle) > 1:
+            puzzle[cell] = solution.ravel()[cell]
+    puzzle = puzzle.reshape(solution.shape)
+    return Puzzle(puzzle, solution, *grade(solver, puzzle))
+
+
+SCHEMA = pa.schema(
+    [
+        ("puzzle", pa.binary()),  # one byte per cell, zero for blank
+        ("solution", pa.binary()),
+        ("clues", pa.int16()),
+        ("grade", pa.int8()),
+        ("guesses", pa.int32()),
+    ]
+)
+
+
+def _make_batch(size: int, seeds: list[np.random.SeedSequence]) -> pa.RecordBatch:
+    solver = Solver(size)
+    puzzles = [make_puzzle(solver, np.random.default_rng(seed)) for seed in seeds]
+    return pa.RecordBatch.from_pydict(
+        {
+            "puzzle": [p.puzzle.tobytes() for p in puzzles],
+            "solution": [p.solution.tobytes() for p in puzzles],
+            "clues": [np.count_nonzero(p.puzzle) for p in puzzles],
+            "grade": [int(p.grade) for p in puzzles],
+            "guesses": [p.guesses for p in puzzles],
+        },
+        schema=SCHEMA,
+    )
+
+
+def generate(
+    count: int,
+    size: int = 3,
+    seed: int = 0,
+    workers: int | None = None,
+    batch: int = 1_000,
+) -> Generator[pa.RecordBatch]:
+    """Yields batches of puzzles as workers finish them, in no particular order."""
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    # Not fork: a child forked after Numba starts its threads can hang at exit.
+    ctx = get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(_make_batch, size, seeds[i : i + batch])
+            for i in range(0, count, batch)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def to_puzzles(table: pa.Table, size: int = 3) -> NDArray[np.uint8]:
+    """Decodes the puzzle column to an (count, n, n) array."""
+    n = size**2
+    flat = np.frombuffer(b"".join(table.column("puzzle").to_pylist()), np.uint8)
+    return flat.reshape(-1, n, n)
+
+
+def main(
+    count: int = 1_000_000,
+    size: int = 3,
+    seed: int = 0,
+    workers: int = os.cpu_count() or 1,
+    out: Path = Path("/tmp/sudoku/puzzles.parquet"),
+) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    grades = np.zeros(len(Grade), np.int64)
+    with pq.ParquetWriter(out, SCHEMA, compression="zstd") as writer:
+        for record_batch in generate(count, size, seed, workers):
+            writer.write_batch(record_batch)
+            grades += np.bincount(
+                record_batch.column("grade").to_numpy(), minlength=len(Grade)
+            )
+            print(dict(zip([g.name for g in Grade], grades.tolist())), end="\r")
+    print()
+    print(out)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -7,6 +7,11 @@ from typing import Any, Self
 import numpy as np
 import numpy.typing as npt
 
+from dojo.sudoku.solver import Solver
+
+# Digits beyond 9, for 16 x 16 and 25 x 25 grids, are written as letters.
+DIGITS = "0123456789ABCDEFGHIJKLMNOP"
+
 
 @total_ordering
 class Constraint(Enum):
@@ -42,8 +47,8 @@ class Grid:
         """Populates board from a string."""
         s = s.translate(self._remove_whitespace)
         assert len(s) == self.size**4, (len(s), self.size**4, s)
-        for i, ch in enumerate(s.translate(self._empty_is_zero)):
-            v = int(ch)
+        for i, ch in enumerate(s.translate(self._empty_is_zero).upper()):
+            v = DIGITS.index(ch)
             assert 0 <= v <= self.size**2, (i, v)
             x = i % self.size**2
             y = i // self.size**2
@@ -75,7 +80,7 @@ class Grid:
         for i in range(sz**2):
             if i % sz == 0:
                 ret.append("\n")
-            row_vals = "".join(map(str, self.grid[i, :]))
+            row_vals = "".join(DIGITS[v] for v in self.grid[i, :])
             rng = range(0, len(row_vals), sz)
             ret.append(" ".join(row_vals[i : i + sz] for i in rng))
             ret.append("\n")
@@ -137,35 +142,14 @@ class Grid:
 
 
 def solve(grid: Grid) -> Grid | None:
-    """Solves a Sudoku puzzle."""
+    """Solves a Sudoku puzzle, in place."""
     assert grid.is_valid()
-    if grid.is_solved():
-        return grid
-    num_wildcards = len(grid.grid[grid.grid == 0])
-    print("\n", num_wildcards)
-
-    # for constraint, available_values in grid.avail.items():
-    #     for val in available_values:
-
-    for i, j in np.ndindex(grid.grid.shape):
-        if grid.grid[i, j] == 0:
-            available_values = (
-                grid.avail[(Constraint.ROW, i)]
-                & grid.avail[(Constraint.COL, j)]
-                & grid.avail[(Constraint.BLK, i * j // grid.size // grid.size)]
-            )
-            print("\n", i, j, available_values)
-            for val in available_values:
-                grid.grid[i, j] = val
-                assert grid.is_valid()
-                s = solve(grid.copy())
-                if s:
-                    assert s.is_valid()
-                    return s
-            return None  # caller will backtrack
-
-    msg = "no solution found"
-    raise RuntimeError(msg)
+    solution = Solver(grid.size).solve(grid.grid)
+    if solution is None:
+        return None  # caller will backtrack
+    grid.grid[:] = solution
+    grid.update_avail()
+    return grid
 
 
 if __name__ == "__main__":
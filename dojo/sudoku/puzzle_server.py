@@ -2,12 +2,25 @@
 
 # Copyright 2023 John Hanley. MIT licensed.
 
+from collections.abc import Generator
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from multiprocessing import get_context
+
 from bs4 import BeautifulSoup
-from flask import Flask
+from flask import Flask, Response, request
 
+from dojo.sudoku.batch import LRUCache, solve_batch
 from dojo.sudoku.puzzle import Grid
 
 app = Flask(__name__)
+solution_cache = LRUCache()
+
+
+@cache
+def _get_pool() -> ProcessPoolExecutor:
+    # Not fork: the parent may already be running Numba's threads.
+    return ProcessPoolExecutor(mp_context=get_context("forkserver"))
 
 
 def web_page(messy_html: str, title: str = "sudoku") -> str:
@@ -37,6 +50,22 @@ def show(grid: str) -> str:
     return web_page(f"<pre>\n{g}")
 
 
+@app.route("/solve", methods=["POST"])  # type: ignore [misc]
+def solve() -> Response:
+    """
+    Accepts one puzzle per line, and streams back "line_number<TAB>answer"
+    lines, in completion order. Optional ?max_guesses= bounds each puzzle's work.
+    """
+    max_guesses = request.args.get("max_guesses", 100_000, type=int)
+    lines = request.get_data(as_text=True).splitlines()
+
+    def generate() -> Generator[str]:
+        for i, answer in solve_batch(lines, _get_pool(), solution_cache, max_guesses):
+            yield f"{i}\t{answer}\n"
+
+    return Response(generate(), mimetype="text/plain")
+
+
 # @app.route("/edit/<grid>")
 # def edit(grid: str) -> str:
 #     return f"""{grid}"""
@@ -45,5 +74,6 @@ def show(grid: str) -> str:
 if __name__ == "__main__":
     example = "http://127.0.0.1:5000/show/12--34----------"
     print(f"Try:\n{example}")
+    print("or:\ncurl --data-binary @puzzles.txt http://127.0.0.1:5000/solve")
 
     app.run()
@@ -0,0 +1,297 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Constraint-propagation Sudoku engine.
+
+Each row, column, and block keeps the digits it has used as an integer
+bitmask, so a cell's candidates are just the complement of three ORs.
+We repeatedly place naked singles (a cell with one candidate) and hidden
+singles (a digit with one possible cell in some unit), and branch only
+when propagation stalls, on the cell with fewest candidates.
+Every placement is pushed onto a trail, so backtracking pops placements
+rather than copying the grid.
+"""
+
+from typing import NamedTuple
+
+from numba import njit
+from numpy.typing import NDArray
+import numpy as np
+
+
+class Tables(NamedTuple):
+    """Unit membership, precomputed for a given block size."""
+
+    cell_row: NDArray[np.int64]
+    cell_col: NDArray[np.int64]
+    cell_box: NDArray[np.int64]
+    units: NDArray[np.int64]  # (3 n, n) cell indices: rows, then columns, then blocks
+    full: int  # all n digit bits set
+
+
+def make_tables(size: int) -> Tables:
+    n = size**2
+    y, x = np.divmod(np.arange(n * n), n)
+    box = y // size * size + x // size
+    rows = np.arange(n * n).reshape(n, n)
+    boxes = np.argsort(box, kind="stable").reshape(n, n)
+    return Tables(y, x, box, np.concatenate((rows, rows.T, boxes)), (1 << n) - 1)
+
+
+class State(NamedTuple):
+    """Everything a search mutates. Digit d is represented by bit d - 1."""
+
+    val: NDArray[np.int64]  # per cell, the bit of its digit, or zero if empty
+    used: NDArray[np.int64]  # (3, n) bits used by each row, column, and block
+    trail: NDArray[np.int64]  # cells, in the order we filled them
+    top: NDArray[np.int64]  # [length of trail]
+    tally: NDArray[np.int64]  # naked singles, hidden singles, guesses
+    solution: NDArray[np.int64]  # the first solution found
+
+
+def _new_state(n: int) -> State:
+    z = np.zeros(n * n, np.int64)
+    return State(
+        z,
+        np.zeros((3, n), np.int64),
+        z.copy(),
+        np.zeros(1, np.int64),
+        np.zeros(3, np.int64),
+        z.copy(),
+    )
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _popcount(m: int) -> int:
+    count = 0
+    while m:
+        m &= m - 1
+        count += 1
+    return count
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _assign(s: State, t: Tables, cell: int, bit: int) -> None:
+    s.val[cell] = bit
+    s.used[0, t.cell_row[cell]] |= bit
+    s.used[1, t.cell_col[cell]] |= bit
+    s.used[2, t.cell_box[cell]] |= bit
+    s.trail[s.top[0]] = cell
+    s.top[0] += 1
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _undo(s: State, t: Tables, mark: int) -> None:
+    """Empties cells, most recent first, until just mark remain on the trail."""
+    while s.top[0] > mark:
+        s.top[0] -= 1
+        cell = s.trail[s.top[0]]
+        keep = ~s.val[cell]
+        s.used[0, t.cell_row[cell]] &= keep
+        s.used[1, t.cell_col[cell]] &= keep
+        s.used[2, t.cell_box[cell]] &= keep
+        s.val[cell] = 0
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _candidates(s: State, t: Tables, cell: int) -> int:
+    return t.full & ~(  # type: ignore [no-any-return]
+        s.used[0, t.cell_row[cell]]
+        | s.used[1, t.cell_col[cell]]
+        | s.used[2, t.cell_box[cell]]
+    )
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _naked_singles(s: State, t: Tables) -> int:
+    """Fills each cell that has one candidate. Returns how many, or -1 if some cell has none."""
+    placed = 0
+    for cell in range(len(s.val)):
+        if s.val[cell] == 0:
+            cand = _candidates(s, t, cell)
+            if cand == 0:
+                return -1
+            if cand & (cand - 1) == 0:
+                _assign(s, t, cell, cand)
+                placed += 1
+    return placed
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _hidden_single(s: State, t: Tables, u: int, bit: int) -> bool:
+    """
+    Places the digit in the one cell of unit u that can still take it.
+    That cell may have just been taken by another hidden single, which
+    the next round of propagation will find to be a contradiction.
+    """
+    for cell in t.units[u]:
+        if s.val[cell] == 0 and _candidates(s, t, cell) & bit:
+            _assign(s, t, cell, bit)
+            return True
+    return False
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _hidden_singles(s: State, t: Tables) -> int:
+    """Fills each digit that fits just one cell of some unit. Returns -1 if a digit fits none."""
+    placed = 0
+    for u in range(len(t.units)):
+        once = twice = seen = 0
+        for cell in t.units[u]:
+            if s.val[cell]:
+                seen |= s.val[cell]
+            else:
+                cand = _candidates(s, t, cell)
+                twice |= once & cand
+                once |= cand
+        if (once | seen) != t.full:
+            return -1
+        single = once & ~twice & ~seen
+        while single:
+            bit = single & -single
+            single ^= bit
+            placed += _hidden_single(s, t, u, bit)
+    return placed
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _propagate(s: State, t: Tables, hidden: bool) -> bool:
+    """
+    Places forced digits until none remain. Returns False if some cell
+    or some unit has run out of options.
+    """
+    while True:
+        placed = _naked_singles(s, t)
+        if placed < 0:
+            return False
+        s.tally[0] += placed
+        if placed == 0 and hidden:
+            placed = _hidden_singles(s, t)
+            if placed < 0:
+                return False
+            s.tally[1] += placed
+        if placed == 0:
+            return True
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _branch_cell(s: State, t: Tables) -> int:
+    """The empty cell with minimum remaining values."""
+    best, best_n = -1, 1 << 30
+    for cell in range(len(s.val)):
+        if s.val[cell] == 0:
+            c = _popcount(_candidates(s, t, cell))
+            if c < best_n:
+                best, best_n = cell, c
+                if c == 2:
+                    break
+    return best
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _place_givens(s: State, t: Tables, givens: NDArray[np.int64]) -> bool:
+    for cell in range(len(givens)):
+        bit = givens[cell]
+        if bit:
+            if _candidates(s, t, cell) & bit == 0:
+                return False  # the givens conflict
+            _assign(s, t, cell, bit)
+    return True
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _search(s: State, t: Tables, limit: int, hidden: bool, max_guesses: int) -> int:
+    """
+    Counts solutions, stopping once it reaches limit, and copies the first
+    into s.solution. Returns -1 if more than max_guesses (when positive) were needed.
+    """
+    n_cells = len(s.val)
+    # Each frame records the trail length before its guess, its cell, and the guesses left.
+    frame_mark = np.empty(n_cells, np.int64)
+    frame_cell = np.empty(n_cells, np.int64)
+    frame_left = np.empty(n_cells, np.int64)
+    depth = 0
+    count = 0
+    ok = _propagate(s, t, hidden)
+    while True:
+        if ok and s.top[0] == n_cells:
+            count += 1
+            if count == 1:
+                s.solution[:] = s.val
+            if count >= limit:
+                return count
+        elif ok:
+            cell = _branch_cell(s, t)
+            frame_mark[depth] = s.top[0]
+            frame_cell[depth] = cell
+            frame_left[depth] = _candidates(s, t, cell)
+            depth += 1
+        # Take the next guess, from the innermost frame that has any left.
+        ok = False
+        while not ok and depth > 0:
+            f = depth - 1
+            _undo(s, t, frame_mark[f])
+            left = frame_left[f]
+            if left == 0:
+                depth -= 1
+                continue
+            bit = left & -left
+            frame_left[f] = left ^ bit
+            s.tally[2] += 1
+            if 0 < max_guesses < s.tally[2]:
+                return -1
+            _assign(s, t, frame_cell[f], bit)
+            ok = _propagate(s, t, hidden)
+        if not ok:
+            return count
+
+
+class Result(NamedTuple):
+    solutions: int  # found, up to the limit requested, or -1 if we gave up
+    solution: NDArray[np.uint8] | None  # the first one found
+    naked: int  # naked singles placed
+    hidden: int  # hidden singles placed
+    guesses: int
+
+
+class Solver:
+    """Solves n x n puzzles, where n = size ** 2, given as arrays of digits 0 .. n."""
+
+    def __init__(self, size: int = 3) -> None:
+        assert 2 <= size <= 7, size  # n bits must fit in an int64
+        self.size = size
+        self.n = size**2
+        self.tables = make_tables(size)
+
+    def run(
+        self,
+        puzzle: NDArray[np.integer],
+        limit: int = 1,
+        hidden: bool = True,
+        max_guesses: int = 0,
+    ) -> Result:
+        """
+        Searches for up to limit solutions. Zero marks an empty cell.
+        A positive max_guesses bounds the work, as numba code can't be interrupted.
+        """
+        digits = np.asarray(puzzle, np.int64).ravel()
+        assert len(digits) == self.n**2, digits.shape
+        assert 0 <= digits.min() and digits.max() <= self.n
+        givens = np.where(digits > 0, 1 << np.maximum(digits - 1, 0), 0)
+        s = _new_state(self.n)
+        count = (
+            _search(s, self.tables, limit, hidden, max_guesses)
+            if _place_givens(s, self.tables, givens)
+            else 0
+        )
+        grid = None
+        if count > 0:
+            digits = np.log2(s.solution).astype(np.uint8) + 1
+            grid = digits.reshape(self.n, self.n)
+        return Result(count, grid, *s.tally.tolist())
+
+    def solve(self, puzzle: NDArray[np.integer]) -> NDArray[np.uint8] | None:
+        return self.run(puzzle).solution
+
+    def count(self, puzzle: NDArray[np.integer], limit: int = 2) -> int:
+        """Number of solutions, capped at limit. Two suffices to show a puzzle is ambiguous."""
+        return self.run(puzzle, limit).solutions
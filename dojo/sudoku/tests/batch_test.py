@@ -0,0 +1,94 @@
+# Copyright 2025 John Hanley. MIT licensed.
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import unittest
+
+import numpy as np
+
+from dojo.sudoku.batch import LRUCache, Outcome, canonical, parse, restore, solve_batch
+from dojo.sudoku.puzzle import Grid
+from dojo.sudoku.puzzle_server import app
+from dojo.sudoku.solver import Solver
+from dojo.sudoku.tests.solver_test import HARDEST
+
+
+def twin(puzzle: np.ndarray) -> np.ndarray:
+    """The same puzzle, rotated, transposed, and with digits relabeled."""
+    relabel = np.array([0, 5, 3, 9, 1, 2, 8, 7, 4, 6], np.uint8)
+    return relabel[np.rot90(puzzle).T]
+
+
+def to_line(a: np.ndarray) -> str:
+    return "".join(map(str, a.ravel())).replace("0", "-")
+
+
+class BatchTest(unittest.TestCase):
+    def test_parse(self) -> None:
+        self.assertTrue(
+            np.array_equal(Grid().from_string(HARDEST[0]).grid, parse(HARDEST[0]))
+        )
+        self.assertEqual((16, 16), parse("G" + "." * 255).shape)
+        self.assertIsNone(parse("12x4" + "-" * 12))
+        self.assertIsNone(parse("-" * 80))
+        self.assertIsNone(parse("5" + "-" * 15))
+
+    def test_canonical(self) -> None:
+        puzzle = parse(HARDEST[0])
+        twins = [puzzle, twin(puzzle)]
+        cs = [canonical(p) for p in twins]
+        self.assertEqual(cs[0].key, cs[1].key)
+
+        # Solving the canonical puzzle once answers both twins.
+        key = np.frombuffer(cs[0].key, np.uint8, offset=1).reshape(9, 9)
+        solution = Solver().solve(key).tobytes()
+        for p, c in zip(twins, cs):
+            grid = restore(solution, c)
+            self.assertTrue(Grid().from_string(to_line(grid)).is_solved())
+            self.assertTrue(np.array_equal(p[p > 0], grid[p > 0]))
+
+    def test_lru(self) -> None:
+        cache = LRUCache(maxsize=2)
+        for key in (b"a", b"b", b"c"):
+            cache.put(key, Outcome(1, key))
+        self.assertIsNone(cache.get(b"a"))
+        self.assertEqual(b"b", cache.get(b"b").solution)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_solve_batch(self) -> None:
+        puzzles = [parse(s) for s in HARDEST]
+        lines = [HARDEST[0], "", "nonsense", to_line(twin(puzzles[0])), *HARDEST[1:]]
+        lines.append("11" + "-" * 79)
+        cache = LRUCache()
+        # Forked children hang at exit if another test has started Numba's threads.
+        ctx = get_context("forkserver")
+        with ProcessPoolExecutor(2, ctx) as pool:
+            got = dict(solve_batch(lines, pool, cache, chunk=2))
+        self.assertEqual({0, 2, 3, 4, 5, 6}, set(got))
+        self.assertEqual("invalid", got[2])
+        self.assertEqual("unsolvable", got[6])
+        for i in (0, 3, 4, 5):
+            grid = Grid().from_string(got[i])
+            self.assertTrue(grid.is_solved())
+            given = parse(lines[i]) > 0
+            self.assertTrue(np.array_equal(parse(lines[i])[given], grid.grid[given]))
+        # The twin shared a solve, so just four distinct puzzles were cached.
+        self.assertEqual(4, len(cache.d))
+
+        # A timeout isn't cached, so a bigger limit gets its chance.
+        cache = LRUCache()
+        with ProcessPoolExecutor(1, ctx) as pool:
+            got = dict(solve_batch(HARDEST[:1], pool, cache, max_guesses=1))
+            self.assertEqual({0: "timeout"}, got)
+            self.assertEqual(0, len(cache.d))
+            got = dict(solve_batch(HARDEST[:1], pool, cache))
+        self.assertTrue(Grid().from_string(got[0]).is_solved())
+
+    def test_endpoint(self) -> None:
+        client = app.test_client()
+        body = "\n".join(HARDEST)
+        resp = client.post("/solve", data=body)
+        self.assertEqual(200, resp.status_code)
+        rows = [line.split("\t") for line in resp.get_data(as_text=True).splitlines()]
+        self.assertEqual([0, 1, 2], sorted(int(i) for i, _ in rows))
+        self.assertTrue(all(Grid().from_string(s).is_solved() for _, s in rows))
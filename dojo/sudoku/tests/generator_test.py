@@ -0,0 +1,74 @@
+# Copyright 2025 John Hanley. MIT licensed.
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dojo.sudoku.generator import (
+    Grade,
+    full_grid,
+    generate,
+    grade,
+    main,
+    make_puzzle,
+    to_puzzles,
+)
+from dojo.sudoku.puzzle import Grid
+from dojo.sudoku.solver import Solver
+from dojo.sudoku.tests.solver_test import HARDEST
+
+
+class GeneratorTest(unittest.TestCase):
+    def test_full_grid(self) -> None:
+        rng = np.random.default_rng(0)
+        for size in (2, 3, 4):
+            grid = Grid(size)
+            grid.grid = full_grid(size, rng)
+            self.assertTrue(grid.is_solved())
+        a, b = full_grid(3, np.random.default_rng(1)), full_grid(
+            3, np.random.default_rng(2)
+        )
+        self.assertFalse(np.array_equal(a, b))
+
+    def test_make_puzzle(self) -> None:
+        solver = Solver()
+        p = make_puzzle(solver, np.random.default_rng(0))
+        self.assertEqual(1, solver.count(p.puzzle))
+        self.assertTrue(np.array_equal(p.solution, solver.solve(p.puzzle)))
+        # Minimal: blanking any remaining clue admits a second solution.
+        for cell in np.flatnonzero(p.puzzle):
+            q = p.puzzle.copy().ravel()
+            q[cell] = 0
+            self.assertEqual(2, solver.count(q))
+
+    def test_grade(self) -> None:
+        solver = Solver()
+        level, guesses = grade(solver, Grid().from_string(HARDEST[0]).grid)
+        self.assertEqual(Grade.GUESSING, level)
+        self.assertGreater(guesses, 0)
+        easy = full_grid(3, np.random.default_rng(0))
+        easy[0, 0] = 0
+        self.assertEqual((Grade.NAKED_SINGLES, 0), grade(solver, easy))
+
+    def test_generate(self) -> None:
+        one = pa.Table.from_batches(generate(12, seed=5, workers=1, batch=5))
+        two = pa.Table.from_batches(generate(12, seed=5, workers=2, batch=3))
+        self.assertEqual(12, len(one))
+        key = [("puzzle", "ascending")]
+        self.assertTrue(one.sort_by(key).equals(two.sort_by(key)))
+        puzzles = to_puzzles(one)
+        self.assertEqual((12, 9, 9), puzzles.shape)
+        self.assertEqual(
+            one.column("clues").to_pylist(),
+            np.count_nonzero(puzzles, axis=(1, 2)).tolist(),
+        )
+
+    def test_main(self) -> None:
+        with TemporaryDirectory() as temp:
+            out = Path(temp) / "p.parquet"
+            main(count=4, workers=1, out=out)
+            self.assertEqual(4, pq.read_metadata(out).num_rows)
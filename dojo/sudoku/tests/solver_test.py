@@ -0,0 +1,75 @@
+# Copyright 2025 John Hanley. MIT licensed.
+
+import unittest
+
+import numpy as np
+
+from dojo.sudoku.generator import pattern
+from dojo.sudoku.puzzle import Grid
+from dojo.sudoku.solver import Solver, make_tables
+
+# Arto Inkala's 2012 "world's hardest", the first of the top95 set, and AI Escargot.
+HARDEST = [
+    "8----------36------7--9-2---5---7-------457-----1---3---1----68--85---1--9----4--",
+    "4-----8-5-3----------7------2-----6-----8-4------1-------6-3-7-5--2-----1-4------",
+    "1----7-9--3--2---8--96--5----53--9---1--8---26----4---3------1--4------7--7---3--",
+]
+
+
+class SolverTest(unittest.TestCase):
+    def assert_solves(self, puzzle: np.ndarray, solution: np.ndarray) -> None:
+        size = round(len(solution) ** 0.5)
+        mask = puzzle > 0
+        self.assertTrue(np.array_equal(puzzle[mask], solution[mask]))
+        n = size**2
+        for units in (solution, solution.T):
+            self.assertTrue(all(len(set(row)) == n for row in units))
+        blocks = solution.reshape(size, size, size, size).swapaxes(1, 2).reshape(n, n)
+        self.assertTrue(all(len(set(b)) == n for b in blocks))
+
+    def test_tables(self) -> None:
+        t = make_tables(3)
+        self.assertEqual(4, t.cell_box[4 * 9 + 4])
+        self.assertEqual(8, t.cell_box[80])
+        self.assertEqual([0, 1, 2, 9, 10, 11, 18, 19, 20], t.units[18].tolist())
+
+    def test_hardest(self) -> None:
+        solver = Solver()
+        for s in HARDEST:
+            puzzle = Grid().from_string(s).grid
+            result = solver.run(puzzle, limit=2)
+            self.assertEqual(1, result.solutions)
+            self.assertGreater(result.guesses, 0)
+            # Propagation should keep the search small: these take 100 to 320 guesses.
+            self.assertLess(result.guesses, 500)
+            self.assert_solves(puzzle, result.solution)
+
+    def test_count(self) -> None:
+        solver = Solver(2)
+        self.assertEqual(2, solver.count(np.zeros(16)))
+        self.assertEqual(1, solver.count(pattern(2)))
+        bad = pattern(2)
+        bad[0, 0] = bad[0, 1]
+        self.assertEqual(0, solver.count(bad))
+        self.assertIsNone(solver.solve(bad))
+
+        hard = Grid().from_string(HARDEST[0]).grid
+        self.assertEqual(-1, Solver().run(hard, max_guesses=10).solutions)
+        self.assertEqual(1, Solver().run(hard, max_guesses=10_000).solutions)
+
+    def test_big_grids(self) -> None:
+        rng = np.random.default_rng(0)
+        for size in (4, 5):
+            full = pattern(size)
+            puzzle = full.copy()
+            puzzle[rng.random(puzzle.shape) < 0.6] = 0
+            self.assert_solves(puzzle, Solver(size).solve(puzzle))
+
+    def test_hidden_singles(self) -> None:
+        puzzle = Grid().from_string(HARDEST[0]).grid
+        with_hidden = Solver().run(puzzle)
+        naked_only = Solver().run(puzzle, hidden=False)
+        self.assertTrue(np.array_equal(with_hidden.solution, naked_only.solution))
+        self.assertGreater(with_hidden.hidden, 0)
+        self.assertEqual(0, naked_only.hidden)
+        self.assertLess(with_hidden.guesses, naked_only.guesses)
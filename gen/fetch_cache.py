@@ -0,0 +1,192 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Content-addressed, size-bounded cache of fetched web pages.
+
+Each URL hashes to a key, and under that key we keep up to two blobs:
+the raw response bytes, and the article text extracted from them.
+Both are zstd compressed, in files named by key and kind.
+A SQLite index (in WAL mode, so readers never block on a writer)
+records what we hold, how big it is, and when it was last used.
+So a lookup is one indexed SELECT plus one file read, with no directory
+scan, and a cached text means we need not parse the HTML again.
+A lookup records its use only if the recorded one is over touch_after
+seconds old, so most reads take no write lock, and recency is only that
+fine-grained. Triggers keep a running total of the compressed size, and
+when it exceeds the byte budget, we evict least recently used blobs until it fits.
+"""
+
+from collections.abc import Callable
+from hashlib import blake2b
+from pathlib import Path
+from time import time
+from typing import Literal, Self
+import os
+import sqlite3
+import threading
+
+import zstandard as zstd
+
+Kind = Literal["raw", "text"]
+
+CACHE_DIR = Path("/tmp/cache")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blob (
+    key   TEXT    NOT NULL,
+    kind  TEXT    NOT NULL,
+    url   TEXT    NOT NULL,
+    size  INTEGER NOT NULL,  -- compressed bytes on disk
+    used  REAL    NOT NULL,  -- unix time of last get or put
+    PRIMARY KEY (key, kind)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blob_used ON blob (used);
+
+-- A running total of blob.size, so put() needn't scan the table to sum it.
+CREATE TABLE IF NOT EXISTS usage (
+    id    INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage SELECT 0, TOTAL(size) FROM blob;
+CREATE TRIGGER IF NOT EXISTS blob_insert AFTER INSERT ON blob BEGIN
+    UPDATE usage SET bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS blob_update AFTER UPDATE OF size ON blob BEGIN
+    UPDATE usage SET bytes = bytes + new.size - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS blob_delete AFTER DELETE ON blob BEGIN
+    UPDATE usage SET bytes = bytes - old.size;
+END;
+"""
+
+
+def url_key(url: str) -> str:
+    return blake2b(url.encode(), digest_size=16).hexdigest()
+
+
+class FetchCache:
+    """
+    Use one instance per thread or process. Several processes may share a
+    directory: SQLite serializes the writers, and readers see a consistent
+    snapshot throughout.
+    """
+
+    def __init__(
+        self,
+        root: Path = CACHE_DIR / "fetch",
+        budget: int = 1 << 30,
+        level: int = 10,
+        touch_after: float = 3600,
+    ) -> None:
+        self.root = root
+        self.budget = budget  # bytes, compressed
+        self.touch_after = touch_after  # seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(root / "index.db", timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+        self.compressor = zstd.ZstdCompressor(level=level)
+        self.decompressor = zstd.ZstdDecompressor()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __len__(self) -> int:
+        return int(self.db.execute("SELECT COUNT(*) FROM blob").fetchone()[0])
+
+    def total_bytes(self) -> int:
+        return int(self.db.execute("SELECT bytes FROM usage").fetchone()[0])
+
+    def _path(self, key: str, kind: Kind) -> Path:
+        return self.root / key[:2] / f"{key}.{kind}.zst"
+
+    def get(self, url: str, kind: Kind) -> bytes | None:
+        key = url_key(url)
+        row = self.db.execute(
+            "SELECT used FROM blob WHERE key = ? AND kind = ?", (key, kind)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time()
+        if now - row[0] > self.touch_after:
+            self.db.execute(
+                "UPDATE blob SET used = ? WHERE key = ? AND kind = ?", (now, key, kind)
+            )
+        try:
+            return bytes(
+                self.decompressor.decompress(self._path(key, kind).read_bytes())
+            )
+        except FileNotFoundError:
+            # Another process evicted it between our SELECT and read.
+            return None
+
+    def put(self, url: str, kind: Kind, data: bytes) -> None:
+        key = url_key(url)
+        path = self._path(key, kind)
+        path.parent.mkdir(exist_ok=True)
+        blob = self.compressor.compress(data)
+        # Write then rename, so a concurrent reader never sees a partial file.
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(blob)
+        tmp.replace(path)
+        # An upsert, not INSERT OR REPLACE, whose implicit delete fires no trigger.
+        self.db.execute(
+            """
+            INSERT INTO blob (key, kind, url, size, used) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (key, kind) DO UPDATE
+            SET url = excluded.url, size = excluded.size, used = excluded.used
+            """,
+            (key, kind, url, len(blob), time()),
+        )
+        if self.total_bytes() > self.budget:
+            self.evict()
+
+    def evict(self, target: float = 0.9) -> int:
+        """Drops the least recently used blobs, until we're under target * budget."""
+        # Choose within the write transaction, so no other process evicts the same rows.
+        self.db.execute("BEGIN IMMEDIATE")
+        excess = self.total_bytes() - int(target * self.budget)
+        # Oldest first, until the running total of sizes covers the excess.
+        victims = self.db.execute(
+            """
+            SELECT key, kind FROM (
+                SELECT key, kind, size,
+                       SUM(size) OVER (ORDER BY used ROWS UNBOUNDED PRECEDING) AS cum
+                FROM blob
+            )
+            WHERE cum - size < ?
+            """,
+            (excess,),
+        ).fetchall()
+        self.db.executemany("DELETE FROM blob WHERE key = ? AND kind = ?", victims)
+        self.db.execute("COMMIT")
+        for key, kind in victims:
+            self._path(key, kind).unlink(missing_ok=True)
+        return len(victims)
+
+    def raw(self, url: str, fetch: Callable[[str], bytes]) -> bytes:
+        data = self.get(url, "raw")
+        if data is None:
+            data = fetch(url)
+            self.put(url, "raw", data)
+        return data
+
+    def text(
+        self,
+        url: str,
+        fetch: Callable[[str], bytes],
+        extract: Callable[[bytes], str],
+    ) -> str:
+        """Article text, from cache if we have it, else extracted from the (cached) page."""
+        data = self.get(url, "text")
+        if data is not None:
+            return data.decode()
+        text = extract(self.raw(url, fetch))
+        self.put(url, "text", text.encode())
+        return text
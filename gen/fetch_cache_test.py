@@ -0,0 +1,76 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+from gen.fetch_cache import FetchCache, url_key
+
+
+class FetchCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.fetched: list[str] = []
+        self.extracted = 0
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def fetch(self, url: str) -> bytes:
+        self.fetched.append(url)
+        return f"<html><p>{url}</p>{'padding ' * 1000}</html>".encode()
+
+    def extract(self, html: bytes) -> str:
+        self.extracted += 1
+        return html.decode()[9:].split("<", 1)[0]
+
+    def test_text(self) -> None:
+        url = "https://example.com/a"
+        with FetchCache(Path(self.tmp.name)) as cache:
+            self.assertEqual(url, cache.text(url, self.fetch, self.extract))
+            self.assertEqual(url, cache.text(url, self.fetch, self.extract))
+            self.assertEqual([url], self.fetched)
+            self.assertEqual(1, self.extracted)
+            self.assertEqual(2, len(cache))
+            # Compressed, the padding costs little.
+            self.assertLess(cache.total_bytes(), 200)
+
+        # A fresh instance finds it, via the index.
+        with FetchCache(Path(self.tmp.name)) as cache:
+            self.assertIsNone(cache.get("https://example.com/b", "raw"))
+            self.assertEqual(url, cache.text(url, self.fetch, self.extract))
+            self.assertEqual(1, self.extracted)
+            raw = cache.get(url, "raw")
+            assert raw
+            self.assertTrue(raw.startswith(b"<html>"))
+
+    def test_evict(self) -> None:
+        root = Path(self.tmp.name)
+        with FetchCache(root, budget=1_000, level=1, touch_after=0) as cache:
+            urls = [f"https://example.com/{i}" for i in range(40)]
+            for url in urls:
+                cache.raw(url, self.fetch)
+                cache.get(urls[0], "raw")  # keep the first one fresh
+            self.assertLessEqual(cache.total_bytes(), 1_000)
+            self.assertIsNotNone(cache.get(urls[0], "raw"))
+            self.assertIsNotNone(cache.get(urls[-1], "raw"))
+            self.assertIsNone(cache.get(urls[1], "raw"))
+            total = cache.db.execute("SELECT TOTAL(size) FROM blob").fetchone()[0]
+            self.assertEqual(total, cache.total_bytes())
+            cache.put(urls[0], "raw", b"replaced")
+            total = cache.db.execute("SELECT TOTAL(size) FROM blob").fetchone()[0]
+            self.assertEqual(total, cache.total_bytes())
+            files = list(root.glob("*/*.zst"))
+            self.assertEqual(len(cache), len(files))
+            self.assertIn(url_key(urls[0]), {f.name.split(".")[0] for f in files})
+
+    def test_touch_after(self) -> None:
+        url = "https://example.com/a"
+        query = "SELECT used FROM blob"
+        with FetchCache(Path(self.tmp.name)) as cache:
+            cache.raw(url, self.fetch)
+            used = cache.db.execute(query).fetchone()
+            cache.get(url, "raw")  # recently used, so no write
+            self.assertEqual(used, cache.db.execute(query).fetchone())
+            cache.touch_after = 0
+            cache.get(url, "raw")
+            self.assertLess(used, cache.db.execute(query).fetchone())
@@ -1,9 +1,17 @@
 #! /usr/bin/env python
 # Copyright 2023 John Hanley. MIT licensed.
+from collections.abc import Sequence
+from concurrent.futures import Future
+from copy import deepcopy
+from functools import cache, partial
 from pathlib import Path
 from pprint import pp
-from typing import Any
+from queue import Empty, Queue
+from threading import Thread
+from time import perf_counter
+from typing import Any, NamedTuple
 
+from html2text import html2text
 from transformers import (
     AutoModelForCausalLM,
     AutoTokenizer,
@@ -12,7 +20,11 @@ from transformers import (
     T5ForConditionalGeneration,
     T5Tokenizer,
 )
+import numpy as np
 import requests
+import torch
+
+from gen.fetch_cache import FetchCache
 
 CACHE_DIR = Path("/tmp/cache")
 
@@ -26,21 +38,29 @@ def get_cache_filespec(url: str) -> Path:
     return CACHE_DIR / basename
 
 
+def fetch(url: str, verbose: bool = False) -> bytes:
+    ua = "Wget/1.21.4"
+    resp = requests.get(url, headers={"User-Agent": ua})
+    resp.raise_for_status()
+    ct = resp.headers["Content-Type"]
+    assert "text/html; charset=UTF-8" == ct, ct
+    assert "UTF-8" == resp.encoding, resp.encoding
+    if verbose:
+        pp(dict(resp.headers))
+    return resp.content
+
+
+def extract_text(html: bytes) -> str:
+    return str(html2text(html.decode("UTF-8")))
+
+
 class Summarizer:
+    def __init__(self, cache: FetchCache | None = None) -> None:
+        self.cache = cache or FetchCache()
+
     def add_doc_url(self, url: str, verbose: bool = True) -> str:
-        fspec = get_cache_filespec(url)
-        if not fspec.exists():
-            ua = "Wget/1.21.4"
-            resp = requests.get(url, headers={"User-Agent": ua})
-            resp.raise_for_status()
-            ct = resp.headers["Content-Type"]
-            assert "text/html; charset=UTF-8" == ct, ct
-            assert "UTF-8" == resp.encoding, resp.encoding
-            if verbose:
-                pp(dict(resp.headers))
-            fspec.write_bytes(resp.content)
-
-        return self.add_doc(fspec.read_text(encoding="UTF-8"))
+        text = self.cache.text(url, partial(fetch, verbose=verbose), extract_text)
+        return self.add_doc(text)
 
     def add_doc_file(self, in_file: Path, **kwargs: Any) -> str:
         return self.add_doc(in_file.read_text(encoding="UTF-8"), **kwargs)
@@ -57,12 +77,14 @@ class Summarizer:
 
         tokenizer, model = get_llm_model()
         input_ids = tokenizer(text, return_tensors="pt").input_ids
-        outputs = model.generate(input_ids, max_new_tokens=limit)
+        with torch.inference_mode():
+            outputs = model.generate(input_ids, max_new_tokens=limit)
         return str(tokenizer.decode(outputs[0], skip_special_tokens=True))
 
     # model = T5ForConditionalGeneration.from_pretrained("google/t5-v1_1-base")
 
 
+@cache
 def get_t5_model() -> tuple[T5Tokenizer, T5ForConditionalGeneration]:
     t5 = "t5-small"
     tokenizer = T5Tokenizer.from_pretrained(t5, legacy=False)
@@ -74,17 +96,162 @@ def get_t5_model() -> tuple[T5Tokenizer, T5ForConditionalGeneration]:
     return tokenizer, model
 
 
+@cache
 def get_llm_model() -> tuple[CodeGenTokenizerFast, Any]:
+    """Loads the weights just once per process, and keeps them resident."""
     phi = "microsoft/phi-1.5"
     tokenizer = AutoTokenizer.from_pretrained(phi)
     assert isinstance(tokenizer, CodeGenTokenizerFast), type(tokenizer)
 
     model = AutoModelForCausalLM.from_pretrained(phi)
     assert isinstance(model, PhiForCausalLM), type(model)
+    model.to("cpu").eval()
 
     return tokenizer, model
 
 
+def pack_batches(lengths: Sequence[int], token_budget: int) -> list[list[int]]:
+    """
+    Groups documents, shortest first, so that each batch padded to its
+    longest member stays within token_budget. Sorting by length keeps
+    padding waste low. A document too long for the budget rides alone.
+    """
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    for i in np.argsort(lengths, kind="stable").tolist():
+        # Ascending order, so the newcomer is this batch's longest.
+        if batch and (len(batch) + 1) * lengths[i] > token_budget:
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class Stats:
+    """Latency and throughput counters for a SummaryQueue."""
+
+    def __init__(self) -> None:
+        self.docs = self.batches = 0
+        self.prompt_tokens = self.new_tokens = 0
+        self.busy = 0.0  # seconds spent in generate()
+        self.latencies: list[float] = []  # seconds, from submit to result
+
+    def report(self) -> dict[str, float]:
+        lat = np.array(self.latencies or [np.nan])
+        busy = self.busy or np.nan
+        return {
+            "docs": self.docs,
+            "batches": self.batches,
+            "docs_per_sec": self.docs / busy,
+            "tokens_per_sec": (self.prompt_tokens + self.new_tokens) / busy,
+            "p50_latency": float(np.median(lat)),
+            "p95_latency": float(np.percentile(lat, 95)),
+        }
+
+
+class _Job(NamedTuple):
+    text: str
+    n_tokens: int
+    submitted: float
+    future: Future[str]
+
+
+class SummaryQueue:
+    """
+    A background thread gathers submitted documents into batches by token
+    length, up to token_budget padded tokens apiece, and summarizes each
+    batch with one generate() call. The model is loaded once, and shared.
+    Gathering stops after max_wait seconds, or once GATHER_BATCHES
+    batches' worth of tokens are waiting, whichever comes first.
+    """
+
+    GATHER_BATCHES = 8
+
+    def __init__(
+        self,
+        token_budget: int = 4096,
+        limit: int = 24,
+        max_wait: float = 0.05,
+    ) -> None:
+        tokenizer, self.model = get_llm_model()
+        # A private copy, padded on the left, so every prompt ends where
+        # generation begins. Other callers share the cached original.
+        self.tokenizer = deepcopy(tokenizer)
+        self.tokenizer.padding_side = "left"
+        self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.token_budget = token_budget
+        self.limit = limit
+        self.max_wait = max_wait  # seconds to linger, letting a batch fill
+        self.stats = Stats()
+        self.q: Queue[_Job | None] = Queue()
+        self.worker = Thread(target=self._serve, daemon=True)
+        self.worker.start()
+
+    def submit(self, text: str) -> Future[str]:
+        text = "summarize: " + text[:1800]  # as in Summarizer.add_doc()
+        n_tokens = len(self.tokenizer(text).input_ids)
+        future: Future[str] = Future()
+        self.q.put(_Job(text, n_tokens, perf_counter(), future))
+        return future
+
+    def summarize_all(self, texts: Sequence[str]) -> list[str]:
+        return [f.result() for f in [self.submit(t) for t in texts]]
+
+    def close(self) -> None:
+        self.q.put(None)
+        self.worker.join()
+
+    def _serve(self) -> None:
+        done = False
+        while not done:
+            jobs = [self.q.get()]
+            # Gather whatever else arrives shortly, to fill out the batches.
+            deadline = perf_counter() + self.max_wait
+            tokens = jobs[0].n_tokens if jobs[0] else 0
+            while jobs[-1] and tokens < self.GATHER_BATCHES * self.token_budget:
+                try:
+                    job = self.q.get(timeout=max(0.0, deadline - perf_counter()))
+                except Empty:
+                    break
+                jobs.append(job)
+                tokens += job.n_tokens if job else 0
+            if None in jobs:
+                done = True
+            pending = [job for job in jobs if job]
+            lengths = [job.n_tokens for job in pending]
+            for batch in pack_batches(lengths, self.token_budget):
+                self._run([pending[i] for i in batch])
+
+    def _run(self, jobs: list[_Job]) -> None:
+        try:
+            enc = self.tokenizer(
+                [j.text for j in jobs], return_tensors="pt", padding=True
+            )
+            t0 = perf_counter()
+            with torch.inference_mode():
+                outputs = self.model.generate(
+                    **enc,
+                    max_new_tokens=self.limit,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                )
+            self.stats.busy += perf_counter() - t0
+            summaries = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        except Exception as e:  # noqa: BLE001 the callers should hear of it
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+        now = perf_counter()
+        self.stats.docs += len(jobs)
+        self.stats.batches += 1
+        self.stats.prompt_tokens += int(enc.attention_mask.sum())
+        self.stats.new_tokens += (outputs.shape[1] - enc.input_ids.shape[1]) * len(jobs)
+        for job, summary in zip(jobs, summaries):
+            self.stats.latencies.append(now - job.submitted)
+            job.future.set_result(str(summary))
+
+
 def translate() -> None:
     tokenizer, model = get_llm_model()
     text = "translate English to German: The house is wonderful."
@@ -2,15 +2,28 @@
 
 from pathlib import Path
 from pprint import pp
+from tempfile import TemporaryDirectory
+from typing import Any
+from unittest.mock import patch
+import math
 import re
 import unittest
 
 from datasets import Dataset, load_dataset
 from html2text import html2text
 from huggingface_hub import hf_hub_download
+from transformers import BatchEncoding
 import requests
-
-from gen.news_summary import Summarizer, get_cache_filespec
+import torch
+
+from gen.fetch_cache import FetchCache
+from gen.news_summary import (
+    Stats,
+    Summarizer,
+    SummaryQueue,
+    get_cache_filespec,
+    pack_batches,
+)
 
 
 def _remove(pattern: str, subst: str, s: str, flags: int = re.NOFLAG) -> str:
@@ -58,7 +71,12 @@ def get_cached_html_file(url: str, verbose: bool = False) -> Path:
 
 class SummarizerTest(unittest.TestCase):
     def setUp(self) -> None:
-        self.s = Summarizer()
+        self.tmp = TemporaryDirectory()
+        self.s = Summarizer(FetchCache(Path(self.tmp.name)))
+
+    def tearDown(self) -> None:
+        self.s.cache.close()
+        self.tmp.cleanup()
 
     def unused_test_summarize_newsweek(self) -> None:
         self.assertEqual(
@@ -81,6 +99,13 @@ class SummarizerTest(unittest.TestCase):
             self.s.add_doc(text),
         )
 
+    def test_pack_batches(self) -> None:
+        self.assertEqual([], pack_batches([], 100))
+        lengths = [30, 10, 50, 20, 200]
+        # Padded cost is batch size times longest member.
+        self.assertEqual([[1, 3, 0], [2], [4]], pack_batches(lengths, 100))
+        self.assertEqual([[1, 3, 0, 2], [4]], pack_batches(lengths, 200))
+
     def test_load_dataset(self) -> None:
         billsum = load_dataset("billsum", split="ca_test")
         self.assertIsInstance(billsum, Dataset)
@@ -102,3 +127,123 @@ class SummarizerTest(unittest.TestCase):
         )
         self.assertTrue(fspec.exists())
         self.assertEqual(fleurs, fspec.name)
+
+
+class _StubTokenizer:
+    """Splits on whitespace, and numbers each distinct word."""
+
+    eos_token = "<eos>"
+    eos_token_id = 0
+
+    def __init__(self) -> None:
+        self.padding_side = "right"
+        self.pad_token: str | None = None
+        self.vocab = {self.eos_token: self.eos_token_id}
+
+    def _encode(self, text: str) -> list[int]:
+        return [self.vocab.setdefault(w, len(self.vocab)) for w in text.split()]
+
+    def __call__(self, text: str | list[str], **kwargs: Any) -> BatchEncoding:
+        if isinstance(text, str):
+            return BatchEncoding({"input_ids": self._encode(text)})
+        assert "left" == self.padding_side
+        assert kwargs["padding"]
+        rows = [self._encode(t) for t in text]
+        width = max(map(len, rows))
+        return BatchEncoding(
+            {
+                "input_ids": torch.tensor([[0] * (width - len(r)) + r for r in rows]),
+                "attention_mask": torch.tensor(
+                    [[0] * (width - len(r)) + [1] * len(r) for r in rows]
+                ),
+            }
+        )
+
+    def batch_decode(
+        self, outputs: torch.Tensor, skip_special_tokens: bool = False
+    ) -> list[str]:
+        words = {i: w for w, i in self.vocab.items()}
+        return [
+            " ".join(words[i] for i in row.tolist() if i or not skip_special_tokens)
+            for row in outputs
+        ]
+
+
+class _StubModel:
+    """Echoes each prompt, followed by max_new_tokens of padding."""
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+        self.inference: list[bool] = []
+        self.error: Exception | None = None
+
+    def generate(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor,
+        max_new_tokens: int,
+        pad_token_id: int,
+    ) -> torch.Tensor:
+        assert attention_mask.shape == input_ids.shape
+        self.batch_sizes.append(len(input_ids))
+        self.inference.append(torch.is_inference_mode_enabled())
+        if self.error:
+            raise self.error
+        pad = torch.full((len(input_ids), max_new_tokens), pad_token_id)
+        return torch.cat([input_ids, pad], dim=1)
+
+
+class SummaryQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.model = _StubModel()
+        stub = patch(
+            "gen.news_summary.get_llm_model",
+            return_value=(_StubTokenizer(), self.model),
+        )
+        stub.start()
+        self.addCleanup(stub.stop)
+
+    def queue(self, **kwargs: Any) -> SummaryQueue:
+        q = SummaryQueue(**kwargs)
+        self.addCleanup(q.close)
+        return q
+
+    def test_token_cap(self) -> None:
+        # Each document is 3 tokens, so 16 of them fill GATHER_BATCHES batches,
+        # and the worker stops gathering long before max_wait expires.
+        q = self.queue(token_budget=6, limit=4, max_wait=60)
+        docs = [f"doc{i} word{i}" for i in range(16)]
+        futures = [q.submit(doc) for doc in docs]
+        summaries = [f.result(timeout=10) for f in futures]
+
+        self.assertEqual([f"summarize: {doc}" for doc in docs], summaries)
+        self.assertEqual([2] * SummaryQueue.GATHER_BATCHES, self.model.batch_sizes)
+        self.assertTrue(all(self.model.inference))
+
+        report = q.stats.report()
+        self.assertEqual(16, report["docs"])
+        self.assertEqual(8, report["batches"])
+        self.assertEqual(16 * 3, q.stats.prompt_tokens)
+        self.assertEqual(16 * 4, q.stats.new_tokens)
+        self.assertEqual(16, len(q.stats.latencies))
+        self.assertGreater(report["p95_latency"], 0)
+        self.assertGreaterEqual(report["p95_latency"], report["p50_latency"])
+
+    def test_deadline(self) -> None:
+        # A lone document is well short of the token cap, so only the
+        # max_wait deadline sends it on its way.
+        q = self.queue(max_wait=0.05)
+        self.assertEqual("summarize: lone doc", q.submit("lone doc").result(timeout=10))
+        self.assertEqual([1], self.model.batch_sizes)
+
+    def test_error(self) -> None:
+        q = self.queue(max_wait=0.05)
+        self.model.error = RuntimeError("out of memory")
+        with self.assertRaises(RuntimeError):
+            q.submit("some doc").result(timeout=10)
+        self.assertEqual(0, q.stats.docs)
+
+    def test_empty_stats(self) -> None:
+        report = Stats().report()
+        self.assertEqual(0, report["docs"])
+        self.assertTrue(math.isnan(report["p50_latency"]))
@@ -4,18 +4,22 @@
 from array import array
 from collections.abc import Callable
 from hashlib import sha3_224
+from itertools import repeat
 from pathlib import Path
 from random import shuffle
 from time import time
 from typing import Any
+import sqlite3
 
 from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.engine.base import Engine
 from sqlalchemy.orm import DeclarativeBase, Session
 from sqlalchemy.schema import PrimaryKeyConstraint
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
 import sqlalchemy as sa
+import typer
 
 
 def timed(
@@ -61,8 +65,10 @@ class Fact(Base):
     PrimaryKeyConstraint(user_id, fact_id)
 
 
+DB_FILE = Path("/tmp/article.db")
+
+
 def create_engine() -> Engine:
-    DB_FILE = Path("/tmp/article.db")
     DB_URL = f"sqlite:///{DB_FILE}"
     return sa.create_engine(DB_URL)
 
@@ -92,6 +98,71 @@ def insert_user_facts(user_df: pd.DataFrame) -> None:
     user_df.to_sql("fact", engine, index=False, if_exists="append")
 
 
+SCHEMA = """
+DROP TABLE IF EXISTS fact;
+DROP TABLE IF EXISTS world_fact;
+CREATE TABLE world_fact (
+    id      INTEGER PRIMARY KEY,
+    name    VARCHAR NOT NULL,
+    details VARCHAR
+);
+CREATE TABLE fact (
+    user_id INTEGER,
+    fact_id INTEGER REFERENCES world_fact (id)
+);
+"""
+
+# Built after the load, when one sort beats millions of B-tree insertions.
+# It covers the reader's queries, so they never touch the fact table itself.
+# UNIQUE, it stands in for the (user_id, fact_id) primary key of Fact.
+INDEXES = """
+CREATE UNIQUE INDEX fact_user ON fact (user_id, fact_id);
+ANALYZE;
+"""
+
+
+def connect(db_file: Path = DB_FILE) -> sqlite3.Connection:
+    con = sqlite3.connect(db_file, isolation_level=None)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA cache_size = -1000000")  # KiB, so 1 GiB
+    con.execute("PRAGMA temp_store = MEMORY")
+    return con
+
+
+@timed
+def bulk_load(
+    db_file: Path = DB_FILE,
+    num_users: int = NUM_USERS,
+    num_facts: int = NUM_FACTS,
+    seed: int = 0,
+) -> None:
+    """
+    Writes the same dataset as main(), a few hundred times faster.
+    We skip the ORM and pandas, and executemany() plain tuples
+    inside a single transaction, with fsync off for this connection.
+    A crash mid-load leaves a database we'd simply rebuild.
+    """
+    rng = np.random.default_rng(seed)
+    con = connect(db_file)
+    con.execute("PRAGMA synchronous = OFF")
+    con.executescript(SCHEMA)
+    df = get_fact_df()[:num_facts]
+    con.execute("BEGIN")
+    con.executemany(
+        "INSERT INTO world_fact (id, name, details) VALUES (?, ?, ?)",
+        zip(range(1, num_facts + 1), df.name, df.details),
+    )
+    for user_id in tqdm(range(num_users), smoothing=1e-4):
+        fact_ids = np.sort(rng.permutation(num_facts)[: num_facts // 2] + 1)
+        con.executemany(
+            "INSERT INTO fact (user_id, fact_id) VALUES (?, ?)",
+            zip(repeat(user_id), fact_ids.tolist()),
+        )
+    con.execute("COMMIT")
+    con.executescript(INDEXES)
+    con.close()
+
+
 def main() -> None:
     fact_df = get_fact_df()
     insert_world_facts(fact_df)
@@ -106,7 +177,15 @@ def main() -> None:
         insert_user_facts(user_df)
 
 
+def load(orm: bool = False) -> None:
+    """Builds the dataset with bulk_load(), or with --orm the original main()."""
+    if orm:
+        Base.metadata.create_all(engine)
+        main()
+    else:
+        bulk_load()
+
+
 if __name__ == "__main__":
-    engine = create_engine()
-    Base.metadata.create_all(engine)
-    main()
+    engine = create_engine()  # for the ORM functions, as used by main()
+    typer.run(load)
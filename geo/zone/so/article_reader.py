@@ -3,12 +3,21 @@
 # from https://softwareengineering.stackexchange.com/questions/450146/designing-a-graph-database-structure
 from collections.abc import Generator, Iterable
 from random import randrange
+from time import perf_counter
+import sqlite3
 
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from tqdm import tqdm
 
-from geo.zone.so.article_db import NUM_FACTS, NUM_USERS, Fact, WorldFact, create_engine
+from geo.zone.so.article_db import (
+    NUM_FACTS,
+    NUM_USERS,
+    Fact,
+    WorldFact,
+    connect,
+    create_engine,
+)
 
 
 def fact_details_for(user_id: int) -> Generator[Iterable[str]]:
@@ -24,6 +33,46 @@ def num_facts_for(user_id: int) -> Generator[Iterable[int]]:
         yield from session.query(text(select)).filter(Fact.user_id == user_id)
 
 
+class FactReader:
+    """
+    Plain sqlite3, for queries answered from the fact_user covering index.
+    A connection keeps the compiled statement for each SQL string it has seen,
+    so repeated calls skip the parse and plan.
+    """
+
+    COUNT = "SELECT COUNT(*) FROM fact WHERE user_id = ?"
+    DETAILS = """
+        SELECT w.details
+        FROM fact AS f
+        JOIN world_fact AS w ON w.id = f.fact_id
+        WHERE f.user_id = ?
+    """
+
+    def __init__(self, con: sqlite3.Connection) -> None:
+        self.con = con
+
+    def num_facts(self, user_id: int) -> int:
+        (n,) = self.con.execute(self.COUNT, (user_id,)).fetchone()
+        return int(n)
+
+    def fact_details(self, user_id: int) -> list[str]:
+        return [d for (d,) in self.con.execute(self.DETAILS, (user_id,))]
+
+    def plan(self, sql: str) -> str:
+        return " / ".join(
+            row[-1] for row in self.con.execute(f"EXPLAIN QUERY PLAN {sql}", (0,))
+        )
+
+
+def main_fast(num_queries: int = 1_000) -> None:
+    reader = FactReader(connect())
+    print(reader.plan(reader.COUNT))
+    t0 = perf_counter()
+    for _ in range(num_queries):
+        assert NUM_FACTS / 2 == reader.num_facts(randrange(NUM_USERS))
+    print(f"{(perf_counter() - t0) / num_queries * 1e3:.3f} msec per count")
+
+
 def main(num_queries: int = 1_000) -> None:
     for _ in tqdm(range(num_queries), smoothing=1e-4):
         user_id = randrange(NUM_USERS)
@@ -33,4 +82,4 @@ def main(num_queries: int = 1_000) -> None:
 
 if __name__ == "__main__":
     engine = create_engine()
-    main()
+    main_fast()
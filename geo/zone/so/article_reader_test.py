@@ -0,0 +1,29 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sqlite3
+import unittest
+
+from geo.zone.so.article_db import bulk_load, connect
+from geo.zone.so.article_reader import FactReader
+
+
+class FactReaderTest(unittest.TestCase):
+    def test_bulk_load(self) -> None:
+        with TemporaryDirectory() as tmp:
+            db_file = Path(tmp) / "article.db"
+            bulk_load(db_file, num_users=5, num_facts=40)
+            con = connect(db_file)
+            reader = FactReader(con)
+            self.assertEqual([20] * 5, [reader.num_facts(u) for u in range(5)])
+            self.assertEqual(0, reader.num_facts(5))
+            details = reader.fact_details(3)
+            self.assertEqual(20, len(set(details)))
+            self.assertTrue(all(d.startswith("Loxodonta africana ") for d in details))
+            self.assertIn("COVERING INDEX fact_user", reader.plan(reader.COUNT))
+            self.assertIn("COVERING INDEX fact_user", reader.plan(reader.DETAILS))
+            self.assertEqual("wal", con.execute("PRAGMA journal_mode").fetchone()[0])
+            with self.assertRaises(sqlite3.IntegrityError):
+                con.execute("INSERT INTO fact (user_id, fact_id) VALUES (0, 1)")
+                con.execute("INSERT INTO fact (user_id, fact_id) VALUES (0, 1)")
+            con.close()
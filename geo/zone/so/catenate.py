@@ -0,0 +1,187 @@
+#! /usr/bin/env python
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Reusable, parallel versions of the catenate_arrays.py kernels.
+
+They compute
+
+    out = concatenate((2 * a[1:-1], 4 * a[:2]))
+
+The task is pure streaming: read 8 bytes and write 8 bytes per element,
+with one multiply in between. So once the arrays spill out of cache, the
+best any kernel can do is the machine's memory bandwidth, and the right
+question is what fraction of it we reach. Each kernel writes to an output
+that the caller preallocated, so page faults on a fresh allocation are
+not charged to the kernel, and the caller can reuse a buffer.
+
+catenate_npy() handles arrays bigger than RAM, streaming a memory-mapped
+.npy input to a memory-mapped .npy output a chunk at a time.
+main() sweeps sizes from L1-resident to larger than RAM, reporting GB/s.
+"""
+
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import os
+
+from numba import njit, prange
+from numpy.typing import NDArray
+import numpy as np
+import typer
+
+from geo.zone.so.catenate_arrays import eqn1, eqn2, eqn4
+
+Kernel = Callable[[NDArray[np.float64], NDArray[np.float64]], None]
+
+
+PARALLEL_MIN = 1 << 17  # elements; below this, thread startup costs more than it saves
+
+
+def _loop(a: NDArray[np.float64], out: NDArray[np.float64]) -> None:
+    """Like eqn2, one fused pass."""
+    n = len(a)
+    for i in prange(n - 2):
+        out[i] = 2 * a[i + 1]
+    out[n - 2] = 4 * a[0]
+    out[n - 1] = 4 * a[1]
+
+
+catenate_serial = njit(cache=True, fastmath=True)(_loop)
+catenate_loop = njit(parallel=True, cache=True, fastmath=True)(_loop)
+
+
+@njit(parallel=True, cache=True, fastmath=True)  # type: ignore [misc]
+def catenate_slices(a: NDArray[np.float64], out: NDArray[np.float64]) -> None:
+    """Like eqn4, as slice expressions, which Numba parallelizes for us."""
+    out[:-2] = 2 * a[1:-1]
+    out[-2:] = 4 * a[:2]
+
+
+@njit(parallel=True, cache=True, fastmath=True)  # type: ignore [misc]
+def _scale(a: NDArray[np.float64], out: NDArray[np.float64], k: float) -> None:
+    for i in prange(len(out)):
+        out[i] = k * a[i]
+
+
+def catenate(
+    a: NDArray[np.float64],
+    out: NDArray[np.float64] | None = None,
+    kernel: Kernel | None = None,
+) -> NDArray[np.float64]:
+    """By default, runs in parallel only on arrays big enough to benefit."""
+    assert a.ndim == 1 and len(a) >= 2, a.shape
+    if kernel is None:
+        kernel = catenate_loop if len(a) >= PARALLEL_MIN else catenate_serial
+    if out is None:
+        out = np.empty_like(a)
+    assert out.shape == a.shape, (out.shape, a.shape)
+    kernel(a, out)
+    return out
+
+
+def catenate_npy(src: Path, dst: Path, chunk: int = 1 << 22) -> None:
+    """
+    Writes catenate() of the array in src to dst, holding only a chunk of
+    elements in RAM at a time. The default chunk is 32 MiB of float64,
+    big enough to amortize the per-call overhead of a parallel kernel.
+    """
+    a = np.load(src, mmap_mode="r")
+    assert a.ndim == 1 and len(a) >= 2, a.shape
+    n = len(a)
+    out = np.lib.format.open_memmap(dst, "w+", a.dtype, a.shape)
+    for i in range(0, n - 2, chunk):
+        j = min(i + chunk, n - 2)
+        # asarray() strips the memmap subclass, without copying, for Numba's sake.
+        _scale(np.asarray(a[i + 1 : j + 1]), np.asarray(out[i:j]), 2.0)
+    out[n - 2 :] = 4 * a[:2]
+    out.flush()
+    del out
+
+
+def ram_bytes() -> int:
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def _best_time(fn: Callable[[], object], budget: float = 0.2) -> float:
+    """Fastest of several runs, repeating until we've spent budget seconds."""
+    best = np.inf
+    spent = 0.0
+    while spent < budget or best == np.inf:
+        t0 = perf_counter()
+        fn()
+        elapsed = perf_counter() - t0
+        best = min(best, elapsed)
+        spent += elapsed
+    return best
+
+
+def bandwidth_ceiling(nbytes: int = 1 << 30) -> float:
+    """GB/s of np.copyto() between arrays far bigger than cache, counting read + write."""
+    src = np.ones(nbytes // 8)
+    dst = np.ones_like(src)
+    return 2 * nbytes / _best_time(lambda: np.copyto(dst, src), 1.0) / 1e9
+
+
+def _write_npy(path: Path, n: int, chunk: int = 1 << 22) -> None:
+    """A random array that needn't fit in RAM."""
+    rng = np.random.default_rng(0)
+    a = np.lib.format.open_memmap(path, "w+", np.float64, (n,))
+    for i in range(0, n, chunk):
+        a[i : i + chunk] = rng.random(min(chunk, n - i))
+    a.flush()
+    del a
+
+
+def main(
+    min_bytes: int = 1 << 12,
+    max_bytes: int = 2 * ram_bytes(),
+    tmp_dir: Path = Path("/tmp"),
+) -> None:
+    """
+    Sweeps array sizes by factors of two. Up to a quarter of RAM, we time
+    the kernels in memory. Beyond that, catenate_npy() runs over files,
+    with the input's pages dropped from the cache where the OS allows,
+    so beyond RAM size we measure the disk as much as the kernel.
+    """
+    ceiling = bandwidth_ceiling()
+    print(f"memory bandwidth ceiling {ceiling:.1f} GB/s (np.copyto, read + write)")
+    print(f"{'bytes':>14}  {'kernel':<16} {'GB/s':>7}  ceiling")
+    kernels: dict[str, Callable[[NDArray[np.float64], NDArray[np.float64]], object]] = {
+        "eqn1": lambda a, _: eqn1(a),
+        "eqn2": lambda a, _: eqn2(a),
+        "eqn4": lambda a, _: eqn4(a),
+        "catenate_serial": catenate_serial,
+        "catenate_loop": catenate_loop,
+        "catenate_slices": catenate_slices,
+    }
+    nbytes = min_bytes
+    while nbytes <= max_bytes:
+        n = nbytes // 8
+        if nbytes <= ram_bytes() // 4:
+            a = np.random.default_rng(0).random(n)
+            out = np.empty_like(a)
+            for name, kernel in kernels.items():
+                kernel(a, out)  # compile, and fault in the output's pages
+                elapsed = _best_time(partial(kernel, a, out))
+                gbs = 2 * nbytes / elapsed / 1e9
+                print(f"{nbytes:14,}  {name:<16} {gbs:7.2f}  {gbs / ceiling:6.0%}")
+            del a, out
+        else:
+            with TemporaryDirectory(dir=tmp_dir) as tmp:
+                src, dst = Path(tmp) / "a.npy", Path(tmp) / "out.npy"
+                _write_npy(src, n)
+                with src.open("rb") as f:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+                t0 = perf_counter()
+                catenate_npy(src, dst)
+                gbs = 2 * nbytes / (perf_counter() - t0) / 1e9
+                print(
+                    f"{nbytes:14,}  {'catenate_npy':<16} {gbs:7.2f}  {gbs / ceiling:6.0%}"
+                )
+        nbytes *= 2
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,39 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+
+from geo.zone.so.catenate import (
+    catenate,
+    catenate_loop,
+    catenate_npy,
+    catenate_serial,
+    catenate_slices,
+)
+
+
+def expected(a: np.ndarray) -> np.ndarray:
+    return np.concatenate((2 * a[1:-1], 4 * a[:2]))
+
+
+class CatenateTest(unittest.TestCase):
+    def test_kernels(self) -> None:
+        rng = np.random.default_rng(0)
+        for n in (2, 3, 10, 1000, 300_000):
+            a = rng.random(n)
+            np.testing.assert_array_equal(expected(a), catenate(a))
+            for kernel in (catenate_serial, catenate_loop, catenate_slices):
+                out = np.full_like(a, np.nan)
+                self.assertIs(out, catenate(a, out, kernel))
+                np.testing.assert_array_equal(expected(a), out)
+
+    def test_npy(self) -> None:
+        a = np.random.default_rng(1).random(1001)
+        with TemporaryDirectory() as tmp:
+            src, dst = Path(tmp) / "a.npy", Path(tmp) / "out.npy"
+            np.save(src, a)
+            for chunk in (1, 7, 1000, 1 << 22):
+                catenate_npy(src, dst, chunk)
+                np.testing.assert_array_equal(expected(a), np.load(dst))
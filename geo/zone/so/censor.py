@@ -0,0 +1,139 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Censors a text against many banned words in one left-to-right pass.
+
+USACO's censoring problem deletes the first occurrence of a banned word,
+then looks again, since a deletion can splice together a new occurrence.
+Instead of rescanning, we push each byte onto a stack, along with the
+Aho-Corasick automaton state reached after it. When that state completes
+a banned word, we pop the word's bytes, and the state below them is just
+where matching resumes, as if the word had never been there.
+
+We work on UTF-8 bytes, which is safe since no encoded character is a
+substring of another. Where several words end at the same byte, we delete
+the longest.
+"""
+
+from collections import deque
+from collections.abc import Iterable
+from pathlib import Path
+
+from numba import njit
+from numpy.typing import NDArray
+import numpy as np
+
+
+class Automaton:
+    """A dense Aho-Corasick goto table, with fail links already folded in."""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        children: list[dict[int, int]] = [{}]
+        depth = [0]
+        terminal = [False]
+        for word in words:
+            assert word, "banned words must be non-empty"
+            s = 0
+            for b in word.encode():
+                if b not in children[s]:
+                    children[s][b] = len(children)
+                    children.append({})
+                    depth.append(depth[s] + 1)
+                    terminal.append(False)
+                s = children[s][b]
+            terminal[s] = True
+
+        n = len(children)
+        self.delta = np.zeros((n, 256), np.int32)
+        self.drop = np.zeros(n, np.int32)  # bytes to delete upon reaching each state
+        fail = np.zeros(n, np.int32)
+        # Breadth first, so each state's fail target is complete before we copy from it.
+        queue = deque([0])
+        while queue:
+            s = queue.popleft()
+            if s:
+                self.delta[s] = self.delta[fail[s]]
+                self.drop[s] = depth[s] if terminal[s] else self.drop[fail[s]]
+            for b, child in children[s].items():
+                fail[child] = self.delta[s, b] if s else 0
+                self.delta[s, b] = child
+                queue.append(child)
+        self.max_len = max(depth)
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _censor(  # noqa: PLR0913, PLR0917
+    chunk: NDArray[np.uint8],
+    delta: NDArray[np.int32],
+    drop: NDArray[np.int32],
+    stack: NDArray[np.uint8],
+    states: NDArray[np.int32],
+    top: int,
+) -> tuple[int, int]:
+    """
+    Pushes the chunk's bytes, popping each banned word as it completes.
+    states[i] is the automaton state after stack[:i]. Returns the new top
+    and the number of deletions, or top = -1 if a deletion reached below
+    the bottom of the stack.
+    """
+    deletions = 0
+    for b in chunk:
+        s = delta[states[top], b]
+        stack[top] = b
+        top += 1
+        states[top] = s
+        if drop[s]:
+            top -= drop[s]
+            deletions += 1
+            if top < 0:
+                return -1, deletions
+    return top, deletions
+
+
+class Censor:
+    def __init__(self, words: Iterable[str]) -> None:
+        self.automaton = Automaton(words)
+
+    def censor(self, text: str) -> tuple[str, int]:
+        """Returns the censored text, and how many deletions it took."""
+        data = np.frombuffer(text.encode(), np.uint8)
+        stack = np.empty(len(data), np.uint8)
+        states = np.zeros(len(data) + 1, np.int32)
+        a = self.automaton
+        top, n = _censor(data, a.delta, a.drop, stack, states, 0)
+        return stack[:top].tobytes().decode(), n
+
+    def censor_file(
+        self,
+        src: Path,
+        dst: Path,
+        chunk_size: int = 1 << 24,
+        keep: int = 1 << 20,
+    ) -> int:
+        """
+        Streams src to dst in chunks, returning the number of deletions.
+        Only the last keep bytes of output stay on the stack, so a chain of
+        deletions may reach back at most that far. Longer chains,
+        which take pathological nesting, raise ValueError.
+        """
+        assert keep >= self.automaton.max_len, (keep, self.automaton.max_len)
+        a = self.automaton
+        stack = np.empty(keep + chunk_size, np.uint8)
+        states = np.zeros(keep + chunk_size + 1, np.int32)
+        top = deletions = 0
+        with src.open("rb") as fin, dst.open("wb") as fout:
+            while chunk := fin.read(chunk_size):
+                if top > keep:
+                    # Emit all but the last keep bytes, and slide those down.
+                    fout.write(stack[: top - keep].tobytes())
+                    stack[:keep] = stack[top - keep : top]
+                    states[: keep + 1] = states[top - keep : top + 1]
+                    top = keep
+                top, n = _censor(
+                    np.frombuffer(chunk, np.uint8), a.delta, a.drop, stack, states, top
+                )
+                deletions += n
+                if top < 0:
+                    msg = f"deletions reached back more than {keep} bytes"
+                    raise ValueError(msg)
+            fout.write(stack[:top].tobytes())
+        return deletions
@@ -0,0 +1,70 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+from hypothesis import given
+import hypothesis.strategies as st
+
+from geo.zone.so.censor import Censor
+from geo.zone.so.string_to_array import Article, lorem_ipsum_article
+
+
+def censor_slow(text: str, words: list[str]) -> tuple[str, int]:
+    """Repeatedly deletes the earliest ending occurrence, longest word first, in O(n^2) time."""
+    words = sorted(words, key=len, reverse=True)
+    n = 0
+    end = 1
+    while end <= len(text):
+        for word in words:
+            if text[:end].endswith(word):
+                text = text[: end - len(word)] + text[end:]
+                n += 1
+                end = 0
+                break
+        end += 1
+    return text, n
+
+
+class CensorTest(unittest.TestCase):
+    def test_nested(self) -> None:
+        self.assertEqual(("", 3), Censor(["moo"]).censor("mmmoooooo"))
+        self.assertEqual(("whale", 2), Censor(["moo"]).censor("whmomoooale"))
+
+    def test_dictionary(self) -> None:
+        c = Censor(["he", "she", "hers", "his"])
+        self.assertEqual(("s", 1), c.censor("shes"))
+        self.assertEqual(("", 2), c.censor("shhise"))
+        self.assertEqual(
+            ("Straß Bücher", 1), Censor(["e des"]).censor("Straße des Bücher")
+        )
+
+    def test_matches_article(self) -> None:
+        text = lorem_ipsum_article(size=20_000, boiler_size=100)
+        art = Article(text)
+        n = art.censor("moo")
+        self.assertEqual((str(art), n), Censor(["moo"]).censor(text))
+
+        art = Article(text)
+        self.assertEqual(n, art.censor_all(["moo"]))
+        self.assertEqual(len(text) - 3 * n, len(str(art)))
+
+    @given(st.text(alphabet="mos", max_size=40))
+    def test_matches_slow(self, text: str) -> None:
+        words = ["moo", "so", "mos", "o"]
+        self.assertEqual(censor_slow(text, ["moo"]), Censor(["moo"]).censor(text))
+        self.assertEqual(censor_slow(text, words), Censor(words).censor(text))
+
+    def test_file(self) -> None:
+        text = lorem_ipsum_article(size=200_000, boiler_size=50)
+        expected = Censor(["moo", "aaaa"]).censor(text)
+        with TemporaryDirectory() as tmp:
+            src, dst = Path(tmp) / "in.txt", Path(tmp) / "out.txt"
+            src.write_text(text)
+            c = Censor(["moo", "aaaa"])
+            n = c.censor_file(src, dst, chunk_size=1_000, keep=100)
+            self.assertEqual(expected, (dst.read_text(), n))
+
+            src.write_text("m" * 300 + "o" * 600)
+            with self.assertRaises(ValueError):
+                c.censor_file(src, dst, chunk_size=100, keep=10)
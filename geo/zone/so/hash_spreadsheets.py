@@ -2,11 +2,20 @@
 # Copyright 2023 John Hanley. MIT licensed.
 # from https://codereview.stackexchange.com/questions/288493/comparison-of-two-excel-files-ignoring-line-order
 from collections import Counter
-from collections.abc import Generator
-from hashlib import sha3_224
+from collections.abc import Generator, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b, sha3_224
+from multiprocessing import get_context
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, NamedTuple
+import datetime as dt
+import pickle
+import struct
 
+from numpy.typing import NDArray
 from openpyxl.worksheet.worksheet import Worksheet
+import numpy as np
 import openpyxl
 import typer
 
@@ -43,9 +52,159 @@ def identical_sheets_multiset(in_file1: Path, in_file2: Path) -> bool:
     return sum(map(abs, hashes.values())) == 0
 
 
-def main(in_file1: Path, in_file2: Path) -> None:
-    not_ = "" if identical_sheets_multiset(in_file1, in_file2) else "n't"
+def _encode(value: Any) -> bytes:
+    """A type tag and a length prefix, so that no two rows can share an encoding."""
+    if value is None:
+        return b"n"
+    if isinstance(value, bool):
+        return b"b1" if value else b"b0"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # a sheet may store 3 as either
+    if isinstance(value, int):
+        tag, body = b"i", str(value).encode()
+    elif isinstance(value, float):
+        tag, body = b"f", struct.pack("<d", value)
+    elif isinstance(value, dt.datetime | dt.date | dt.time):
+        tag, body = b"d", value.isoformat().encode()
+    else:
+        tag, body = b"s", str(value).encode()
+    return tag + struct.pack("<I", len(body)) + body
+
+
+def row_hash(row: Iterable[Any]) -> int:
+    """64 bits of blake2b over a canonical encoding of the row's cells."""
+    h = blake2b(digest_size=8)
+    for value in row:
+        h.update(_encode(value))
+    return int.from_bytes(h.digest(), "little")
+
+
+def _hash_sheet(
+    in_file: Path,
+    sheet: str,
+    spill: Path,
+    key_cols: Sequence[int],
+    chunk_rows: int = 1 << 16,
+) -> int:
+    """
+    Streams a sheet's rows, spilling their hashes to spill.hash,
+    and their pickled key cells to spill.key, with end offsets in spill.end.
+    Memory holds just one chunk of rows. Returns the number of rows.
+    """
+    wb = openpyxl.load_workbook(in_file, read_only=True, data_only=True)
+    hashes = np.empty(chunk_rows, np.uint64)
+    ends = np.empty(chunk_rows, np.uint64)
+    n = i = 0
+    with (
+        spill.with_suffix(".hash").open("wb") as fhash,
+        spill.with_suffix(".key").open("wb") as fkey,
+        spill.with_suffix(".end").open("wb") as fend,
+    ):
+        for row in wb[sheet].iter_rows(values_only=True):
+            hashes[i] = row_hash(row)
+            fkey.write(pickle.dumps(tuple(row[c] for c in key_cols)))
+            ends[i] = fkey.tell()
+            i += 1
+            if i == chunk_rows:
+                hashes.tofile(fhash)
+                ends.tofile(fend)
+                n += i
+                i = 0
+        hashes[:i].tofile(fhash)
+        ends[:i].tofile(fend)
+    wb.close()
+    return n + i
+
+
+def _keys(spill: Path, rows: NDArray[np.int64]) -> list[tuple[Any, ...]]:
+    """Key cells of the given (0-based) rows, read back from the spill."""
+    if len(rows) == 0:
+        return []
+    ends = np.fromfile(spill.with_suffix(".end"), np.uint64).astype(np.int64)
+    starts = np.concatenate(([0], ends[:-1]))
+    with spill.with_suffix(".key").open("rb") as fin:
+        keys = []
+        for r in rows.tolist():
+            fin.seek(starts[r])
+            keys.append(pickle.loads(fin.read(ends[r] - starts[r])))
+    return keys
+
+
+def _surplus(a: NDArray[np.uint64], b: NDArray[np.uint64]) -> NDArray[np.int64]:
+    """Row indices into a, of rows that occur more often in a than in b."""
+    order = np.argsort(a, kind="stable")
+    keys, first, count_a = np.unique(a[order], return_index=True, return_counts=True)
+    count_b = np.zeros(len(keys), np.int64)
+    ub, cb = np.unique(b, return_counts=True)
+    found = np.isin(ub, keys)
+    count_b[np.searchsorted(keys, ub[found])] = cb[found]
+    extra = count_a - count_b
+    # Report the last few occurrences of each surplus hash.
+    pick = [order[f + c - e : f + c] for f, c, e in zip(first, count_a, extra) if e > 0]
+    return np.sort(np.concatenate(pick)) if pick else np.zeros(0, np.int64)
+
+
+class RowChange(NamedTuple):
+    sheet: str
+    change: str  # "added" or "removed"
+    row: int  # 1-based, in the workbook that holds it
+    key: tuple[Any, ...]
+
+
+def diff_workbooks(
+    in_file1: Path,
+    in_file2: Path,
+    key_cols: Sequence[int] = (0,),
+    workers: int | None = None,
+) -> list[RowChange]:
+    """
+    Rows added and removed, going from the first workbook to the second,
+    ignoring row order. Sheets pair up by name, and each sheet of each
+    workbook is parsed just once, by its own worker process.
+    Workers spill to a temporary directory, so all we hold in RAM is
+    eight bytes of hash per row, and the key cells of rows that differ.
+    """
+    files = (in_file1, in_file2)
+    names = []
+    for f in files:
+        wb = openpyxl.load_workbook(f, read_only=True)
+        names.append(wb.sheetnames)
+        wb.close()
+    sheets = list(dict.fromkeys(names[0] + names[1]))
+    changes = []
+    # Not "fork", which hangs at exit once Numba's threading layer has started.
+    ctx = get_context("forkserver")
+    with TemporaryDirectory() as tmp, ProcessPoolExecutor(workers, ctx) as pool:
+
+        def spill(k: int, j: int) -> Path:
+            return Path(tmp) / f"{k}-{j}"
+
+        jobs = {
+            (k, j): pool.submit(_hash_sheet, f, sheet, spill(k, j), key_cols)
+            for k, f in enumerate(files)
+            for j, sheet in enumerate(sheets)
+            if sheet in names[k]
+        }
+        for j, sheet in enumerate(sheets):
+            hashes = [np.zeros(0, np.uint64)] * 2
+            for k in range(2):
+                if (k, j) in jobs and jobs[k, j].result():
+                    hashes[k] = np.fromfile(spill(k, j).with_suffix(".hash"), np.uint64)
+            for k, change in ((0, "removed"), (1, "added")):
+                rows = _surplus(hashes[k], hashes[1 - k])
+                changes += [
+                    RowChange(sheet, change, r + 1, key)
+                    for r, key in zip(rows.tolist(), _keys(spill(k, j), rows))
+                ]
+    return changes
+
+
+def main(in_file1: Path, in_file2: Path, key_col: int = 0) -> None:
+    changes = diff_workbooks(in_file1, in_file2, (key_col,))
+    not_ = "n't" if changes else ""
     print(f"The two spreadsheets are{not_} identical.\t", in_file1, in_file2)
+    for c in changes:
+        print(c.change, c.sheet, c.row, *c.key, sep="\t")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+import datetime as dt
+import unittest
+
+import openpyxl
+
+from geo.zone.so.hash_spreadsheets import RowChange, diff_workbooks, row_hash
+
+
+def _write(path: Path, sheets: dict[str, list[tuple[Any, ...]]]) -> Path:
+    wb = openpyxl.Workbook()
+    assert wb.active
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+    return path
+
+
+class HashSpreadsheetsTest(unittest.TestCase):
+    def test_row_hash(self) -> None:
+        self.assertEqual(row_hash((3, "a")), row_hash((3.0, "a")))
+        self.assertNotEqual(row_hash(("ab", "c")), row_hash(("a", "bc")))
+        self.assertNotEqual(row_hash((1,)), row_hash(("1",)))
+        self.assertNotEqual(row_hash((None, 1)), row_hash((1, None)))
+        self.assertNotEqual(row_hash((True,)), row_hash((1,)))
+        self.assertNotEqual(
+            row_hash((dt.datetime(2025, 1, 2, tzinfo=dt.UTC),)),
+            row_hash(("2025-01-02T00:00:00+00:00",)),
+        )
+
+    def test_diff(self) -> None:
+        rows = [("id", "name"), (1, "ant"), (2, "bee"), (2, "bee"), (3, "cat")]
+        with TemporaryDirectory() as tmp:
+            a = _write(Path(tmp) / "a.xlsx", {"s": rows, "gone": [(9, "x")]})
+            b = _write(
+                Path(tmp) / "b.xlsx",
+                {"s": [rows[0], (3, "cat"), (4, "dog"), (2, "bee"), (1, "ant")]},
+            )
+            self.assertEqual([], diff_workbooks(a, a, workers=1))
+            self.assertEqual(
+                [
+                    RowChange("s", "removed", 4, (2,)),
+                    RowChange("s", "added", 3, (4,)),
+                    RowChange("gone", "removed", 1, (9,)),
+                ],
+                diff_workbooks(a, b, workers=2),
+            )
+            self.assertEqual(
+                [
+                    RowChange("s", "removed", 3, (4, "dog")),
+                    RowChange("s", "added", 4, (2, "bee")),
+                ],
+                [c for c in diff_workbooks(b, a, (0, 1)) if c.sheet == "s"],
+            )
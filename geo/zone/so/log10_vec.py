@@ -0,0 +1,267 @@
+#! /usr/bin/env python
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Whole-array versions of the log_newton and log_meow algorithms from log10.py.
+
+Both scalar versions start from the raw argument, so log_newton needs
+dozens of damped iterations, and log_meow divides by the base hundreds
+of times for large inputs. Here we first reduce the argument exactly:
+x = m * 2**e, which frexp() gets right even for subnormals. That leaves
+each algorithm a narrow interval to cover in a fixed number of steps, so
+every lane of an array does the same work, with no per-element loop exit.
+
+log_newton refines y = ln(m) with the iteration from log10.py,
+y += 2 (m - e**y) / (m + e**y), which converges cubically.
+Taking m - e**y as (m - 1) - expm1(y) keeps it accurate near x = 1,
+where the answer is tiny. Then ln x = e ln 2 + y, and we scale by 1 / ln(base).
+
+log_meow squares m repeatedly, emitting one bit of log_base(m) per square.
+That gives a small absolute error, but not a small relative one:
+just below x = 1, e ln 2 and log(m) nearly cancel.
+
+Each comes in a NumPy flavor, which works through the input a cache-sized
+chunk at a time, and a Numba flavor, which compiles a scalar loop over
+all cores. main() benchmarks them against np.log10.
+"""
+
+from collections.abc import Callable
+from time import perf_counter
+import math
+
+from numba import njit, prange
+from numpy.typing import NDArray
+import numpy as np
+import typer
+
+LN2_HI = 6.93147180369123816490e-01  # trailing zero bits, so e * LN2_HI is exact
+LN2_LO = 1.90821492927058770002e-10
+SQRT_HALF = math.sqrt(0.5)
+CHUNK = 1 << 14
+MEOW_STEPS = 56  # bits, enough to push the last fraction below ulp(result)
+
+LogFn = Callable[[NDArray[np.float64]], NDArray[np.float64]]
+
+
+def _specials(x: NDArray[np.float64], out: NDArray[np.float64]) -> None:
+    """Patches in np.log10's answers for zero, negative, infinite, and NaN inputs."""
+    bad = ~(x > 0) | (x == np.inf)
+    if np.any(bad):
+        xb = x[bad]
+        out[bad] = np.where(xb == 0, -np.inf, np.where(xb == np.inf, np.inf, np.nan))
+
+
+def _reduce(x: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Returns (m, e) with x = m * 2**e and sqrt(1/2) <= m < sqrt(2)."""
+    m, e = np.frexp(x)
+    low = m < SQRT_HALF
+    return np.where(low, 2 * m, m), e - low
+
+
+def _newton_chunk(x: NDArray[np.float64], inv_ln_base: float) -> NDArray[np.float64]:
+    m, e = _reduce(x)
+    d = m - 1  # exact, by Sterbenz
+    t = d / (m + 1)
+    t2 = t * t
+    y = 2 * t * (1 + t2 * (1 / 3 + t2 * (1 / 5 + t2 / 7)))  # atanh, to 1e-8
+    em1 = np.expm1(y)
+    y += 2 * (d - em1) / (m + 1 + em1)  # cubes the relative error
+    return (e * LN2_HI + (y + e * LN2_LO)) * inv_ln_base  # type: ignore [no-any-return]
+
+
+def _meow_chunk(x: NDArray[np.float64], base: int) -> NDArray[np.float64]:
+    m, e = np.frexp(x)
+    m, e = 2 * m, e - 1  # 1 <= m < 2 <= base
+    result = np.zeros_like(x)
+    fraction = 0.5
+    m *= m
+    for _ in range(MEOW_STEPS):
+        big = m > base
+        result += np.where(big, fraction, 0)
+        m = np.where(big, m / base, m)
+        m *= m
+        fraction /= 2
+    return result + e * (math.log(2) / math.log(base))  # type: ignore [no-any-return]
+
+
+def _chunked(
+    kernel: Callable[[NDArray[np.float64]], NDArray[np.float64]],
+    x: NDArray[np.float64],
+    out: NDArray[np.float64] | None,
+) -> NDArray[np.float64]:
+    """Applies kernel a chunk at a time, so its temporaries stay in cache."""
+    x = np.asarray(x, np.float64)
+    if out is None:
+        out = np.empty_like(x)
+    flat_x, flat_out = x.reshape(-1), out.reshape(-1)
+    for i in range(0, len(flat_x), CHUNK):
+        xs = flat_x[i : i + CHUNK]
+        with np.errstate(all="ignore"):
+            flat_out[i : i + CHUNK] = kernel(xs)
+        _specials(xs, flat_out[i : i + CHUNK])
+    return out
+
+
+def log_newton_np(
+    base: int, x: NDArray[np.float64], out: NDArray[np.float64] | None = None
+) -> NDArray[np.float64]:
+    inv_ln_base = 1 / math.log(base)
+    return _chunked(lambda xs: _newton_chunk(xs, inv_ln_base), x, out)
+
+
+def log_meow_np(
+    base: int, x: NDArray[np.float64], out: NDArray[np.float64] | None = None
+) -> NDArray[np.float64]:
+    return _chunked(lambda xs: _meow_chunk(xs, base), x, out)
+
+
+@njit(cache=True, error_model="numpy")  # type: ignore [misc]
+def _special(x: float) -> float:
+    if x == 0:
+        return -np.inf
+    if x == np.inf:
+        return np.inf
+    return np.nan
+
+
+@njit(cache=True, error_model="numpy")  # type: ignore [misc]
+def _newton1(x: float, inv_ln_base: float) -> float:
+    if not 0 < x < np.inf:
+        return _special(x)  # type: ignore [no-any-return]
+    m, e = math.frexp(x)
+    if m < SQRT_HALF:
+        m *= 2
+        e -= 1
+    d = m - 1
+    t = d / (m + 1)
+    t2 = t * t
+    y = 2 * t * (1 + t2 * (1 / 3 + t2 * (1 / 5 + t2 / 7)))
+    em1 = math.expm1(y)
+    y += 2 * (d - em1) / (m + 1 + em1)
+    return (e * LN2_HI + (y + e * LN2_LO)) * inv_ln_base
+
+
+@njit(cache=True, error_model="numpy")  # type: ignore [misc]
+def _meow1(x: float, base: int, log_base_2: float) -> float:
+    if not 0 < x < np.inf:
+        return _special(x)  # type: ignore [no-any-return]
+    m, e = math.frexp(x)
+    m *= 2
+    result = 0.0
+    fraction = 0.5
+    m *= m
+    # Unlike log10.py, we stop as soon as the bits run out, lane by lane.
+    while fraction + result > result and m > 1:
+        if m > base:
+            m /= base
+            result += fraction
+        m *= m
+        fraction /= 2
+    return result + (e - 1) * log_base_2
+
+
+@njit(parallel=True, cache=True, error_model="numpy")  # type: ignore [misc]
+def _log_newton_nb(x: NDArray[np.float64], out: NDArray[np.float64], base: int) -> None:
+    inv_ln_base = 1 / math.log(base)
+    for i in prange(len(x)):
+        out[i] = _newton1(x[i], inv_ln_base)
+
+
+@njit(parallel=True, cache=True, error_model="numpy")  # type: ignore [misc]
+def _log_meow_nb(x: NDArray[np.float64], out: NDArray[np.float64], base: int) -> None:
+    log_base_2 = math.log(2) / math.log(base)
+    for i in prange(len(x)):
+        out[i] = _meow1(x[i], base, log_base_2)
+
+
+def log_newton_nb(
+    base: int, x: NDArray[np.float64], out: NDArray[np.float64] | None = None
+) -> NDArray[np.float64]:
+    x = np.ascontiguousarray(x, np.float64)
+    if out is None:
+        out = np.empty_like(x)
+    _log_newton_nb(x.reshape(-1), out.reshape(-1), base)
+    return out
+
+
+def log_meow_nb(
+    base: int, x: NDArray[np.float64], out: NDArray[np.float64] | None = None
+) -> NDArray[np.float64]:
+    x = np.ascontiguousarray(x, np.float64)
+    if out is None:
+        out = np.empty_like(x)
+    _log_meow_nb(x.reshape(-1), out.reshape(-1), base)
+    return out
+
+
+def full_range(n: int, seed: int = 0) -> NDArray[np.float64]:
+    """
+    Positive finite doubles with uniformly random bit patterns,
+    so each binade is equally likely, subnormals included (1 in 2046).
+    """
+    rng = np.random.default_rng(seed)
+    bits = rng.integers(1, np.float64(np.finfo(np.float64).max).view(np.int64), n)
+    return bits.view(np.float64)  # type: ignore [no-any-return]
+
+
+def ulp_error(actual: NDArray[np.float64], expected: NDArray[np.float64]) -> float:
+    """Largest error, in units of the last place of the expected value."""
+    worst = 0.0
+    for i in range(0, len(actual), CHUNK):  # without array-sized temporaries
+        a, e = actual[i : i + CHUNK], expected[i : i + CHUNK]
+        worst = max(worst, float(np.max(np.abs(a - e) / np.spacing(np.abs(e)))))
+    return worst
+
+
+def libm_log(
+    base: int, x: NDArray[np.float64], out: NDArray[np.float64] | None = None
+) -> NDArray[np.float64]:
+    if base == 10:
+        return np.log10(x, out=out)  # type: ignore [no-any-return]
+    if base == 2:
+        return np.log2(x, out=out)  # type: ignore [no-any-return]
+    out = np.log(x, out=out)
+    out /= math.log(base)
+    return out
+
+
+def main(n: int = 100_000_000, base: int = 10, budget: float = 4.0) -> None:
+    """
+    Times each log on n full-range doubles, reporting ns/element, and both
+    max ULP and max absolute error against np.log (or np.log10, np.log2).
+    A method "wins" if it is both faster than libm and within budget ULPs.
+    """
+    x = full_range(n)
+    x[:5] = [5e-324, 2.2250738585072014e-308, 1 - 2**-53, 1.0, 1 + 2**-52]
+    out = np.empty_like(x)
+    expected = libm_log(base, x)
+    methods: dict[str, LogFn] = {
+        "libm": lambda a: libm_log(base, a, out),
+        "newton np": lambda a: log_newton_np(base, a, out),
+        "newton numba": lambda a: log_newton_nb(base, a, out),
+        "meow np": lambda a: log_meow_np(base, a, out),
+        "meow numba": lambda a: log_meow_nb(base, a, out),
+    }
+    log_newton_nb(base, x[:10])  # compile before timing
+    log_meow_nb(base, x[:10])
+    print(f"{n:,} elements, budget {budget} ULP")
+    print(f"{'':>13}  {'ns/elt':>7}  {'max ULP':>10}  {'max abs':>9}  wins")
+    t0 = perf_counter()
+    libm_log(base, x, out)
+    libm = perf_counter() - t0  # the fixed baseline, timed once
+    for name, fn in methods.items():
+        t0 = perf_counter()
+        fn(x)
+        elapsed = perf_counter() - t0
+        ulp = ulp_error(out, expected)
+        abs_err = max(
+            np.max(np.abs(out[i : i + CHUNK] - expected[i : i + CHUNK]))
+            for i in range(0, n, CHUNK)
+        )
+        wins = name != "libm" and elapsed < libm and ulp <= budget
+        print(
+            f"{name:>13}  {1e9 * elapsed / n:7.2f}  {ulp:10.3g}  {abs_err:9.2g}  {wins}"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
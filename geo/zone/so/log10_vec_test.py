@@ -0,0 +1,50 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+import numpy as np
+
+from geo.zone.so.log10_vec import (
+    full_range,
+    libm_log,
+    log_meow_nb,
+    log_meow_np,
+    log_newton_nb,
+    log_newton_np,
+    ulp_error,
+)
+
+SPECIALS = np.array([0.0, -0.0, -1.0, np.inf, -np.inf, np.nan, 5e-324, 1.0])
+
+
+class LogVecTest(unittest.TestCase):
+    def setUp(self) -> None:
+        near_one = 1 + np.linspace(-1e-3, 1e-3, 1001)
+        self.x = np.concatenate((full_range(100_000), near_one))
+
+    def test_newton(self) -> None:
+        for base in (2, 10):
+            expected = libm_log(base, self.x)
+            for log in (log_newton_np, log_newton_nb):
+                self.assertLessEqual(ulp_error(log(base, self.x), expected), 4)
+
+    def test_meow(self) -> None:
+        for base in (2, 10):
+            expected = libm_log(base, self.x)
+            for log in (log_meow_np, log_meow_nb):
+                self.assertLess(np.max(np.abs(log(base, self.x) - expected)), 1e-12)
+
+    def test_specials(self) -> None:
+        with np.errstate(all="ignore"):
+            expected = np.log10(SPECIALS[:-2])
+        for log in (log_newton_np, log_newton_nb, log_meow_np, log_meow_nb):
+            actual = log(10, SPECIALS)
+            np.testing.assert_array_equal(expected, actual[:-2])
+            self.assertAlmostEqual(-323.306, actual[-2], places=3)
+            self.assertEqual(0.0, actual[-1])
+
+    def test_shape(self) -> None:
+        x = np.arange(1.0, 13.0).reshape(3, 4)
+        for log in (log_newton_np, log_newton_nb):
+            out = np.empty_like(x)
+            self.assertIs(out, log(10, x, out))
+            np.testing.assert_allclose(np.log10(x), out, rtol=1e-15)
@@ -0,0 +1,191 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Order statistics over a changing multiset, for streaming medians.
+
+Where sorted_median finds the median of two static sorted lists,
+here values come and go. A Fenwick (binary indexed) tree holds a count
+for each distinct key, so insert, delete, rank, and k-th smallest each
+cost O(log U) for a universe of U keys, with no rebalancing.
+The keys must be known up front, so we compress them to indices 0 .. U-1.
+For latency samples that's cheap: take np.unique() of the data,
+or every integer microsecond in the range of interest.
+"""
+
+from numba import njit
+from numpy.typing import NDArray
+import numpy as np
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _add(tree: NDArray[np.int64], i: int, delta: int) -> None:
+    """Adds delta to the count of key index i."""
+    i += 1
+    while i < len(tree):
+        tree[i] += delta
+        i += i & -i
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _prefix(tree: NDArray[np.int64], i: int) -> int:
+    """Total count of key indices below i."""
+    total = 0
+    while i > 0:
+        total += tree[i]
+        i -= i & -i
+    return total
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _kth(tree: NDArray[np.int64], k: int) -> int:
+    """Key index of the k-th smallest element, counting from zero."""
+    pos = 0
+    step = 1
+    while step * 2 < len(tree):
+        step *= 2
+    # Descend by binary lifting, skipping whole subtrees of at most k elements.
+    while step:
+        if pos + step < len(tree) and tree[pos + step] <= k:
+            pos += step
+            k -= tree[pos]
+        step //= 2
+    return pos
+
+
+@njit(cache=True)  # type: ignore [misc]
+def _rolling_median(
+    tree: NDArray[np.int64],
+    keys: NDArray[np.float64],
+    idx: NDArray[np.int64],
+    window: int,
+) -> NDArray[np.float64]:
+    out = np.empty(len(idx) - window + 1, np.float64)
+    for i in range(window - 1):
+        _add(tree, idx[i], 1)
+    lo, hi = (window - 1) // 2, window // 2
+    for j in range(len(out)):
+        _add(tree, idx[j + window - 1], 1)
+        out[j] = (keys[_kth(tree, lo)] + keys[_kth(tree, hi)]) / 2
+        _add(tree, idx[j], -1)
+    return out
+
+
+def _build(counts: NDArray[np.int64]) -> NDArray[np.int64]:
+    """Fenwick tree from per-key counts, in O(U) vectorized operations."""
+    cum = np.concatenate(([0], np.cumsum(counts)))
+    i = np.arange(1, len(counts) + 1)
+    return np.concatenate(([0], cum[i] - cum[i - (i & -i)]))
+
+
+class OrderStatisticTree:
+    """A multiset of values drawn from a fixed universe of keys."""
+
+    def __init__(
+        self,
+        keys: NDArray[np.floating] | NDArray[np.integer],
+        counts: NDArray[np.integer] | None = None,
+    ) -> None:
+        """Keys need not be sorted nor distinct, unless we're given their counts."""
+        if counts is None:
+            keys = np.unique(keys)
+            counts = np.zeros(len(keys), np.int64)
+        assert len(keys) == len(counts), (len(keys), len(counts))
+        assert np.all(np.diff(keys) > 0), "distinct sorted keys, please"
+        self.keys = keys
+        # Per key, so count() needn't walk the tree.
+        self.counts = counts.astype(np.int64)
+        self.tree = _build(self.counts)
+        self.n = int(counts.sum())
+
+    @classmethod
+    def from_sorted(
+        cls, values: NDArray[np.floating] | NDArray[np.integer]
+    ) -> "OrderStatisticTree":
+        """Bulk-loads sorted values, taking the universe to be just those values."""
+        assert np.all(np.diff(values) >= 0), "sorted values, please"
+        # Runs of equal values are contiguous, so their starts give the counts.
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        return cls(values[starts], np.diff(np.append(starts, len(values))))
+
+    def _index(self, x: float) -> int:
+        i = int(np.searchsorted(self.keys, x))
+        if i == len(self.keys) or self.keys[i] != x:
+            raise KeyError(x)
+        return i
+
+    def __len__(self) -> int:
+        return self.n
+
+    def insert(self, x: float, count: int = 1) -> None:
+        i = self._index(x)
+        _add(self.tree, i, count)
+        self.counts[i] += count
+        self.n += count
+
+    def delete(self, x: float, count: int = 1) -> None:
+        i = self._index(x)
+        if self.counts[i] < count:
+            raise KeyError(x)
+        _add(self.tree, i, -count)
+        self.counts[i] -= count
+        self.n -= count
+
+    def _counts(
+        self, values: NDArray[np.floating] | NDArray[np.integer]
+    ) -> NDArray[np.int64]:
+        if len(self.keys) == 0:
+            if len(values):
+                raise KeyError(values[0])
+            return np.zeros(0, np.int64)
+        i = np.searchsorted(self.keys, values)
+        unknown = (i == len(self.keys)) | (self.keys[i % len(self.keys)] != values)
+        if np.any(unknown):
+            raise KeyError(values[np.argmax(unknown)])
+        return np.bincount(i, minlength=len(self.keys))
+
+    def insert_many(self, values: NDArray[np.floating] | NDArray[np.integer]) -> None:
+        """
+        Inserts a batch of m values in O(U + m log U), vectorized.
+        The tree is linear in the counts, so we simply add a tree of the batch.
+        """
+        counts = self._counts(values)
+        self.tree += _build(counts)
+        self.counts += counts
+        self.n += len(values)
+
+    def delete_many(self, values: NDArray[np.floating] | NDArray[np.integer]) -> None:
+        counts = self._counts(values)
+        excess = counts > self.counts
+        if np.any(excess):
+            raise KeyError(self.keys[np.argmax(excess)])
+        self.tree -= _build(counts)
+        self.counts -= counts
+        self.n -= len(values)
+
+    def count(self, x: float) -> int:
+        return int(self.counts[self._index(x)])
+
+    def rank(self, x: float) -> int:
+        """Number of elements less than x."""
+        return int(_prefix(self.tree, int(np.searchsorted(self.keys, x))))
+
+    def kth(self, k: int) -> float:
+        """The k-th smallest element, counting from zero."""
+        if not 0 <= k < self.n:
+            raise IndexError(k)
+        return self.keys[_kth(self.tree, k)].item()  # type: ignore [no-any-return]
+
+    def median(self) -> float:
+        lo, hi = (self.n - 1) // 2, self.n // 2
+        return (self.kth(lo) + self.kth(hi)) / 2
+
+
+def rolling_median(
+    samples: NDArray[np.floating] | NDArray[np.integer], window: int
+) -> NDArray[np.float64]:
+    """Median of each window of consecutive samples, in O(n log U) time."""
+    assert 0 < window <= len(samples), (window, len(samples))
+    keys, idx = np.unique(samples, return_inverse=True)
+    tree = np.zeros(len(keys) + 1, np.int64)
+    return _rolling_median(  # type: ignore [no-any-return]
+        tree, keys.astype(np.float64), idx.astype(np.int64), window
+    )
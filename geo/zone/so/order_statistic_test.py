@@ -0,0 +1,72 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+from hypothesis import given
+from hypothesis import strategies as st
+import numpy as np
+import pandas as pd
+
+from geo.zone.so.order_statistic import OrderStatisticTree, rolling_median
+from geo.zone.so.sorted_median import median_sorted
+
+
+class OrderStatisticTreeTest(unittest.TestCase):
+    def test_insert_delete(self) -> None:
+        t = OrderStatisticTree(np.array([5, 1, 3, 9, 7, 3]))
+        self.assertEqual(0, len(t))
+        for x in [7, 3, 3, 9]:
+            t.insert(x)
+        self.assertEqual(4, len(t))
+        self.assertEqual([3, 3, 7, 9], [t.kth(k) for k in range(4)])
+        self.assertEqual(5.0, t.median())
+        self.assertEqual(2, t.count(3))
+        self.assertEqual(2, t.rank(5))
+        self.assertEqual(2, t.rank(7))
+
+        t.delete(3)
+        self.assertEqual(7, t.median())
+        with self.assertRaises(KeyError):
+            t.delete(1)
+        with self.assertRaises(KeyError):
+            t.insert(4)
+        with self.assertRaises(IndexError):
+            t.kth(3)
+
+    def test_bulk(self) -> None:
+        values = np.sort(np.random.default_rng(0).integers(0, 50, 1001))
+        t = OrderStatisticTree.from_sorted(values)
+        self.assertEqual(len(values), len(t))
+        self.assertEqual(np.median(values), t.median())
+        self.assertEqual(values[123], t.kth(123))
+
+        t.insert_many(values[::2])
+        t.delete_many(values[1::2])
+        self.assertEqual(np.median(values[::2]), t.median())
+        with self.assertRaises(KeyError):
+            t.delete_many(np.repeat(values[:1], t.count(values[0]) + 1))
+        with self.assertRaises(KeyError):
+            t.insert_many(np.array([1.5]))
+
+    def test_empty_universe(self) -> None:
+        t = OrderStatisticTree(np.array([], np.int64))
+        t.insert_many(np.array([], np.int64))
+        self.assertEqual(0, len(t))
+        with self.assertRaises(KeyError):
+            t.insert_many(np.array([1]))
+        with self.assertRaises(KeyError):
+            t.insert(1)
+
+    @given(st.lists(st.integers(-1_000, 1_000), min_size=1, max_size=60))
+    def test_median_matches_sorted(self, nums: list[int]) -> None:
+        t = OrderStatisticTree(np.array(nums))
+        for x in nums:
+            t.insert(x)
+        self.assertEqual(median_sorted(sorted(nums)), t.median())
+
+    def test_rolling_median(self) -> None:
+        samples = np.random.default_rng(1).exponential(1.0, 500).round(2)
+        for window in [1, 2, 7, 64, 500]:
+            expected = pd.Series(samples).rolling(window).median().to_numpy()
+            np.testing.assert_allclose(
+                expected[window - 1 :], rolling_median(samples, window)
+            )
@@ -0,0 +1,276 @@
+#! /usr/bin/env python
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Compares query engines over a taxi-like Parquet dataset bigger than RAM.
+
+polars_vs_pandas.py measures a single eager load, which stops telling us
+anything once the data no longer fits. Here each engine runs the same
+fixed suite of queries, streaming over the files as best it can:
+
+  - pandas, with pyarrow dtypes, a file at a time, combining partial results,
+  - polars, lazy, with its streaming engine,
+  - DuckDB, which spills to disk when it must.
+
+Every (engine, query) pair runs in a fresh process, so that its peak RSS
+is its own. We record wall time, peak RSS, and input rows/s, in a table.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+import datetime as dt
+import resource
+
+import duckdb
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+import typer
+
+DATA_DIR = Path("/tmp/query_engines")
+NUM_ZONES = 265
+BOROUGHS = ["Bronx", "Brooklyn", "EWR", "Manhattan", "Queens", "Staten Island"]
+PAYMENTS = ["card", "cash", "no charge", "dispute"]
+QUERIES = ("group_by", "join", "window", "filter")
+
+
+def _trips(rng: np.random.Generator, n: int) -> pa.Table:
+    start = np.datetime64("2024-01-01T00:00:00", "us")
+    distance = rng.exponential(3.0, n)
+    fare = 3 + 2.5 * distance + rng.normal(0, 1, n).clip(-2, None)
+    return pa.table(
+        {
+            "pickup": start + rng.integers(0, 366 * 86_400_000_000, n).astype("m8[us]"),
+            "vendor_id": rng.integers(1, 3, n, dtype=np.int8),
+            "pu_zone": rng.integers(1, NUM_ZONES + 1, n, dtype=np.int16),
+            "do_zone": rng.integers(1, NUM_ZONES + 1, n, dtype=np.int16),
+            "passengers": rng.integers(1, 7, n, dtype=np.int8),
+            "distance": distance,
+            "fare": fare,
+            "tip": fare * rng.beta(1, 6, n),
+            "payment": pa.array(PAYMENTS).take(rng.integers(0, len(PAYMENTS), n)),
+        }
+    )
+
+
+def generate(
+    data: Path = DATA_DIR,
+    rows: int = 300_000_000,
+    rows_per_file: int = 10_000_000,
+    seed: int = 0,
+) -> None:
+    """
+    Writes a trips/ directory of Parquet files, and a small zones.parquet.
+    In memory, the trips take about 40 bytes per row, so the default
+    300 M rows is 12 GB, bigger than most laptops' RAM.
+    """
+    rng = np.random.default_rng(seed)
+    (data / "trips").mkdir(parents=True, exist_ok=True)
+    for f in (data / "trips").glob("*.parquet"):
+        f.unlink()
+    zone_ids = np.arange(1, NUM_ZONES + 1, dtype=np.int16)
+    zones = pa.table(
+        {
+            "zone_id": zone_ids,
+            "borough": pa.array(BOROUGHS).take(zone_ids % len(BOROUGHS)),
+            "zone": [f"zone {i}" for i in zone_ids],
+        }
+    )
+    pq.write_table(zones, data / "zones.parquet")
+    for k, i in enumerate(range(0, rows, rows_per_file)):
+        n = min(rows_per_file, rows - i)
+        path = data / "trips" / f"{k:04d}.parquet"
+        with pq.ParquetWriter(path, _trips(rng, 1).schema) as writer:
+            for j in range(0, n, 1_000_000):
+                writer.write_table(_trips(rng, min(1_000_000, n - j)))
+
+
+def num_rows(data: Path = DATA_DIR) -> int:
+    files = sorted((data / "trips").glob("*.parquet"))
+    return sum(pq.ParquetFile(f).metadata.num_rows for f in files)
+
+
+# pandas, with pyarrow dtypes, a file at a time
+
+
+def _read(f: Path, columns: list[str], **kw: object) -> pd.DataFrame:
+    return pd.read_parquet(f, columns=columns, dtype_backend="pyarrow", **kw)
+
+
+def _top3(df: pd.DataFrame) -> pd.DataFrame:
+    return (
+        df.sort_values("fare", ascending=False, kind="stable")
+        .groupby("pu_zone")
+        .head(3)
+    )
+
+
+def pandas_query(query: str, data: Path) -> pd.DataFrame:
+    """
+    Pandas has no out-of-core engine, so we do by hand what the others
+    do for us: reduce each file to a small partial result, then combine
+    the partials. Only one file's rows are in memory at a time.
+    """
+    files = sorted((data / "trips").glob("*.parquet"))
+    parts = []
+    if query == "group_by":
+        for f in files:
+            df = _read(f, ["pu_zone", "fare", "tip"])
+            parts.append(
+                df.groupby("pu_zone").agg(
+                    n=("fare", "size"), fare=("fare", "sum"), tip=("tip", "sum")
+                )
+            )
+        out = pd.concat(parts).groupby(level=0).sum()
+        out["fare"] /= out["n"]
+        return out.reset_index()
+    if query == "join":
+        zones = pd.read_parquet(data / "zones.parquet", dtype_backend="pyarrow")
+        for f in files:
+            df = _read(f, ["pu_zone", "fare"]).merge(
+                zones, left_on="pu_zone", right_on="zone_id"
+            )
+            parts.append(df.groupby("borough")["fare"].sum())
+        return pd.concat(parts).groupby(level=0).sum().reset_index()
+    if query == "window":
+        parts = [_top3(_read(f, ["pu_zone", "pickup", "fare"])) for f in files]
+        return _top3(pd.concat(parts)).reset_index(drop=True)
+    if query == "filter":
+        # pyarrow evaluates the first conjunct while reading, skipping row groups.
+        for f in files:
+            df = _read(
+                f,
+                ["pickup", "pu_zone", "do_zone", "distance", "fare", "tip"],
+                filters=[("distance", ">", 30.0)],
+            )
+            parts.append(df[df.tip > 0.2 * df.fare])
+        return pd.concat(parts).reset_index(drop=True)
+    raise KeyError(query)
+
+
+# polars, lazy and streaming
+
+
+def polars_query(query: str, data: Path) -> pd.DataFrame:
+    trips = pl.scan_parquet(data / "trips" / "*.parquet")
+    if query == "group_by":
+        lf = trips.group_by("pu_zone").agg(
+            n=pl.len(), fare=pl.col("fare").mean(), tip=pl.col("tip").sum()
+        )
+    elif query == "join":
+        zones = pl.scan_parquet(data / "zones.parquet")
+        lf = (
+            trips.join(zones, left_on="pu_zone", right_on="zone_id")
+            .group_by("borough")
+            .agg(pl.col("fare").sum())
+        )
+    elif query == "window":
+        lf = trips.select("pu_zone", "pickup", "fare").filter(
+            pl.col("fare").rank("ordinal", descending=True).over("pu_zone") <= 3
+        )
+    elif query == "filter":
+        lf = trips.filter(
+            (pl.col("distance") > 30) & (pl.col("tip") > 0.2 * pl.col("fare"))
+        ).select("pickup", "pu_zone", "do_zone", "distance", "fare", "tip")
+    else:
+        raise KeyError(query)
+    return lf.collect(engine="streaming").to_pandas()
+
+
+# DuckDB
+
+DUCKDB_SQL = {
+    "group_by": """
+        SELECT pu_zone, COUNT(*) AS n, AVG(fare) AS fare, SUM(tip) AS tip
+        FROM trips GROUP BY pu_zone
+    """,
+    "join": """
+        SELECT borough, SUM(fare) AS fare
+        FROM trips JOIN zones ON pu_zone = zone_id GROUP BY borough
+    """,
+    "window": """
+        SELECT pu_zone, pickup, fare FROM trips
+        QUALIFY row_number() OVER (PARTITION BY pu_zone ORDER BY fare DESC) <= 3
+    """,
+    "filter": """
+        SELECT pickup, pu_zone, do_zone, distance, fare, tip FROM trips
+        WHERE distance > 30 AND tip > 0.2 * fare
+    """,
+}
+
+
+def duckdb_query(query: str, data: Path) -> pd.DataFrame:
+    con = duckdb.connect(config={"temp_directory": str(data / "duckdb.tmp")})
+    con.execute("SET enable_progress_bar = false")
+    con.execute(f"CREATE VIEW trips AS FROM read_parquet('{data}/trips/*.parquet')")
+    con.execute(f"CREATE VIEW zones AS FROM read_parquet('{data}/zones.parquet')")
+    out = con.execute(DUCKDB_SQL[query]).to_arrow_table().to_pandas()
+    con.close()
+    return out
+
+
+ENGINES: dict[str, Callable[[str, Path], pd.DataFrame]] = {
+    "pandas": pandas_query,
+    "polars": polars_query,
+    "duckdb": duckdb_query,
+}
+
+
+def _run(engine: str, query: str, data: Path) -> tuple[float, int, int]:
+    """In a fresh process, returns elapsed seconds, peak RSS bytes, and result rows."""
+    t0 = perf_counter()
+    out = ENGINES[engine](query, data)
+    elapsed = perf_counter() - t0
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, len(out)
+
+
+def benchmark(data: Path = DATA_DIR) -> pd.DataFrame:
+    rows = num_rows(data)
+    results = []
+    for query in QUERIES:
+        for engine in ENGINES:
+            # A fresh process per run; "spawn" so it doesn't inherit our RSS.
+            with ProcessPoolExecutor(1, get_context("spawn")) as pool:
+                try:
+                    secs, rss, out_rows = pool.submit(
+                        _run, engine, query, data
+                    ).result()
+                    status = "ok"
+                except (BrokenProcessPool, MemoryError) as e:
+                    secs, rss, out_rows, status = np.nan, 0, 0, type(e).__name__
+            results.append(
+                {
+                    "query": query,
+                    "engine": engine,
+                    "seconds": secs,
+                    "peak_rss_mib": rss / 2**20,
+                    "rows_per_sec": rows / secs,
+                    "result_rows": out_rows,
+                    "status": status,
+                }
+            )
+            print(results[-1])
+    return pd.DataFrame(results)
+
+
+def main(
+    rows: int = 300_000_000,
+    data: Path = DATA_DIR,
+    out: Path = DATA_DIR / "results.parquet",
+) -> None:
+    if not (data / "trips").exists() or num_rows(data) != rows:
+        generate(data, rows)
+    print(f"{rows:,} rows, {dt.datetime.now(dt.UTC):%Y-%m-%d %H:%M}Z")
+    df = benchmark(data)
+    df.to_parquet(out, index=False)
+    print(df.to_string(index=False, float_format="{:,.1f}".format))
+    print(out)
+
+
+if __name__ == "__main__":
+    typer.run(main)
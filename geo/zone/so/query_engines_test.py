@@ -0,0 +1,38 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+import pandas as pd
+
+from geo.zone.so.query_engines import ENGINES, QUERIES, generate, num_rows
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Common dtypes, and a common row order."""
+    for c in df.columns:
+        if c == "borough":
+            df[c] = df[c].astype(str)
+        elif c == "pickup":
+            df[c] = pd.to_datetime(df[c]).astype("datetime64[us]")
+        else:
+            df[c] = df[c].astype("float64")
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+class QueryEnginesTest(unittest.TestCase):
+    def test_engines_agree(self) -> None:
+        with TemporaryDirectory() as tmp:
+            data = Path(tmp)
+            generate(data, rows=250_000, rows_per_file=100_000)
+            self.assertEqual(3, len(list((data / "trips").glob("*.parquet"))))
+            self.assertEqual(250_000, num_rows(data))
+            for query in QUERIES:
+                expected = _canonical(ENGINES["duckdb"](query, data))
+                self.assertGreater(len(expected), 0)
+                for engine in ("pandas", "polars"):
+                    pd.testing.assert_frame_equal(
+                        expected,
+                        _canonical(ENGINES[engine](query, data)),
+                        check_like=True,
+                    )
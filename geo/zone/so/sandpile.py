@@ -5,8 +5,9 @@ from pathlib import Path
 from time import time
 from typing import Any
 
-from numba import njit
+from numba import njit, prange
 from numpy.typing import NDArray
+from scipy.fft import dstn, idstn
 import matplotlib as mp
 import matplotlib.pyplot as plt
 import numpy as np
@@ -41,6 +42,170 @@ def topple(n: NDArray[np.float64]) -> NDArray[np.float64]:
     return p[1:-1, 1:-1]
 
 
+@njit(cache=True)  # type: ignore [misc]
+def _topple_tile(h: NDArray[np.int64], ti: int, tj: int, size: int) -> tuple[int, int]:
+    """
+    Stabilizes one tile, using a worklist of its unstable cells.
+    A cell with 4 k grains topples k times at once. Grains that cross the
+    tile's edge land in the neighboring tile, and grains that cross the
+    grid's edge fall into the sink. Returns (topplings, edges crossed),
+    with bits 1, 2, 4, 8 for the north, south, west, and east edges.
+    """
+    n, m = h.shape
+    r0, c0 = ti * size, tj * size
+    r1, c1 = min(n, r0 + size), min(m, c0 + size)
+    w = c1 - c0
+    stack = np.empty((r1 - r0) * w, np.int64)
+    queued = np.zeros((r1 - r0) * w, np.bool_)
+    top = 0
+    for i in range(r0, r1):
+        for j in range(c0, c1):
+            if h[i, j] >= 4:
+                stack[top] = (i - r0) * w + (j - c0)
+                queued[stack[top]] = True
+                top += 1
+    count = crossed = 0
+    while top:
+        top -= 1
+        cell = stack[top]
+        queued[cell] = False
+        i, j = r0 + cell // w, c0 + cell % w
+        k = h[i, j] // 4
+        h[i, j] -= 4 * k
+        count += k
+        for di, dj, edge in ((-1, 0, 1), (1, 0, 2), (0, -1, 4), (0, 1, 8)):
+            a, b = i + di, j + dj
+            if not (0 <= a < n and 0 <= b < m):
+                continue  # the sink
+            h[a, b] += k
+            if not (r0 <= a < r1 and c0 <= b < c1):
+                crossed |= edge
+                continue
+            nbr = (a - r0) * w + (b - c0)
+            if h[a, b] >= 4 and not queued[nbr]:
+                queued[nbr] = True
+                stack[top] = nbr
+                top += 1
+    return count, crossed
+
+
+@njit(parallel=True, cache=True)  # type: ignore [misc]
+def _topple_tiles(h: NDArray[np.int64], size: int, dirty: NDArray[np.bool_]) -> int:
+    """
+    Stabilizes each dirty tile until none remain. Tiles get one of four
+    colors, by the parity of their row and column, and we run one color at
+    a time, in parallel. A tile writes grains straight into its idle
+    neighbors' edge cells, its halo, and marks them dirty for the next phase.
+    Two colors, a checkerboard, would not do: diagonal neighbors would run
+    together, and both add to the cells beside their shared corner.
+    With four, same-colored tiles lie two apart, so their halos are disjoint.
+    """
+    tn, tm = dirty.shape
+    total = 0
+    while dirty.any():
+        for color in range(4):
+            todo = np.array(
+                [
+                    t
+                    for t in range(tn * tm)
+                    if dirty.flat[t] and (t // tm % 2) * 2 + t % tm % 2 == color
+                ]
+            )
+            counts = np.zeros(len(todo), np.int64)
+            crossed = np.zeros(len(todo), np.int64)
+            for q in prange(len(todo)):
+                ti, tj = divmod(todo[q], tm)
+                dirty[ti, tj] = False
+                counts[q], crossed[q] = _topple_tile(h, ti, tj, size)
+            for q in range(len(todo)):
+                ti, tj = divmod(todo[q], tm)
+                total += counts[q]
+                if crossed[q] & 1:
+                    dirty[ti - 1, tj] = True
+                if crossed[q] & 2:
+                    dirty[ti + 1, tj] = True
+                if crossed[q] & 4:
+                    dirty[ti, tj - 1] = True
+                if crossed[q] & 8:
+                    dirty[ti, tj + 1] = True
+    return total
+
+
+def _laplacian(v: NDArray[np.int64]) -> NDArray[np.int64]:
+    """Net grains each cell gains when each cell x topples v[x] times."""
+    d = -4 * v
+    d[1:] += v[:-1]
+    d[:-1] += v[1:]
+    d[:, 1:] += v[:, :-1]
+    d[:, :-1] += v[:, 1:]
+    return d
+
+
+def odometer_lower_bound(grains: NDArray[np.int64]) -> NDArray[np.int64]:
+    """
+    A lower bound on how many times each cell topples, during stabilization.
+
+    The odometer u is the least nonnegative integer solution of
+    grains + laplacian(u) <= 3. The real solution w of
+    grains + laplacian(w) = 3 is smaller (by the maximum principle),
+    and a sine transform gives it in O(n log n). As u is an integer, ceil(w) <= u.
+    So we may apply ceil(w) all at once, and topple the rest legally,
+    and we arrive at exactly the stable configuration.
+    Typically that leaves a fifth of the work.
+    """
+    n, m = grains.shape
+    eig = (
+        2 * np.cos(np.pi * np.arange(1, n + 1) / (n + 1))[:, None]
+        + 2 * np.cos(np.pi * np.arange(1, m + 1) / (m + 1))[None, :]
+        - 4
+    )
+    w = idstn(dstn(3.0 - grains, type=1) / eig, type=1)
+    # Float error is far below 1e-3, and shaving that much can't cost us a whole topple.
+    return np.maximum(0, np.ceil(w - 1e-3)).astype(np.int64)
+
+
+class Sandpile:
+    """
+    An abelian sandpile on a grid whose edges drain into a sink.
+    Stabilization touches only tiles that hold unstable cells,
+    and within a tile, only the cells on its worklist.
+    """
+
+    def __init__(self, grains: NDArray[np.integer], tile: int = 64) -> None:
+        assert tile >= 2, tile  # so a tile's north and south halos are distinct
+        self.h = np.array(grains, np.int64)
+        assert self.h.ndim == 2 and self.h.min() >= 0, self.h.shape
+        self.tile = tile
+        n, m = self.h.shape
+        self.dirty = np.ones((-(-n // tile), -(-m // tile)), np.bool_)
+        self.topples = 0
+
+    def drop(
+        self,
+        rows: NDArray[np.integer],
+        cols: NDArray[np.integer],
+        grains: int | NDArray[np.integer] = 1,
+    ) -> None:
+        """Adds grains at each (row, col). A point may repeat."""
+        np.add.at(self.h, (rows, cols), grains)
+        self.dirty[np.asarray(rows) // self.tile, np.asarray(cols) // self.tile] = True
+
+    def stabilize(self, presolve: bool = True) -> NDArray[np.int64]:
+        if presolve:
+            v = odometer_lower_bound(self.h)
+            self.h += _laplacian(v)
+            self.topples += int(v.sum())
+            self.dirty[:] = True
+        self.topples += _topple_tiles(self.h, self.tile, self.dirty)
+        return self.h
+
+
+def identity(m: int, n: int, tile: int = 64) -> NDArray[np.int64]:
+    """The identity of the sandpile group: stab(6 - stab(6)), as in picard()."""
+    six = np.full((m, n), 6, np.int64)
+    return Sandpile(six - Sandpile(six, tile).stabilize(), tile).stabilize()
+
+
 def picard(m: int, n: int) -> np.ndarray[Any, np.dtype[np.float64]]:
     p1 = 6 * np.ones((m, n))
     p1 = topple(p1)
@@ -51,10 +216,10 @@ def picard(m: int, n: int) -> np.ndarray[Any, np.dtype[np.float64]]:
 
 
 def main(m: int = 300, n: int = 300) -> None:
-    picard(4, 4)  # warmup
+    identity(4, 4)  # warmup
 
     t0 = time()
-    p_i = picard(m, n)
+    p_i = identity(m, n)
     print(f"elapsed: {time() - t0:.3f} sec")
 
     plt.figure()
@@ -0,0 +1,65 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+from numpy.typing import NDArray
+import numpy as np
+
+from geo.zone.so.sandpile import Sandpile, _topple_tile, identity, odometer_lower_bound
+
+
+def sweep(h: NDArray[np.integer]) -> NDArray[np.int64]:
+    """Topples every unstable cell at once, until there are none, much as topple() does."""
+    h = np.pad(h.astype(np.int64), 1)
+    while (h[1:-1, 1:-1] > 3).any():
+        k = h // 4
+        k[[0, -1]] = k[:, [0, -1]] = 0  # the sink never topples
+        h += (
+            np.roll(k, 1, 0)
+            + np.roll(k, -1, 0)
+            + np.roll(k, 1, 1)
+            + np.roll(k, -1, 1)
+            - 4 * k
+        )
+    return h[1:-1, 1:-1]
+
+
+class SandpileTest(unittest.TestCase):
+    def test_identity(self) -> None:
+        for m, n in [(5, 5), (20, 13), (40, 40)]:
+            e = identity(m, n, tile=8)
+            six = np.full((m, n), 6)
+            np.testing.assert_array_equal(sweep(six - sweep(six)), e)
+            # e + e stabilizes to e.
+            np.testing.assert_array_equal(e, Sandpile(2 * e, tile=8).stabilize())
+
+    def test_presolve(self) -> None:
+        grains = np.random.default_rng(0).integers(0, 40, (50, 70))
+        legal = Sandpile(grains, tile=16)
+        legal.stabilize(presolve=False)
+        fast = Sandpile(grains, tile=16)
+        np.testing.assert_array_equal(legal.h, fast.stabilize())
+        self.assertEqual(legal.topples, fast.topples)
+        self.assertLess(0, odometer_lower_bound(grains).sum())
+
+    def test_drop(self) -> None:
+        pile = Sandpile(np.zeros((31, 31), np.int64), tile=4)
+        pile.drop(np.array([15]), np.array([15]), 1_000)
+        center = pile.stabilize().copy()
+        np.testing.assert_array_equal(center, center.T)
+        self.assertEqual(1_000, center.sum())  # none reached the edge
+
+        # Same grains, one at a time, in bulk.
+        one_by_one = Sandpile(np.zeros((31, 31), np.int64), tile=4)
+        for _ in range(10):
+            one_by_one.drop(np.full(100, 15), np.full(100, 15))
+            one_by_one.stabilize(presolve=False)
+        np.testing.assert_array_equal(center, one_by_one.h)
+
+    def test_parallel_matches_serial(self) -> None:
+        """Many small tiles, racing, against one tile that spans the grid."""
+        grains = np.random.default_rng(1).integers(0, 8, (130, 97))
+        serial = grains.astype(np.int64)
+        _topple_tile(serial, 0, 0, max(serial.shape))
+        for tile in (2, 3, 16):
+            pile = Sandpile(grains, tile=tile)
+            np.testing.assert_array_equal(serial, pile.stabilize(presolve=False))
@@ -4,11 +4,13 @@ from typing import Any
 import struct
 
 from beartype import beartype
-from beartype.typing import Iterator
+from beartype.typing import Iterable, Iterator
 from numpy import dtype
 from numpy.typing import NDArray
 import numpy as np
 
+from geo.zone.so.censor import Censor
+
 
 @beartype
 def _get_codec(s: str) -> tuple[int, int, str]:
@@ -166,3 +168,9 @@ class Article:
 
         except ValueError:
             return n
+
+    def censor_all(self, bad_words: Iterable[str]) -> int:
+        """Like censor(), for many words at once, in a single pass. Returns the number of deletions."""
+        text, n = Censor(bad_words).censor(str(self._article))
+        self._article = TombstoneString(text)
+        return n
@@ -2,10 +2,14 @@
 # based on https://codereview.stackexchange.com/questions/287745/determine-top-t-values
 # cf https://stackoverflow.com/questions/52713266/most-efficient-way-to-get-the-largest-3-elements-using-no-comparison
 from collections import Counter
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 from contextlib import contextmanager
 from functools import partial
+from heapq import nlargest
+from itertools import chain
+from pathlib import Path
 from random import shuffle
+from tempfile import TemporaryDirectory
 import unittest
 
 from beartype import beartype
@@ -56,21 +60,65 @@ def sort_k(a: NDArray[np.int_], start: int, k: int) -> None:
 def find_top_t(t: int, a: NDArray[np.int_], k: int = K) -> NDArray[np.int_]:
     assert t < K
     assert t <= len(a)
-    tombstone = a.min() - 1  # sentinel value
-    assert tombstone not in a  # true by construction
 
     if len(a) <= t:
         sort_k(a, 0, t)
     while len(a) > t:
+        # A mask, rather than a sentinel value, which might not fit the dtype.
+        alive = np.ones(len(a), np.bool_)
         for i in range(0, len(a), k):
             sort_k(a, i, k)
-            a[i + t : i + k] = tombstone
+            alive[i + t : i + k] = False
         # Now coalesce the survivors, shrinking the array of candidate answer values.
-        a = np.array(list(filter(lambda x: x != tombstone, a)))
+        a = a[alive]
 
     return a[:t]
 
 
+@beartype
+def top_t_rounds(t: int, a: NDArray[np.int_], k: int = K) -> NDArray[np.int_]:
+    """
+    Same rounds as find_top_t, but each round is a few whole-array operations:
+    view the candidates as rows of k, sort the rows, and keep the first t
+    columns. A ragged tail of fewer than k is sorted on its own, so there's
+    no padding, and no sentinel value that might overflow the dtype.
+    """
+    assert 0 < t < k
+    assert t <= len(a)
+    while len(a) > k:
+        whole = len(a) - len(a) % k
+        rows = np.sort(a[:whole].reshape(-1, k), axis=1)[:, ::-1]  # descending
+        tail = np.sort(a[whole:])[::-1]
+        a = np.concatenate((rows[:, :t].ravel(), tail[:t]))
+    return np.sort(a)[::-1][:t]
+
+
+@beartype
+def top_t(t: int, a: NDArray[np.int_]) -> NDArray[np.int_]:
+    """The t largest values, descending. One O(n) partition, then sort just those t."""
+    assert 0 < t <= len(a)
+    top = np.partition(a, len(a) - t)[-t:]
+    return np.sort(top)[::-1]
+
+
+@beartype
+def top_t_chunked(t: int, chunks: Iterable[NDArray[np.int_]]) -> NDArray[np.int_]:
+    """
+    Memory is bounded by the chunk size: we partition each chunk in turn,
+    and merge the per-chunk winners with a heap of just t entries.
+    """
+    winners = (top_t(t, c) if len(c) > t else c for c in chunks)
+    return np.array(nlargest(t, chain.from_iterable(w.tolist() for w in winners)))
+
+
+@beartype
+def top_t_npy(t: int, path: Path, chunk_size: int = 1 << 24) -> NDArray[np.int_]:
+    """top_t of a 1-D .npy file that may be bigger than RAM, read through a memmap."""
+    a = np.load(path, mmap_mode="r")
+    chunks = (np.asarray(a[i : i + chunk_size]) for i in range(0, len(a), chunk_size))
+    return top_t_chunked(t, chunks)
+
+
 T = 3
 
 _moderately_large = 2**63 - 1
@@ -142,9 +190,33 @@ class TestTopT(unittest.TestCase):
         a = np.array([0, 1, 0])  # This input vector was surfaced by hypothesis.
         self.assertEqual([1, 0, 0], find_top_t(T, a).tolist())
 
+    def test_dtype_min(self) -> None:
+        lo = np.iinfo(np.int64).min
+        a = np.array([lo, 7, lo, lo, 3, lo, 5, lo, lo, lo, lo], np.int64)
+        expected = [7, 5, 3]
+        self.assertEqual(expected, find_top_t(T, a.copy()).tolist())
+        self.assertEqual(expected, top_t_rounds(T, a.copy()).tolist())
+        self.assertEqual([7, lo], top_t_rounds(2, a[:3]).tolist())
+
     @given(st.lists(_small_integers(), min_size=T, max_size=100))
     def test_with_hypothesis(self, lst: list[int]) -> None:
         a = np.array(lst)
         xs = find_top_t(T, a.copy()).tolist()
         self.assertEqual(xs, sorted(xs, reverse=True))
         self.assertEqual(xs, sorted(a, reverse=True)[:T])
+
+    @given(st.lists(_small_integers(), min_size=T, max_size=100))
+    def test_engines_agree(self, lst: list[int]) -> None:
+        a = np.array(lst)
+        expected = sorted(lst, reverse=True)[:T]
+        self.assertEqual(expected, top_t(T, a).tolist())
+        self.assertEqual(expected, top_t_rounds(T, a.copy()).tolist())
+        self.assertEqual(expected, top_t_chunked(T, np.array_split(a, 7)).tolist())
+
+    def test_npy(self) -> None:
+        a = rng.integers(0, 1_000, 10_000)
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "a.npy"
+            np.save(path, a)
+            xs = top_t_npy(T, path, chunk_size=999).tolist()
+        self.assertEqual(sorted(a, reverse=True)[:T], xs)
@@ -0,0 +1,248 @@
+#! /usr/bin/env python
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Spreads slow_threading.py's CPU-bound workload across cores, several ways.
+
+slow_threading.py shows two counting threads taking as long as running
+them back to back, since they serialize on the GIL. Here a mix of tasks,
+pure-Python countdowns plus NumPy reductions over a big array, goes out
+to a pool of workers under each execution model:
+
+  - threads: the GIL serializes the countdowns, though NumPy releases it,
+    and on a free-threaded build nothing serializes,
+  - processes: each NumPy task pickles its slice of the array to the worker,
+  - shared_memory: processes again, but they map the array, so a task
+    is just a pair of bounds,
+  - interpreters: subinterpreters, each with its own GIL, on Python 3.14+,
+    where NumPy will import; where it won't, we record the model as unsupported.
+
+Tasks go out in chunks. Too small a chunk and dispatch overhead dominates,
+too big and the last worker to finish holds everyone up. So we measure
+each pool's round-trip overhead, and size chunks to dwarf it while still
+leaving several chunks per worker. main() records speedup for 1 .. N workers.
+"""
+
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from time import perf_counter
+import math
+import os
+import sys
+
+from numpy.typing import NDArray
+import numpy as np
+import pandas as pd
+import typer
+
+from geo.zone.so.slow_threading import count
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor  # type: ignore [attr-defined]
+except ImportError:  # before Python 3.14
+    InterpreterPoolExecutor = None
+
+# (kind, start, stop, payload): count from start, or reduce array[start:stop].
+Task = tuple[str, int, int, NDArray[np.float64] | None]
+
+_shared: NDArray[np.float64] | None = None  # each worker's view of the array
+_shm: SharedMemory | None = None  # keeps the worker's mapping alive
+
+SHARED_MODELS = ("shared_memory", "interpreters")  # they map the array
+
+
+def gil_enabled() -> bool:
+    return getattr(sys, "_is_gil_enabled", lambda: True)()  # type: ignore [no-any-return]
+
+
+def _attach(name: str, n: int) -> None:
+    """Worker initializer: maps the shared array."""
+    global _shared, _shm  # noqa: PLW0603
+    _shm = SharedMemory(name)
+    _shared = np.ndarray((n,), np.float64, _shm.buf)
+
+
+def _do(task: Task) -> float:
+    kind, start, stop, payload = task
+    if kind == "count":
+        count(start)
+        return float(start)
+    x = payload if payload is not None else _shared[start:stop]  # type: ignore [index]
+    return float(np.sin(x).sum())
+
+
+def run_chunk(chunk: Sequence[Task]) -> float:
+    return sum(map(_do, chunk))
+
+
+def _noop(_: int) -> None:
+    pass
+
+
+def task_mix(
+    counts: int = 32,
+    n: int = 2_000_000,
+    reductions: int = 32,
+    length: int = 2_000_000,
+) -> list[Task]:
+    """Interleaved countdowns of n, and reductions over slices of the given length."""
+    tasks: list[Task] = []
+    for i in range(max(counts, reductions)):
+        if i < counts:
+            tasks.append(("count", n, 0, None))
+        if i < reductions:
+            tasks.append(("sin", i * length, (i + 1) * length, None))
+    return tasks
+
+
+def chunk_size(
+    num_tasks: int, workers: int, per_task: float, overhead: float, ratio: float = 20
+) -> int:
+    """
+    Enough tasks per chunk that a chunk's work is ratio times the dispatch
+    overhead, but no more than leaves four chunks per worker, for balance.
+    """
+    want = math.ceil(ratio * overhead / per_task)
+    return max(1, min(want, num_tasks // (4 * workers)))
+
+
+def dispatch_overhead(pool: Executor, workers: int, rounds: int = 8) -> float:
+    """Seconds per task of submitting trivial tasks. This also starts the workers."""
+    list(pool.map(_noop, range(workers)))
+    t0 = perf_counter()
+    list(pool.map(_noop, range(rounds * workers)))
+    return (perf_counter() - t0) / (rounds * workers)
+
+
+@contextmanager
+def shared_array(a: NDArray[np.float64]) -> Iterator[SharedMemory]:
+    shm = SharedMemory(create=True, size=a.nbytes)
+    try:
+        np.ndarray(a.shape, a.dtype, shm.buf)[:] = a
+        yield shm
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _pool(
+    model: str, workers: int, shm: SharedMemory | None, data: NDArray[np.float64]
+) -> Executor:
+    global _shared  # noqa: PLW0603
+    if model == "threads":
+        _shared = data  # threads share it already
+        return ThreadPoolExecutor(workers)
+    # Not "fork", which hangs at exit once Numba's threading layer has started.
+    ctx = get_context("forkserver")
+    if model == "processes":
+        return ProcessPoolExecutor(workers, ctx)
+    assert shm, model
+    init = {"initializer": _attach, "initargs": (shm.name, len(data))}
+    if model == "shared_memory":
+        return ProcessPoolExecutor(workers, ctx, **init)  # type: ignore [arg-type]
+    if model == "interpreters" and InterpreterPoolExecutor is not None:
+        return InterpreterPoolExecutor(workers, **init)  # type: ignore [no-any-return]
+    raise KeyError(model)
+
+
+def models() -> list[str]:
+    available = ["threads", "processes", "shared_memory"]
+    if InterpreterPoolExecutor is not None:
+        available.append("interpreters")
+    return available
+
+
+def run(
+    model: str,
+    tasks: list[Task],
+    data: NDArray[np.float64],
+    workers: int,
+    per_task: float,
+) -> tuple[float, float, int]:
+    """Returns (total, elapsed seconds, chunk size) for one model and pool size."""
+    with ExitStack() as stack:
+        shm = (
+            stack.enter_context(shared_array(data)) if model in SHARED_MODELS else None
+        )
+        pool = stack.enter_context(_pool(model, workers, shm, data))
+        overhead = dispatch_overhead(pool, workers)
+        size = chunk_size(len(tasks), workers, per_task, overhead)
+        if model == "processes":  # ship each slice, rather than its bounds
+            tasks = [
+                (kind, a, b, data[a:b] if kind == "sin" else None)
+                for kind, a, b, _ in tasks
+            ]
+        chunks = [tasks[i : i + size] for i in range(0, len(tasks), size)]
+        t0 = perf_counter()
+        total = sum(pool.map(run_chunk, chunks))
+        return total, perf_counter() - t0, size
+
+
+def serial(tasks: list[Task], data: NDArray[np.float64]) -> tuple[float, float]:
+    """Returns (total, elapsed seconds), on the main thread."""
+    global _shared  # noqa: PLW0603
+    _shared = data
+    t0 = perf_counter()
+    total = run_chunk(tasks)
+    return total, perf_counter() - t0
+
+
+def scaling(
+    max_workers: int,
+    tasks: list[Task],
+    data: NDArray[np.float64],
+    report: Callable[[dict[str, object]], None] = print,
+) -> pd.DataFrame:
+    expected, base = serial(tasks, data)
+    base = min(base, serial(tasks, data)[1])  # the first run warms caches
+    rows: list[dict[str, object]] = []
+    for model in models():
+        for workers in range(1, max_workers + 1):
+            try:
+                total, elapsed, size = run(
+                    model, tasks, data, workers, base / len(tasks)
+                )
+                status = "ok"
+            except Exception as e:  # e.g. NumPy, refusing to load in a subinterpreter
+                if model != "interpreters":
+                    raise
+                total, elapsed, size = expected, np.nan, 0
+                status = f"unsupported: {type(e).__name__}"
+            assert math.isclose(expected, total, rel_tol=1e-9), (model, expected, total)
+            rows.append(
+                {
+                    "model": model,
+                    "workers": workers,
+                    "chunk": size,
+                    "seconds": elapsed,
+                    "speedup": base / elapsed,
+                    "efficiency": base / elapsed / workers,
+                    "status": status,
+                }
+            )
+            report(rows[-1])
+            if status != "ok":
+                break  # more workers won't help
+    return pd.DataFrame(rows)
+
+
+def main(
+    max_workers: int = os.cpu_count() or 1,
+    out: Path = Path("/tmp/work_pool.parquet"),
+) -> None:
+    tasks = task_mix()
+    data = np.random.default_rng(0).random(max(b for _, _, b, _ in tasks))
+    print(f"Python {sys.version.split()[0]}, GIL {'on' if gil_enabled() else 'off'}")
+    if InterpreterPoolExecutor is None:
+        print("subinterpreters: unavailable before Python 3.14, skipped")
+    df = scaling(max_workers, tasks, data)
+    df.to_parquet(out, index=False)
+    print(df.to_string(index=False, float_format="{:.2f}".format))
+    print(out)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,37 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+import numpy as np
+
+from geo.zone.so.work_pool import chunk_size, models, run, scaling, serial, task_mix
+
+
+class WorkPoolTest(unittest.TestCase):
+    def test_chunk_size(self) -> None:
+        self.assertEqual(1, chunk_size(100, 4, per_task=1.0, overhead=1e-4))
+        self.assertEqual(20, chunk_size(1000, 4, per_task=1e-4, overhead=1e-4))
+        # Four chunks per worker, at least.
+        self.assertEqual(6, chunk_size(100, 4, per_task=1e-6, overhead=1e-4))
+        self.assertEqual(1, chunk_size(3, 4, per_task=1e-6, overhead=1e-4))
+
+    def test_models_agree(self) -> None:
+        tasks = task_mix(counts=6, n=10_000, reductions=6, length=1_000)
+        self.assertEqual(12, len(tasks))
+        data = np.random.default_rng(0).random(6_000)
+        expected, _ = serial(tasks, data)
+        for model in models():
+            if model == "interpreters":
+                continue  # NumPy may not import there; see test_scaling()
+            for workers in (1, 2):
+                total, _, size = run(model, tasks, data, workers, per_task=1e-4)
+                self.assertAlmostEqual(expected, total)
+                self.assertGreaterEqual(size, 1)
+
+    def test_scaling(self) -> None:
+        tasks = task_mix(counts=4, n=10_000, reductions=4, length=1_000)
+        data = np.random.default_rng(0).random(4_000)
+        df = scaling(2, tasks, data, report=lambda _: None)
+        self.assertEqual(models(), list(df.model.unique()))
+        ok = df.status == "ok"
+        self.assertTrue(all(df[~ok].model == "interpreters"))
+        self.assertTrue(all(df[ok].speedup > 0))
@@ -1,57 +1,127 @@
 #! /usr/bin/env python
 # Copyright 2022 John Hanley. MIT licensed.
-from collections.abc import Generator
+from collections.abc import Generator, Sequence
+from contextlib import ExitStack
 from pathlib import Path
-from select import PIPE_BUF, select
-from subprocess import PIPE, Popen
-import datetime as dt
-import io
+from selectors import EVENT_READ, DefaultSelector, SelectorKey
+from subprocess import DEVNULL, PIPE, Popen
+from typing import NamedTuple
 import os
 
 import typer
 
+CHUNK = 64 * 1024
+
+
+class LineSplitter:
+    """
+    Accumulates bytes and hands back complete lines.
+
+    Each byte is scanned for newline just once, and bytearray deletes from
+    the front in amortized O(1), so cost is linear in the bytes fed, however
+    they happen to be chunked.
+    """
+
+    def __init__(self, max_line: int = 1024 * 1024) -> None:
+        self.buf = bytearray()
+        self.scanned = 0  # buf[:scanned] is known to be free of newlines
+        self.max_line = max_line
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self.buf += data
+        lines = []
+        start = 0
+        while (end := self.buf.find(b"\n", max(start, self.scanned))) >= 0:
+            lines.append(bytes(self.buf[start : end + 1]))
+            start = end + 1
+        del self.buf[:start]
+        self.scanned = len(self.buf)
+        if len(self.buf) >= self.max_line:
+            # Don't let a runaway child with no newlines exhaust our memory.
+            lines += self.flush()
+        return lines
+
+    def flush(self) -> list[bytes]:
+        lines = [bytes(self.buf)] if self.buf else []
+        self.buf.clear()
+        self.scanned = 0
+        return lines
+
+
+class TaggedLine(NamedTuple):
+    source: str  # which child process
+    stream: str  # "stdout" or "stderr"
+    line: str
+
+
+def _read_ready(sel: DefaultSelector, key: SelectorKey) -> list[TaggedLine]:
+    """Lines completed by whatever one readable pipe has for us."""
+    tag, name, splitter = key.data
+    try:
+        data = os.read(key.fd, CHUNK)
+    except BlockingIOError:
+        return []
+    if data:
+        lines = splitter.feed(data)
+    else:  # EOF
+        sel.unregister(key.fileobj)
+        lines = splitter.flush()
+    return [TaggedLine(tag, name, line.decode(errors="replace")) for line in lines]
+
+
+def multiplex(
+    cmds: Sequence[list[str]],
+    tags: Sequence[str] = (),
+    capture_stderr: bool = True,
+) -> Generator[TaggedLine]:
+    """
+    Runs all of the commands at once, and merges their output line by line,
+    in whatever order the lines arrive. A single thread serves every child.
+
+    We only read from the pipes when the consumer asks for more lines than
+    we have in hand. So a slow consumer applies backpressure: pipe buffers
+    fill, and the children block on write until we catch up.
+    """
+    tags = tags or [str(i) for i in range(len(cmds))]
+    assert len(tags) == len(cmds), (tags, cmds)
+    stderr = PIPE if capture_stderr else None
+    with ExitStack() as stack:
+        sel = DefaultSelector()
+        stack.callback(sel.close)
+        procs = []
+        for cmd, tag in zip(cmds, tags):
+            proc = stack.enter_context(
+                Popen(cmd, stdin=DEVNULL, stdout=PIPE, stderr=stderr)
+            )
+            procs.append(proc)
+            for name, pipe in (("stdout", proc.stdout), ("stderr", proc.stderr)):
+                if pipe:
+                    os.set_blocking(pipe.fileno(), False)
+                    sel.register(pipe, EVENT_READ, (tag, name, LineSplitter()))
+        try:
+            while sel.get_map():
+                for key, _ in sel.select():
+                    yield from _read_ready(sel, key)
+        finally:
+            # Consumer may have stopped early, so don't wait on children forever.
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.terminate()
+
 
 def streaming_subproc(cmd: list[str]) -> Generator[str]:
-    timeout = dt.timedelta(seconds=5)
-
-    with Popen(cmd, stdout=PIPE) as proc:
-        assert proc.stdout
-        stdout = io.TextIOWrapper(proc.stdout)
-        fd = stdout.fileno()
-        os.set_blocking(fd, False)
-        buf = ""
-        temp = "sentinel"
-        while proc.poll() is None and temp:
-            select([fd], [], [], timeout.total_seconds())
-            temp = stdout.read(PIPE_BUF)
-            buf += temp
-
-            start, end = 0, 0
-            while start > -1:
-                end = buf.index("\n", start) + 1
-                if end:
-                    yield buf[start:end]
-                start = end
-            buf = buf[start:]
-
-        if buf:
-            yield buf
-
-        # Now drain the last few lines from the wrapper, until EOF.
-        yield from stdout
-
-        proc.terminate()
-        proc.wait()
-
-
-def parent() -> None:
+    for tagged in multiplex([cmd], capture_stderr=False):
+        yield tagged.line
+
+
+def parent(workers: int = 3) -> None:
     repo_top = Path(__file__ + "/../../..").resolve()
     os.chdir(repo_top)
 
     cmd = ["bash", "percolate/bin/subproc_slow_output.sh", "3", "1"]
-    for line1 in streaming_subproc(cmd):
+    for source, _, line1 in multiplex([cmd] * workers):
         line = line1.rstrip("\n")
-        print(f"]] {line} [[")
+        print(f"{source}]] {line} [[")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from time import time
+import unittest
+
+from percolate.bin.subproc_streaming import LineSplitter, multiplex, streaming_subproc
+
+
+class LineSplitterTest(unittest.TestCase):
+    def test_feed(self) -> None:
+        s = LineSplitter()
+        self.assertEqual([], s.feed(b"abc"))
+        self.assertEqual([b"abcd\n"], s.feed(b"d\nef"))
+        self.assertEqual([b"efg\n", b"\n", b"h\n"], s.feed(b"g\n\nh\ni"))
+        self.assertEqual([b"i"], s.flush())
+        self.assertEqual([], s.flush())
+
+    def test_max_line(self) -> None:
+        s = LineSplitter(max_line=4)
+        self.assertEqual([b"ab\n", b"cdef"], s.feed(b"ab\ncdef"))
+        self.assertEqual([b"g\n"], s.feed(b"g\n"))
+
+    def test_byte_at_a_time(self) -> None:
+        s = LineSplitter()
+        text = b"one\ntwo\nthree\n" * 1000
+        lines = [line for b in text for line in s.feed(bytes([b]))]
+        self.assertEqual(text.splitlines(keepends=True), lines)
+
+
+class MultiplexTest(unittest.TestCase):
+    def test_multiplex(self) -> None:
+        cmd = ["sh", "-c", "echo out; echo err >&2; printf tail"]
+        lines = list(multiplex([cmd, cmd], tags=["a", "b"]))
+        self.assertEqual(6, len(lines))
+        for tag in "ab":
+            mine = {(t.stream, t.line) for t in lines if t.source == tag}
+            self.assertEqual(
+                {("stdout", "out\n"), ("stderr", "err\n"), ("stdout", "tail")}, mine
+            )
+
+    def test_concurrent(self) -> None:
+        t0 = time()
+        cmd = ["sh", "-c", "sleep 0.5; echo done"]
+        self.assertEqual(8, len(list(multiplex([cmd] * 8))))
+        self.assertLess(time() - t0, 2.0)
+
+    def test_early_exit(self) -> None:
+        cmd = ["sh", "-c", "echo first; sleep 30"]
+        t0 = time()
+        for line in streaming_subproc(cmd):
+            self.assertEqual("first\n", line)
+            break
+        self.assertLess(time() - t0, 5.0)
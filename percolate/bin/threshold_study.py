@@ -0,0 +1,31 @@
+#! /usr/bin/env python
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+import os
+
+import numpy as np
+import typer
+
+from percolate.trials import run_trials
+
+
+def main(  # noqa: PLR0913, PLR0917
+    width: int = 256,
+    height: int = 256,
+    trials: int = 1000,
+    kind: str = "site",
+    seed: int = 0,
+    workers: int = os.cpu_count() or 1,
+    out: Path = Path("/tmp/percolate/threshold.parquet"),
+) -> None:
+    assert kind in ("site", "bond"), kind
+    ps = np.linspace(0.40, 0.70, 61)
+    df = run_trials(width, height, trials, ps, kind, seed, workers)  # type: ignore [arg-type]
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(out, index=False)
+    print(df[["p", "spanning", "largest_fraction"]].to_string(index=False))
+    print(out)
+
+
+if __name__ == "__main__":
+    typer.run(main)
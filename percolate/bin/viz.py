@@ -1,17 +1,29 @@
 #! /usr/bin/env streamlit run --server.runOnSave true
 # Copyright 2021 John Hanley. MIT licensed.
-import networkit as nk
+import numpy as np
 import streamlit as st
 
-from percolate.two_d_percolation import Perc
+from percolate.newman_ziff import PercEngine
+from percolate.raster import render
+from percolate.two_d_percolation import RASTER_THRESHOLD
 
 
 def main() -> None:
     st.write("Hi!")
-    p = Perc(3, 2)
-    st.write(p.g.numberOfNodes(), p.g.numberOfEdges())
-    print()
-    nk.overview(p.g)
+    side = st.sidebar.slider("lattice size", min_value=2, max_value=4096, value=3)
+    p_occupied = st.sidebar.slider("p", min_value=0.0, max_value=1.0, value=0.6)
+
+    perc = PercEngine(side, side)
+    perc.randomize(p_occupied, np.random.default_rng(0))
+    st.write(
+        f"largest cluster: {perc.largest_cluster():,} sites, spans: {perc.spans()}"
+    )
+    if side * side <= RASTER_THRESHOLD:
+        fig, _ = perc.plot(raster=False)
+        st.pyplot(fig)
+    else:
+        # Too big for markers and segments, so show an image of the clusters instead.
+        st.image(render(perc.labels()[::-1], viewport=(800, 800)))
 
 
 if __name__ == "__main__":
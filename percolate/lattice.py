@@ -0,0 +1,59 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Vectorized construction of square, torus, and cubic lattices.
+
+Nodes are numbered in row-major order with x varying fastest, matching
+Perc.node_num(), so node = x + width * (y + height * z).
+"""
+
+from numpy.typing import NDArray
+from scipy.sparse import coo_array, csr_array
+from scipy.sparse.csgraph import connected_components
+import networkit as nk
+import numpy as np
+
+
+def lattice_edges(shape: tuple[int, ...], periodic: bool = False) -> NDArray[np.int64]:
+    """
+    Returns an E x 2 array of node pairs, for every nearest-neighbor edge
+    of a lattice with the given (width, height[, depth]) extents.
+    With periodic boundaries, each axis also wraps around, as on a torus.
+    """
+    assert all(extent > 0 for extent in shape), shape
+    # Array axes are in reverse order, so that x varies fastest.
+    node = np.arange(np.prod(shape), dtype=np.int64).reshape(shape[::-1])
+    pairs = []
+    for axis in range(node.ndim):
+        n = node.shape[axis]
+        if periodic and n > 2:
+            # Wrapping a 2-wide axis would duplicate an edge, and 1-wide would be a self-loop.
+            nbr = np.roll(node, -1, axis=axis)
+            pairs.append(np.stack((node.ravel(), nbr.ravel()), axis=1))
+        elif n > 1:
+            lo = np.take(node, np.arange(n - 1), axis=axis)
+            hi = np.take(node, np.arange(1, n), axis=axis)
+            pairs.append(np.stack((lo.ravel(), hi.ravel()), axis=1))
+    if not pairs:
+        return np.zeros((0, 2), np.int64)
+    return np.concatenate(pairs)
+
+
+def edges_to_networkit(num_nodes: int, edges: NDArray[np.int64]) -> nk.Graph:
+    """Bulk-loads an undirected graph, with no per-edge Python calls."""
+    rows = edges[:, 0].astype(np.uint64)
+    cols = edges[:, 1].astype(np.uint64)
+    return nk.GraphFromCoo((rows, cols), n=num_nodes)
+
+
+def edges_to_csr(num_nodes: int, edges: NDArray[np.int64]) -> csr_array:
+    """Symmetric adjacency matrix, suitable for scipy.sparse.csgraph."""
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+    data = np.ones(len(rows), np.int8)
+    return coo_array((data, (rows, cols)), shape=(num_nodes, num_nodes)).tocsr()
+
+
+def cluster_labels(adjacency: csr_array) -> tuple[int, NDArray[np.int32]]:
+    """Returns the number of connected components, and each node's component."""
+    n, labels = connected_components(adjacency, directed=False)
+    return int(n), labels
@@ -0,0 +1,77 @@
+# Copyright 2025 John Hanley. MIT licensed.
+# ruff: noqa: SLF001
+import unittest
+
+import matplotlib.pyplot as plt
+import networkit as nk
+import numpy as np
+
+from percolate.lattice import cluster_labels, edges_to_csr, lattice_edges
+from percolate.three_d_percolation import CubicPerc
+from percolate.two_d_percolation import Perc, TorusPerc
+
+
+class LatticeTest(unittest.TestCase):
+    def test_matches_neighborhood_generator(self) -> None:
+        p = Perc(6, 5)
+        expected = {
+            (min(a, b), max(a, b))
+            for x, y in p._get_initial_nodes()
+            for a in [p.node_num(x, y)]
+            for b in p._node_nbrhd(x, y)
+        }
+        self.assertEqual(expected, {tuple(e) for e in p.edges().tolist()})
+        self.assertEqual(len(expected), p.g.numberOfEdges())
+        self.assertEqual(30, p.g.numberOfNodes())
+        self.assertTrue(p.g.hasEdge(p.node_num(2, 3), p.node_num(2, 4)))
+
+    def test_torus(self) -> None:
+        p = TorusPerc(6, 5)
+        self.assertEqual(2 * 30, p.g.numberOfEdges())
+        self.assertEqual({4}, {p.g.degree(u) for u in p.g.iterNodes()})
+        self.assertTrue(p.g.hasEdge(p.node_num(5, 0), p.node_num(0, 0)))
+        self.assertTrue(p.g.hasEdge(p.node_num(3, 4), p.node_num(3, 0)))
+
+        # Narrow axes don't wrap, lest we get multi-edges or self-loops.
+        self.assertEqual(
+            len(lattice_edges((2, 1))), len(lattice_edges((2, 1), periodic=True))
+        )
+
+    def test_cubic(self) -> None:
+        p = CubicPerc(4, 3, 2)
+        self.assertEqual(24, p.g.numberOfNodes())
+        self.assertEqual(3 * 3 * 2 + 4 * 2 * 2 + 4 * 3 * 1, p.g.numberOfEdges())
+        self.assertEqual(23, p.node_num(3, 2, 1))
+        self.assertTrue(p.g.hasEdge(p.node_num(1, 1, 0), p.node_num(1, 1, 1)))
+        with self.assertRaises(ValueError):
+            p.node_num(0, 0, 2)
+
+        torus = CubicPerc(3, 3, 3, periodic=True)
+        self.assertEqual({6}, {torus.g.degree(u) for u in torus.g.iterNodes()})
+
+    def test_cubic_labels(self) -> None:
+        p = CubicPerc(4, 3, 2)
+        labels = p.labels()
+        self.assertEqual((2, 3, 4), labels.shape)
+        self.assertEqual({labels[0, 0, 0]}, set(labels.ravel()))
+        _, ax = p.plot_raster()
+        self.assertEqual([-0.5, 3.5, -0.5, 2.5], list(ax.images[0].get_extent()))
+        plt.close("all")
+
+    def test_csr_components(self) -> None:
+        p = Perc(5, 4)
+        adj = p.to_csr()
+        self.assertEqual((20, 20), adj.shape)
+        self.assertEqual(2 * len(p.edges()), adj.nnz)
+        self.assertEqual(1, cluster_labels(adj)[0])
+
+        # Keep only the vertical edges, leaving one component per column.
+        edges = p.edges()
+        vertical = edges[edges[:, 1] - edges[:, 0] == p.width]
+        n, labels = cluster_labels(edges_to_csr(20, vertical))
+        self.assertEqual(5, n)
+        self.assertTrue(np.array_equal(labels[:5], labels[15:]))
+
+        cc = nk.components.ConnectedComponents(p.g)
+        cc.run()
+        self.assertEqual(1, cc.numberOfComponents())
@@ -0,0 +1,432 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Union-find percolation engine, with Newman-Ziff Monte Carlo sweeps.
+
+A single pass over a random permutation of sites (or bonds) yields the
+observables for every occupation count n = 0 .. N, which we then convolve
+with a binomial to get them as a function of occupation probability p.
+
+M. E. J. Newman and R. M. Ziff, "Fast Monte Carlo algorithm for site or
+bond percolation", Phys. Rev. E 64, 016706 (2001).
+"""
+
+from collections.abc import Sequence
+from typing import Literal, NamedTuple
+
+from numba import njit
+from numpy.typing import NDArray
+from scipy.stats import binom
+import numpy as np
+
+from percolate.two_d_percolation import Perc
+
+Kind = Literal["site", "bond"]
+
+# Each root carries a bitmask of the borders its cluster touches.
+TOP, BOTTOM, LEFT, RIGHT = 1, 2, 4, 8
+VERTICAL = TOP | BOTTOM
+HORIZONTAL = LEFT | RIGHT
+
+
+@njit  # type: ignore [misc]
+def _find(parent: NDArray[np.int32], i: int) -> int:
+    # Path halving: a one-pass form of path compression, pointing each node
+    # we visit at its grandparent.
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+@njit  # type: ignore [misc]
+def _link(  # noqa: PLR0913, PLR0917
+    parent: NDArray[np.int32],
+    size: NDArray[np.int32],
+    flags: NDArray[np.uint8],
+    hist: NDArray[np.int64],
+    ra: int,
+    rb: int,
+) -> int:
+    """
+    Weighted union of two roots, smaller tree goes under the larger. Returns the new root.
+    Keeps hist, the number of clusters of each size, up to date as it goes.
+    """
+    if ra == rb:
+        return ra
+    if size[ra] < size[rb]:
+        ra, rb = rb, ra
+    parent[rb] = ra
+    hist[size[ra]] -= 1
+    hist[size[rb]] -= 1
+    size[ra] += size[rb]
+    hist[size[ra]] += 1
+    flags[ra] |= flags[rb]
+    return ra
+
+
+@njit  # type: ignore [misc]
+def _union(  # noqa: PLR0913, PLR0917
+    parent: NDArray[np.int32],
+    size: NDArray[np.int32],
+    flags: NDArray[np.uint8],
+    hist: NDArray[np.int64],
+    a: int,
+    b: int,
+) -> int:
+    return _link(parent, size, flags, hist, _find(parent, a), _find(parent, b))
+
+
+@njit  # type: ignore [misc]
+def _open_site(  # noqa: PLR0913, PLR0917
+    i: int,
+    width: int,
+    sites: NDArray[np.bool_],
+    bonds: NDArray[np.bool_],
+    parent: NDArray[np.int32],
+    size: NDArray[np.int32],
+    flags: NDArray[np.uint8],
+    hist: NDArray[np.int64],
+) -> int:
+    if sites[i]:
+        return _find(parent, i)
+    sites[i] = True
+    hist[1] += 1
+    n = len(sites)
+    x = i % width
+    # Track our own root as we go, rather than re-finding it after each merge.
+    root = _find(parent, i)
+    if x + 1 < width and bonds[2 * i] and sites[i + 1]:
+        root = _link(parent, size, flags, hist, root, _find(parent, i + 1))
+    if x > 0 and bonds[2 * (i - 1)] and sites[i - 1]:
+        root = _link(parent, size, flags, hist, root, _find(parent, i - 1))
+    if i + width < n and bonds[2 * i + 1] and sites[i + width]:
+        root = _link(parent, size, flags, hist, root, _find(parent, i + width))
+    if i >= width and bonds[2 * (i - width) + 1] and sites[i - width]:
+        root = _link(parent, size, flags, hist, root, _find(parent, i - width))
+    return root
+
+
+@njit  # type: ignore [misc]
+def _open_bond(  # noqa: PLR0913, PLR0917
+    b: int,
+    width: int,
+    sites: NDArray[np.bool_],
+    bonds: NDArray[np.bool_],
+    parent: NDArray[np.int32],
+    size: NDArray[np.int32],
+    flags: NDArray[np.uint8],
+    hist: NDArray[np.int64],
+) -> int:
+    bonds[b] = True
+    a = b >> 1
+    c = a + 1 if b & 1 == 0 else a + width
+    if sites[a] and sites[c]:
+        return _union(parent, size, flags, hist, a, c)
+    return _find(parent, a)
+
+
+@njit  # type: ignore [misc]
+def _sweep(  # noqa: PLR0913, PLR0917
+    order: NDArray[np.int32],
+    start: int,
+    stop: int,
+    is_bond: bool,
+    width: int,
+    sites: NDArray[np.bool_],
+    bonds: NDArray[np.bool_],
+    parent: NDArray[np.int32],
+    size: NDArray[np.int32],
+    flags: NDArray[np.uint8],
+    hist: NDArray[np.int64],
+    largest: NDArray[np.int32],
+    span_n: int,
+) -> int:
+    """
+    Opens order[start:stop] in turn, recording the largest cluster size
+    after n openings in largest[n]. Returns the first n at which some cluster
+    spans top to bottom.
+    """
+    big = largest[start]
+    for step in range(start, stop):
+        if is_bond:
+            root = _open_bond(
+                order[step], width, sites, bonds, parent, size, flags, hist
+            )
+        else:
+            root = _open_site(
+                order[step], width, sites, bonds, parent, size, flags, hist
+            )
+        big = max(big, size[root])
+        largest[step + 1] = big
+        if span_n < 0 and flags[root] & VERTICAL == VERTICAL:
+            span_n = step + 1
+    return span_n
+
+
+@njit  # type: ignore [misc]
+def _relabel(  # noqa: PLR0913, PLR0917
+    width: int,
+    sites: NDArray[np.bool_],
+    bonds: NDArray[np.bool_],
+    parent: NDArray[np.int32],
+    size: NDArray[np.int32],
+    flags: NDArray[np.uint8],
+    hist: NDArray[np.int64],
+) -> None:
+    """Rebuilds the forest from scratch. Union-find can merge, but never split."""
+    n = len(sites)
+    hist[:] = 0
+    hist[1] = sites.sum()
+    for i in range(n):
+        if sites[i]:
+            if i % width + 1 < width and bonds[2 * i] and sites[i + 1]:
+                _union(parent, size, flags, hist, i, i + 1)
+            if i + width < n and bonds[2 * i + 1] and sites[i + width]:
+                _union(parent, size, flags, hist, i, i + width)
+
+
+@njit  # type: ignore [misc]
+def _labels(sites: NDArray[np.bool_], parent: NDArray[np.int32]) -> NDArray[np.int32]:
+    out = np.full(len(sites), -1, np.int32)
+    for i in range(len(sites)):
+        if sites[i]:
+            out[i] = _find(parent, i)
+    return out
+
+
+class Sweep(NamedTuple):
+    largest: NDArray[np.int32]  # largest cluster size, after n openings
+    span_n: int  # the n at which we first spanned
+    # At each checkpoint, the count of clusters of each size.
+    hist: list[NDArray[np.int64]]
+
+
+class PercEngine(Perc):
+    """
+    Site-bond percolation on a Perc lattice.
+
+    Two nodes are connected when both sites are occupied and the bond between
+    them is open. Site percolation starts with every bond open, and bond
+    percolation starts with every site occupied.
+    """
+
+    def __init__(self, width: int = 6, height: int = 5, kind: Kind = "site") -> None:
+        super().__init__(width, height)
+        assert kind in ("site", "bond"), kind
+        self.kind = kind
+        n = width * height
+        self.sites = np.zeros(n, np.bool_)
+        # Bond 2 * node leads East, and bond 2 * node + 1 leads South.
+        self.bonds = np.zeros(2 * n, np.bool_)
+        self.parent = np.arange(n, dtype=np.int32)
+        self.size = np.ones(n, np.int32)
+        self.flags = self._border_flags()
+        self.hist = np.zeros(n + 1, np.int64)  # hist[s] clusters of s sites each
+        self.clear()
+
+    def _border_flags(self) -> NDArray[np.uint8]:
+        flags = np.zeros((self.height, self.width), np.uint8)
+        flags[0, :] |= TOP
+        flags[-1, :] |= BOTTOM
+        flags[:, 0] |= LEFT
+        flags[:, -1] |= RIGHT
+        return flags.ravel()
+
+    def valid_bonds(self) -> NDArray[np.int32]:
+        """Bond numbers that stay within the lattice."""
+        east = np.ones((self.height, self.width), np.bool_)
+        east[:, -1] = False
+        south = np.ones((self.height, self.width), np.bool_)
+        south[-1, :] = False
+        mask = np.stack((east.ravel(), south.ravel()), axis=1).ravel()
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def clear(self) -> None:
+        self.sites[:] = self.kind == "bond"
+        self.bonds[:] = False
+        if self.kind == "site":
+            self.bonds[self.valid_bonds()] = True
+        self.parent[:] = np.arange(len(self.parent), dtype=np.int32)
+        self.size[:] = 1
+        self.flags[:] = self._border_flags()
+        self.hist[:] = 0
+        self.hist[1] = self.sites.sum()
+
+    def _rebuild(self) -> None:
+        self.parent[:] = np.arange(len(self.parent), dtype=np.int32)
+        self.size[:] = 1
+        self.flags[:] = self._border_flags()
+        _relabel(self.width, *self._arrays())
+
+    def randomize(self, p: float, rng: np.random.Generator) -> None:
+        """Independently occupies each site (or opens each bond) with probability p."""
+        if not 0 <= p <= 1:
+            msg = f"p = {p} is not a probability"
+            raise ValueError(msg)
+        self.clear()
+        if self.kind == "site":
+            self.sites[:] = rng.random(len(self.sites)) < p
+        else:
+            valid = self.valid_bonds()
+            self.bonds[valid] = rng.random(len(valid)) < p
+        self._rebuild()
+
+    def bond_num(self, x: int, y: int, dx: int, dy: int) -> int:
+        """Identifies the bond from (x, y) in one of the cardinal_directions."""
+        assert (dx, dy) in self.cardinal_directions, (dx, dy)
+        a = self.node_num(x, y)
+        b = self.node_num(x + dx, y + dy)
+        return 2 * min(a, b) + int(dy != 0)
+
+    def _arrays(
+        self,
+    ) -> tuple[
+        NDArray[np.bool_],
+        NDArray[np.bool_],
+        NDArray[np.int32],
+        NDArray[np.int32],
+        NDArray[np.uint8],
+        NDArray[np.int64],
+    ]:
+        return self.sites, self.bonds, self.parent, self.size, self.flags, self.hist
+
+    def open_site(self, x: int, y: int) -> None:
+        _open_site(self.node_num(x, y), self.width, *self._arrays())
+
+    def close_site(self, x: int, y: int) -> None:
+        self.sites[self.node_num(x, y)] = False
+        self._rebuild()
+
+    def open_bond(self, x: int, y: int, dx: int, dy: int) -> None:
+        _open_bond(self.bond_num(x, y, dx, dy), self.width, *self._arrays())
+
+    def close_bond(self, x: int, y: int, dx: int, dy: int) -> None:
+        self.bonds[self.bond_num(x, y, dx, dy)] = False
+        self._rebuild()
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return bool(self.sites[self.node_num(x, y)])
+
+    def is_open(self, x: int, y: int, dx: int, dy: int) -> bool:
+        return (
+            self.is_occupied(x, y)
+            and self.is_occupied(x + dx, y + dy)
+            and bool(self.bonds[self.bond_num(x, y, dx, dy)])
+        )
+
+    def is_connected(self, a: tuple[int, int], b: tuple[int, int]) -> bool:
+        i, j = self.node_num(*a), self.node_num(*b)
+        if not (self.sites[i] and self.sites[j]):
+            return False
+        return bool(_find(self.parent, i) == _find(self.parent, j))
+
+    def labels(self) -> NDArray[np.int32]:
+        """Cluster root of each site, as a height x width array, with -1 for empty sites."""
+        return _labels(self.sites, self.parent).reshape(self.height, self.width)
+
+    def _roots(self) -> NDArray[np.int32]:
+        roots = self.labels().ravel()
+        return np.unique(roots[roots >= 0])
+
+    def spans(self, axis: int = VERTICAL) -> bool:
+        """True if some cluster touches both TOP and BOTTOM (or LEFT and RIGHT)."""
+        return bool(np.any(self.flags[self._roots()] & axis == axis))
+
+    def largest_cluster(self) -> int:
+        return int(np.flatnonzero(self.hist)[-1]) if self.hist.any() else 0
+
+    def cluster_sizes(self) -> NDArray[np.int32]:
+        """Size of each cluster, in ascending order."""
+        return np.repeat(np.arange(len(self.hist), dtype=np.int32), self.hist)
+
+    def sweep(self, rng: np.random.Generator, checkpoints: Sequence[int] = ()) -> Sweep:
+        """
+        Starts from an empty lattice and opens sites (or bonds) in random order.
+        Returns the largest cluster size after each of the n = 0 .. N openings,
+        plus the n at which the lattice first spans. Optionally snapshots
+        the size histogram, which the merges keep current, once n reaches
+        each of the (ascending) checkpoints.
+        """
+        self.clear()
+        order = (
+            np.arange(len(self.sites), dtype=np.int32)
+            if self.kind == "site"
+            else self.valid_bonds()
+        )
+        rng.shuffle(order)
+        largest = np.zeros(len(order) + 1, np.int32)
+        largest[0] = self.largest_cluster()
+        span_n = 0 if self.spans() else -1
+        is_bond = self.kind == "bond"
+        arrays = self._arrays()
+        hist = []
+        start = 0
+        for stop in checkpoints:
+            assert start <= stop <= len(order), (start, stop)
+            span_n = _sweep(
+                order, start, stop, is_bond, self.width, *arrays, largest, span_n
+            )
+            hist.append(self.hist.copy())
+            start = stop
+        stop = len(order)
+        span_n = _sweep(
+            order, start, stop, is_bond, self.width, *arrays, largest, span_n
+        )
+        return Sweep(largest, span_n, hist)
+
+
+class Microcanonical(NamedTuple):
+    """Observables as a function of the number n of open sites or bonds."""
+
+    spanning: NDArray[np.float64]  # fraction of trials spanning, per n
+    largest: NDArray[np.float64]  # mean largest cluster, as a fraction of all sites
+    span_n: NDArray[np.int32]  # per trial, the n at which it first spanned
+
+    def p_c(self) -> float:
+        """Mean occupation probability at which trials first span."""
+        return float(self.span_n.mean() / (len(self.spanning) - 1))
+
+
+def newman_ziff(
+    width: int,
+    height: int,
+    trials: int,
+    kind: Kind = "site",
+    rng: np.random.Generator | None = None,
+) -> Microcanonical:
+    rng = rng or np.random.default_rng()
+    perc = PercEngine(width, height, kind)
+    n = 1 + (width * height if kind == "site" else len(perc.valid_bonds()))
+    span_n = np.zeros(trials, np.int32)
+    largest = np.zeros(n)
+    for trial in range(trials):
+        big, span_n[trial], _ = perc.sweep(rng)
+        largest += big
+    spanning = np.cumsum(np.bincount(span_n, minlength=n)[:n]) / trials
+    return Microcanonical(spanning, largest / trials / (width * height), span_n)
+
+
+def binomial_window(big_n: int, p: float) -> tuple[int, NDArray[np.float64]]:
+    """
+    Returns lo, plus the binomial weights C(N, n) p^n (1-p)^(N-n) for n = lo, lo+1, ...
+    Weight is negligible beyond a dozen sigmas from the mean, so we stop there.
+    """
+    sigma = np.sqrt(big_n * p * (1 - p))
+    lo = max(0, int(big_n * p - 12 * sigma) - 1)
+    hi = min(big_n, int(big_n * p + 12 * sigma) + 1)
+    return lo, binom.pmf(np.arange(lo, hi + 1), big_n, p)
+
+
+def canonical(
+    micro: NDArray[np.float64], ps: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """
+    Converts a microcanonical observable Q_n, with n = 0 .. N,
+    into the canonical Q(p) = sum_n C(N, n) p^n (1-p)^(N-n) Q_n.
+    """
+    big_n = len(micro) - 1
+    out = np.empty(len(ps))
+    for i, p in enumerate(ps):
+        lo, weight = binomial_window(big_n, p)
+        out[i] = weight @ micro[lo : lo + len(weight)]
+    return out
@@ -0,0 +1,85 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+import numpy as np
+
+from percolate.newman_ziff import HORIZONTAL, PercEngine, canonical, newman_ziff
+
+
+class PercEngineTest(unittest.TestCase):
+    def test_open_and_close_sites(self) -> None:
+        p = PercEngine(3, 3)
+        self.assertFalse(p.spans())
+        self.assertEqual(0, p.largest_cluster())
+
+        p.open_site(1, 0)
+        p.open_site(1, 1)
+        self.assertTrue(p.is_connected((1, 0), (1, 1)))
+        self.assertFalse(p.spans())
+
+        p.open_site(1, 2)
+        self.assertTrue(p.spans())
+        self.assertFalse(p.spans(HORIZONTAL))
+        self.assertEqual(3, p.largest_cluster())
+
+        p.close_site(1, 1)
+        self.assertFalse(p.spans())
+        self.assertFalse(p.is_connected((1, 0), (1, 2)))
+        self.assertEqual(1, p.largest_cluster())
+        self.assertEqual(-1, p.labels()[1, 1])
+
+    def test_bonds(self) -> None:
+        p = PercEngine(2, 2, kind="bond")
+        self.assertEqual(1, p.largest_cluster())
+        self.assertEqual(4, len(p.valid_bonds()))
+
+        p.open_bond(0, 1, 0, -1)  # North
+        self.assertTrue(p.spans())
+        self.assertEqual(p.bond_num(0, 0, 0, 1), p.bond_num(0, 1, 0, -1))
+
+        p.open_bond(1, 1, -1, 0)  # West
+        self.assertEqual(3, p.largest_cluster())
+        p.close_bond(0, 0, 0, 1)
+        self.assertFalse(p.spans())
+        self.assertEqual(2, p.largest_cluster())
+
+        with self.assertRaises(ValueError):
+            p.bond_num(1, 1, 1, 0)
+
+    def test_sweep(self) -> None:
+        rng = np.random.default_rng(42)
+        p = PercEngine(8, 5)
+        largest, span_n, hist = p.sweep(rng, checkpoints=[0, 20])
+        self.assertEqual(41, len(largest))
+        self.assertEqual(0, hist[0].sum())
+        self.assertEqual(20, np.arange(41) @ hist[1])
+        self.assertEqual(largest[20], np.flatnonzero(hist[1])[-1])
+        self.assertEqual(p.largest_cluster(), largest[-1])
+        sizes = np.sort(np.bincount(p.labels().ravel() + 1)[1:])
+        np.testing.assert_array_equal(sizes[sizes > 0], p.cluster_sizes())
+        self.assertEqual(0, largest[0])
+        self.assertEqual(40, largest[-1])
+        self.assertTrue(np.all(np.diff(largest) >= 0))
+        self.assertTrue(5 <= span_n <= 40)
+
+        p = PercEngine(8, 5, kind="bond")
+        largest, span_n, _ = p.sweep(rng)
+        self.assertEqual(1 + 7 * 5 + 8 * 4, len(largest))
+        self.assertEqual(1, largest[0])
+        self.assertEqual(40, largest[-1])
+        self.assertTrue(4 <= span_n)
+
+    def test_threshold(self) -> None:
+        # Square lattice thresholds are near 0.5927 (site) and exactly 0.5 (bond).
+        rng = np.random.default_rng(1)
+        site = newman_ziff(32, 32, 100, rng=rng)
+        self.assertAlmostEqual(0.593, site.p_c(), delta=0.02)
+        bond = newman_ziff(32, 32, 100, kind="bond", rng=rng)
+        self.assertAlmostEqual(0.5, bond.p_c(), delta=0.02)
+
+        r = canonical(bond.spanning, np.array([0.0, 0.3, 0.5, 0.7, 1.0]))
+        self.assertEqual(0.0, r[0])
+        self.assertLess(r[1], 0.05)
+        self.assertAlmostEqual(0.5, r[2], delta=0.1)
+        self.assertGreater(r[3], 0.95)
+        self.assertEqual(1.0, r[4])
@@ -0,0 +1,59 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Renders cluster labels directly as an RGB image, one pixel (or block) per site.
+
+Drawing markers and line segments stops being practical long before a
+1000 x 1000 lattice, but an image array costs just three bytes per site,
+and we can decimate it further to fit the viewport.
+"""
+
+from numpy.typing import NDArray
+import numpy as np
+
+EMPTY = np.array([0, 0, 0], np.uint8)
+
+
+def label_colors(labels: NDArray[np.integer]) -> NDArray[np.uint8]:
+    """
+    Maps each cluster id to a pseudo-random color, and negative ids
+    (empty sites) to black. The same id always gets the same color.
+    """
+    ids = labels.astype(np.uint32)
+    # Knuth's multiplicative hash scatters adjacent ids across the color cube.
+    h = ids * np.uint32(2_654_435_761)
+    rgb = np.stack(((h >> 24), (h >> 16), (h >> 8)), axis=-1).astype(np.uint8)
+    # Keep every cluster visibly brighter than the black background.
+    rgb |= np.uint8(0x40)
+    rgb[labels < 0] = EMPTY
+    return rgb
+
+
+def block_mean(rgb: NDArray[np.uint8], factor: int) -> NDArray[np.uint8]:
+    """Downsamples by averaging each factor x factor block, cropping any ragged edge."""
+    if factor <= 1:
+        return rgb
+    h, w = rgb.shape[0] // factor, rgb.shape[1] // factor
+    assert h > 0 and w > 0, (rgb.shape, factor)
+    blocks = rgb[: h * factor, : w * factor].reshape(h, factor, w, factor, 3)
+    return blocks.mean(axis=(1, 3), dtype=np.float32).astype(np.uint8)
+
+
+def render(
+    labels: NDArray[np.integer], viewport: tuple[int, int] = (1024, 1024)
+) -> NDArray[np.uint8]:
+    """
+    Produces an image no bigger than the (width, height) viewport.
+    Small lattices get a square block of pixels per site, while big ones
+    are decimated, with each output pixel averaging several sites.
+    """
+    height, width = labels.shape
+    vw, vh = viewport
+    if width <= vw and height <= vh:
+        block = max(1, min(vw // width, vh // height))
+        rgb = label_colors(labels)
+        return np.repeat(np.repeat(rgb, block, axis=0), block, axis=1)
+
+    factor = int(np.ceil(max(width / vw, height / vh)))
+    # Coloring just the cropped region keeps peak memory down on huge lattices.
+    labels = labels[: height // factor * factor, : width // factor * factor]
+    return block_mean(label_colors(labels), factor)
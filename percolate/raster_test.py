@@ -0,0 +1,61 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+import matplotlib as mpl
+import numpy as np
+
+from percolate.newman_ziff import PercEngine
+from percolate.raster import block_mean, label_colors, render
+
+mpl.use("Agg")
+
+
+class RasterTest(unittest.TestCase):
+    def test_label_colors(self) -> None:
+        labels = np.array([[-1, 0, 0], [7, 7, -1]])
+        rgb = label_colors(labels)
+        self.assertEqual((2, 3, 3), rgb.shape)
+        self.assertEqual(np.uint8, rgb.dtype)
+        self.assertEqual([0, 0, 0], rgb[0, 0].tolist())
+        self.assertEqual([0, 0, 0], rgb[1, 2].tolist())
+        self.assertEqual(rgb[0, 1].tolist(), rgb[0, 2].tolist())
+        self.assertNotEqual(rgb[0, 1].tolist(), rgb[1, 0].tolist())
+        self.assertTrue(np.all(rgb[0, 1] >= 0x40))
+
+    def test_block_mean(self) -> None:
+        rgb = np.zeros((5, 4, 3), np.uint8)
+        rgb[0, 0] = 200
+        small = block_mean(rgb, 2)
+        self.assertEqual((2, 2, 3), small.shape)
+        self.assertEqual([50, 50, 50], small[0, 0].tolist())
+        self.assertIs(rgb, block_mean(rgb, 1))
+
+    def test_render(self) -> None:
+        labels = np.arange(12).reshape(3, 4)
+        self.assertEqual((30, 40, 3), render(labels, viewport=(45, 30)).shape)
+
+        big = np.zeros((1000, 3000), np.int32)
+        self.assertEqual((333, 1000, 3), render(big, viewport=(1000, 1000)).shape)
+
+    def test_plot(self) -> None:
+        perc = PercEngine(80, 60)
+        perc.randomize(0.7, np.random.default_rng(3))
+        self.assertAlmostEqual(0.7, perc.sites.mean(), delta=0.05)
+        self.assertTrue(perc.spans())
+        with self.assertRaises(ValueError):
+            perc.randomize(1.5, np.random.default_rng(3))
+
+        _, ax = perc.plot()
+        (img,) = ax.get_images()
+        self.assertEqual((60 * 12, 80 * 12, 3), img.get_array().shape)
+
+        # Small lattices get markers for occupied sites, and segments between them.
+        perc = PercEngine(3, 3)
+        for x, y in [(1, 0), (1, 1), (0, 2)]:
+            perc.open_site(x, y)
+        _, ax = perc.plot()
+        sites, edges = ax.get_lines()
+        self.assertEqual([0, 1, 1], list(sites.get_xdata()))
+        self.assertEqual([2, 0, 1], list(sites.get_ydata()))
+        # Each end draws its own half of the link, followed by a NaN.
+        self.assertEqual(6, len(edges.get_xdata()))
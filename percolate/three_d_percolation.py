@@ -0,0 +1,23 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from percolate.two_d_percolation import Perc
+
+
+class CubicPerc(Perc):
+    """A simple cubic lattice, with six nearest neighbors per interior node."""
+
+    def __init__(
+        self, width: int = 6, height: int = 5, depth: int = 4, periodic: bool = False
+    ) -> None:
+        super().__init__(width, height)
+        self.depth = depth
+        self.periodic = periodic
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.width, self.height, self.depth
+
+    def node_num(self, x: int, y: int, z: int = 0) -> int:
+        if 0 <= z < self.depth:
+            return super().node_num(x, y) + self.width * self.height * z
+        msg = f"({x}, {y}, {z}) is out of bounds"
+        raise ValueError(msg)
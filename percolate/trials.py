@@ -0,0 +1,125 @@
+# Copyright 2025 John Hanley. MIT licensed.
+"""
+Fans independent Newman-Ziff trials out across a process pool.
+
+Trial t always draws from child t of a single SeedSequence, no matter which
+worker runs it. Workers return integer tallies, and integer addition commutes,
+so results are bit-for-bit identical for any worker count or completion order.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import NamedTuple
+import os
+
+from numpy.typing import NDArray
+import numpy as np
+import pandas as pd
+
+from percolate.newman_ziff import Kind, PercEngine, binomial_window
+
+
+class Tally(NamedTuple):
+    span_n: NDArray[np.int64]  # per trial, the n at which it first spanned
+    largest: list[NDArray[np.int64]]  # summed largest cluster, over each p's window
+    hist: NDArray[np.int64]  # cluster count, per p, per log2(size) bin
+
+
+def _log2_bins(num_sites: int) -> int:
+    return int(num_sites).bit_length()
+
+
+def _run_trials(  # noqa: PLR0913, PLR0917
+    width: int,
+    height: int,
+    kind: Kind,
+    seeds: list[np.random.SeedSequence],
+    windows: list[tuple[int, int]],
+    checkpoints: list[int],
+) -> Tally:
+    perc = PercEngine(width, height, kind)
+    span_n = np.zeros(len(seeds), np.int64)
+    largest = [np.zeros(hi - lo, np.int64) for lo, hi in windows]
+    hist = np.zeros((len(checkpoints), _log2_bins(width * height)), np.int64)
+    # The log2 bin of each cluster size 1 .. N.
+    bins = np.log2(np.arange(1, width * height + 1)).astype(np.int64)
+    for i, seed in enumerate(seeds):
+        big, span_n[i], counts = perc.sweep(np.random.default_rng(seed), checkpoints)
+        for j, (lo, hi) in enumerate(windows):
+            largest[j] += big[lo:hi]
+        for j, count in enumerate(counts):
+            np.add.at(hist[j], bins, count[1:])
+    return Tally(span_n, largest, hist)
+
+
+def run_trials(  # noqa: PLR0913, PLR0917
+    width: int,
+    height: int,
+    trials: int,
+    ps: NDArray[np.float64],
+    kind: Kind = "site",
+    seed: int = 0,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Returns one row per occupation probability p, with canonical spanning
+    probability and largest cluster fraction, plus a histogram of cluster
+    counts by log2(size), summed across all trials at n = round(p N).
+    """
+    workers = workers or os.cpu_count() or 1
+    ps = np.sort(np.asarray(ps, np.float64))
+    num_sites = width * height
+    big_n = (
+        num_sites
+        if kind == "site"
+        else len(PercEngine(width, height, kind).valid_bonds())
+    )
+
+    weights = []
+    windows = []
+    for p in ps:
+        lo, weight = binomial_window(big_n, p)
+        weights.append(weight)
+        windows.append((lo, lo + len(weight)))
+    checkpoints = [round(p * big_n) for p in ps]
+
+    seeds = np.random.SeedSequence(seed).spawn(trials)
+    # Several chunks per worker, so a slow straggler doesn't leave cores idle.
+    n_chunks = min(trials, 4 * workers)
+    chunks = [seeds[i::n_chunks] for i in range(n_chunks)]
+    span_n = np.zeros(0, np.int64)
+    largest = [np.zeros(hi - lo, np.int64) for lo, hi in windows]
+    hist = np.zeros((len(ps), _log2_bins(num_sites)), np.int64)
+    # Forking a process that has started Numba's threads can hang it at exit.
+    ctx = get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(_run_trials, width, height, kind, chunk, windows, checkpoints)
+            for chunk in chunks
+        ]
+        for future in futures:
+            tally = future.result()
+            span_n = np.concatenate((span_n, tally.span_n))
+            for j, part in enumerate(tally.largest):
+                largest[j] += part
+            hist += tally.hist
+
+    span_n.sort()
+    rows = []
+    for p, weight, (lo, hi), big, row in zip(ps, weights, windows, largest, hist):
+        spanning = np.searchsorted(span_n, np.arange(lo, hi), side="right") / trials
+        rows.append(
+            {
+                "p": p,
+                "spanning": weight @ spanning,
+                "largest_fraction": weight @ big / trials / num_sites,
+                "cluster_sizes": row,
+            }
+        )
+    df = pd.DataFrame(rows)
+    df["width"] = width
+    df["height"] = height
+    df["kind"] = kind
+    df["trials"] = trials
+    df["seed"] = seed
+    return df
@@ -0,0 +1,40 @@
+# Copyright 2025 John Hanley. MIT licensed.
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from percolate.trials import run_trials
+
+
+class TrialsTest(unittest.TestCase):
+    def test_reproducible_across_worker_counts(self) -> None:
+        ps = np.array([0.7, 0.3, 0.59])
+        df1 = run_trials(16, 12, 24, ps, seed=7, workers=1)
+        df3 = run_trials(16, 12, 24, ps, seed=7, workers=3)
+        pd.testing.assert_frame_equal(df1, df3, check_exact=True)
+
+        self.assertEqual([0.3, 0.59, 0.7], list(df1.p))
+        self.assertLess(df1.spanning[0], 0.05)
+        self.assertGreater(df1.spanning[2], 0.9)
+        self.assertTrue(df1.largest_fraction.is_monotonic_increasing)
+
+        # Each trial's clusters at n = round(p N) hold exactly that many sites.
+        n = round(0.3 * 16 * 12)
+        bins = df1.cluster_sizes[0]
+        self.assertLessEqual(sum(c * 2**i for i, c in enumerate(bins)), 24 * n)
+        self.assertLess(24 * n, sum(c * 2 ** (i + 1) for i, c in enumerate(bins)))
+
+        df_other = run_trials(16, 12, 24, ps, seed=8, workers=1)
+        self.assertFalse(df1.spanning.equals(df_other.spanning))
+
+    def test_parquet_round_trip(self) -> None:
+        df = run_trials(8, 8, 4, np.array([0.5]), kind="bond", workers=1)
+        with TemporaryDirectory() as temp:
+            out = Path(temp) / "threshold.parquet"
+            df.to_parquet(out, index=False)
+            df2 = pd.read_parquet(out)
+        self.assertEqual(list(df.columns), list(df2.columns))
+        self.assertEqual(list(df.cluster_sizes[0]), list(df2.cluster_sizes[0]))
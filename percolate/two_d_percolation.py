@@ -1,20 +1,40 @@
 # Copyright 2021 John Hanley. MIT licensed.
 from collections.abc import Generator
+from functools import cached_property
 
+from numpy.typing import NDArray
+from scipy.sparse import csr_array
 import matplotlib.pyplot as plt
 import networkit as nk
 import numpy as np
 
+from percolate.lattice import (
+    cluster_labels,
+    edges_to_csr,
+    edges_to_networkit,
+    lattice_edges,
+)
+from percolate.raster import render
+
+# Beyond this many sites, markers and segments are unreadable, and slow to draw.
+RASTER_THRESHOLD = 64 * 64
+
 
 class Perc:
     """A percolation graph."""
 
     # (or, a percolation matrix, if you prefer, given the Manhattan layout)
 
+    periodic = False
+
     def __init__(self, width: int = 6, height: int = 5) -> None:
         self.width = width
         self.height = height
-        self.g = self._get_initial_graph()
+
+    @cached_property
+    def g(self) -> nk.Graph:
+        # Built on first access, so subclasses that never touch networkit don't pay for it.
+        return self._get_initial_graph()
 
     def node_num(self, x: int, y: int) -> int:
         if 0 <= x < self.width and 0 <= y < self.height:
@@ -46,26 +66,62 @@ class Perc:
             for y in range(self.height):
                 yield x, y
 
+    def is_occupied(self, x: int, y: int) -> bool:
+        """Every site of a bare lattice is occupied, so this only checks bounds."""
+        self.node_num(x, y)
+        return True
+
+    def is_open(self, x: int, y: int, dx: int, dy: int) -> bool:
+        """True if (x, y) links to its neighbor in one of the cardinal_directions."""
+        return bool(self.g.hasEdge(self.node_num(x, y), self.node_num(x + dx, y + dy)))
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.width, self.height
+
+    @property
+    def num_nodes(self) -> int:
+        return int(np.prod(self.shape))
+
+    def edges(self) -> NDArray[np.int64]:
+        """All nearest-neighbor node pairs, as an E x 2 array."""
+        return lattice_edges(self.shape, self.periodic)
+
+    def to_csr(self) -> csr_array:
+        return edges_to_csr(self.num_nodes, self.edges())
+
     def _get_initial_graph(self) -> nk.Graph:
-        g = nk.Graph(n=self.width * self.height)
-        for x, y in self._get_initial_nodes():
-            node_a = self.node_num(x, y)
-            for node_b in self._node_nbrhd(x, y):
-                if not g.hasEdge(node_a, node_b):
-                    g.addEdge(node_a, node_b)
-        return g
-
-    def plot(self, alpha: float = 0.1) -> tuple[plt.Figure, plt.Axes]:
+        return edges_to_networkit(self.num_nodes, self.edges())
+
+    def labels(self) -> NDArray[np.int32]:
+        """Connected component of each site, as a [depth x] height x width array."""
+        _, labels = cluster_labels(self.to_csr())
+        return labels.reshape(self.shape[::-1])
+
+    def plot(
+        self, alpha: float = 0.1, raster: bool | None = None
+    ) -> tuple[plt.Figure, plt.Axes]:
+        """
+        Draws sites and edges, or for big lattices (or if raster is True),
+        an image with one pixel per site, colored by cluster.
+        """
+        if raster is None:
+            raster = self.num_nodes > RASTER_THRESHOLD
+        if raster:
+            return self.plot_raster()
+
         x = []
         y = []
         edge_x = []
         edge_y = []
         for px, py in self._get_initial_nodes():
+            if not self.is_occupied(px, py):
+                continue
             x.append(px)
             y.append(py)
             # Compare current Point with Neighbor.
             for nx, ny, dx, dy in self._x_y_nbrhd(px, py):
-                if self.g.hasEdge(self.node_num(px, py), self.node_num(nx, ny)):
+                if self.is_open(px, py, dx, dy):
                     edge_x.append(px + alpha * dx)
                     edge_x.append(nx - alpha * dx)
                     edge_y.append(py + alpha * dy)
@@ -79,3 +135,23 @@ class Perc:
         plt.plot(x, y, "o")
         plt.plot(edge_x, edge_y)
         return fig, ax
+
+    def plot_raster(
+        self, viewport: tuple[int, int] = (1024, 1024)
+    ) -> tuple[plt.Figure, plt.Axes]:
+        """For a 3-D lattice, like plot(), this shows the z = 0 layer."""
+        labels = self.labels()
+        while labels.ndim > 2:
+            labels = labels[0]
+        fig, ax = plt.subplots()
+        extent = (-0.5, self.width - 0.5, -0.5, self.height - 0.5)
+        img = render(labels, viewport)
+        ax.imshow(img, origin="lower", extent=extent, interpolation="nearest")
+        ax.axis("off")
+        return fig, ax
+
+
+class TorusPerc(Perc):
+    """Periodic boundaries: the East edge wraps to the West, and South to North."""
+
+    periodic = True
@@ -1,10 +1,14 @@
 #! /usr/bin/env python
 # Copyright 2022 John Hanley. MIT licensed.
 from collections.abc import Generator
+from heapq import heapreplace
 from queue import PriorityQueue
 from typing import NamedTuple
 import datetime as dt
+import time
 
+from numba import njit
+from numpy.typing import NDArray
 import numpy as np
 import pandas as pd
 
@@ -58,6 +62,22 @@ class CallGenerator:
                 yield self._produce_event(t)
             t += one_second
 
+    def gen_arrays(self, seconds: float) -> "Calls":
+        """Draws every call in [0, seconds) at once, as float64 seconds."""
+        n = int(seconds * self.arrival_rate)
+        n += 6 * int(np.sqrt(n)) + 10  # comfortably more arrivals than we expect
+        arrival = np.cumsum(self.rng.exponential(1 / self.arrival_rate, n))
+        while arrival[-1] < seconds:  # unlucky, so draw some more
+            more = arrival[-1] + np.cumsum(
+                self.rng.exponential(1 / self.arrival_rate, n)
+            )
+            arrival = np.concatenate((arrival, more))
+        arrival = arrival[: np.searchsorted(arrival, seconds)]
+        duration = self.rng.normal(self.call_duration, self.variance, len(arrival))
+        duration = np.maximum(5, duration) + 1e-6  # as in _produce_event()
+        self.id_ += len(arrival)
+        return Calls(arrival, duration)
+
     def _produce_event(self, t: dt.datetime) -> tuple[dt.datetime, dt.timedelta, int]:
         sec = self.rng.normal(self.call_duration, self.variance)
         sec = max(5, sec)  # call length cannot be super short, definitely not negative
@@ -142,7 +162,121 @@ def pandas_occ2() -> int:
     return int(df.occupancy.max())
 
 
+class Calls(NamedTuple):
+    arrival: NDArray[np.float64]  # seconds since start, ascending
+    duration: NDArray[np.float64]  # seconds
+
+
+def occupancy(
+    arrival: NDArray[np.float64], end: NDArray[np.float64]
+) -> NDArray[np.int64]:
+    """Calls in progress just after each event, with events in time order.
+
+    A departure sorts ahead of a simultaneous arrival, as in max_occupancy().
+    """
+    stamp = np.concatenate((arrival, end))
+    delta = np.concatenate((np.ones(len(arrival), np.int64), np.full(len(end), -1)))
+    order = np.lexsort((delta, stamp))
+    return np.cumsum(delta[order])
+
+
+# Compute same thing once more, with no Python-level loop at all.
+def numpy_occ(seconds: float = 1_200) -> int:
+    calls = CallGenerator().gen_arrays(seconds)
+    return int(occupancy(calls.arrival, calls.arrival + calls.duration).max())
+
+
+@njit  # type: ignore [misc]
+def _fifo_start(
+    arrival: NDArray[np.float64],
+    duration: NDArray[np.float64],
+    agents: int,
+    max_queue: int,
+) -> NDArray[np.float64]:
+    """Start of service for each call, or NaN if it found the queue full."""
+    start = np.full(len(arrival), np.nan)
+    free = [0.0] * agents  # a heap of times at which each agent frees up
+    accepted = np.empty(len(arrival), np.int64)
+    n_accepted = 0
+    head = 0  # accepted[head:n_accepted] are still waiting
+    for i in range(len(arrival)):
+        a = arrival[i]
+        # With FIFO service, start times never decrease, so one pointer suffices.
+        while head < n_accepted and start[accepted[head]] <= a:
+            head += 1
+        if free[0] > a and n_accepted - head >= max_queue:
+            continue  # blocked
+        start[i] = max(a, free[0])
+        heapreplace(free, start[i] + duration[i])
+        accepted[n_accepted] = i
+        n_accepted += 1
+    return start
+
+
+class Summary(NamedTuple):
+    calls: int
+    blocked: float  # fraction of calls turned away
+    p_wait: float  # fraction of answered calls that had to wait
+    mean_wait: float  # seconds, over answered calls
+    max_occupancy: int  # calls in service or waiting
+
+
+def simulate(calls: Calls, agents: int, max_queue: int | None = None) -> Summary:
+    """FIFO service by a fixed pool of agents, with an optionally bounded queue."""
+    max_queue = len(calls.arrival) if max_queue is None else max_queue
+    start = _fifo_start(calls.arrival, calls.duration, agents, max_queue)
+    answered = ~np.isnan(start)
+    wait = start[answered] - calls.arrival[answered]
+    end = start[answered] + calls.duration[answered]
+    n = len(start)
+    return Summary(
+        calls=n,
+        blocked=float(1 - answered.sum() / n),
+        p_wait=float((wait > 0).mean()),
+        mean_wait=float(wait.mean()),
+        max_occupancy=int(occupancy(calls.arrival[answered], end).max()),
+    )
+
+
+def erlang_b(agents: int, erlangs: float) -> float:
+    """Blocking probability with no queue, by the numerically stable recurrence."""
+    b = 1.0
+    for k in range(1, agents + 1):
+        b = erlangs * b / (k + erlangs * b)
+    return b
+
+
+def erlang_c(agents: int, erlangs: float) -> float:
+    """Probability that a caller must wait, given an unbounded queue."""
+    assert erlangs < agents, "queue grows without bound"
+    b = erlang_b(agents, erlangs)
+    return agents * b / (agents - erlangs * (1 - b))
+
+
+def erlang_c_wait(agents: int, arrival_rate: float, call_duration: float) -> float:
+    """Mean wait in seconds, over all callers, for M/M/c service."""
+    erlangs = arrival_rate * call_duration
+    return erlang_c(agents, erlangs) * call_duration / (agents - erlangs)
+
+
+def month(agents: int = 320) -> None:
+    # A call per second, each lasting five minutes on average: 300 Erlangs.
+    generator = CallGenerator(arrival_rate=1.0, call_duration=300, variance=120)
+    seconds = 30 * 86_400
+    t0 = time.perf_counter()
+    calls = generator.gen_arrays(seconds)
+    summary = simulate(calls, agents)
+    elapsed = time.perf_counter() - t0
+    print(summary)
+    print(
+        f"Erlang C predicts p_wait {erlang_c(agents, 300.0):.4f} for exponential durations"
+    )
+    print(f"simulated {summary.calls:_} calls in {elapsed:.2f} s")
+
+
 if __name__ == "__main__":
     print(f"maximum occupancy was {max_occupancy()}")
     print(f"maximum occupancy was  {pandas_occ()}")
     print(f"maximum occupancy was   {pandas_occ2()}")
+    print(f"maximum occupancy was    {numpy_occ()}")
+    month()
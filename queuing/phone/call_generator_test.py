@@ -0,0 +1,65 @@
+# Copyright 2025 John Hanley. MIT licensed.
+import unittest
+
+import numpy as np
+
+from queuing.phone.call_generator import (
+    CallGenerator,
+    Calls,
+    erlang_b,
+    erlang_c,
+    erlang_c_wait,
+    occupancy,
+    simulate,
+)
+
+
+def mm_c_calls(seconds: float, arrival_rate: float, call_duration: float) -> Calls:
+    """Poisson arrivals and exponential durations, as Erlang's formulas assume."""
+    gen = CallGenerator(arrival_rate=arrival_rate)
+    gen.rng = np.random.default_rng(0)
+    arrival = gen.gen_arrays(seconds).arrival
+    return Calls(arrival, gen.rng.exponential(call_duration, len(arrival)))
+
+
+class CallGeneratorTest(unittest.TestCase):
+    def test_gen_arrays(self) -> None:
+        gen = CallGenerator(arrival_rate=2.0)
+        calls = gen.gen_arrays(50_000)
+        self.assertAlmostEqual(100_000, len(calls.arrival), delta=1_500)
+        self.assertTrue((np.diff(calls.arrival) >= 0).all())
+        self.assertLess(calls.arrival[-1], 50_000)
+        self.assertGreaterEqual(calls.duration.min(), 5)
+
+    def test_occupancy(self) -> None:
+        arrival = np.array([0.0, 1.0, 2.0, 5.0])
+        end = np.array([2.0, 4.0, 3.0, 6.0])
+        # A departure at t=2 frees its line before the t=2 arrival takes one.
+        self.assertEqual([1, 2, 1, 2, 1, 0, 1, 0], occupancy(arrival, end).tolist())
+
+    def test_erlang(self) -> None:
+        self.assertAlmostEqual(0.5, erlang_b(1, 1.0))
+        self.assertAlmostEqual(0.2, erlang_b(2, 1.0))
+        # With one agent, M/M/1 waits with probability rho.
+        self.assertAlmostEqual(0.6, erlang_c(1, 0.6))
+        self.assertAlmostEqual(0.6 / 0.4 * 10, erlang_c_wait(1, 0.06, 10))
+
+    def test_simulate_unbounded_queue(self) -> None:
+        agents, rate, duration = 12, 1.0, 10.0
+        summary = simulate(mm_c_calls(400_000, rate, duration), agents)
+        self.assertEqual(0.0, summary.blocked)
+        self.assertAlmostEqual(
+            erlang_c(agents, rate * duration), summary.p_wait, delta=0.01
+        )
+        self.assertAlmostEqual(
+            erlang_c_wait(agents, rate, duration), summary.mean_wait, delta=0.1
+        )
+
+    def test_simulate_no_queue(self) -> None:
+        agents, rate, duration = 12, 1.0, 10.0
+        summary = simulate(mm_c_calls(400_000, rate, duration), agents, max_queue=0)
+        self.assertAlmostEqual(
+            erlang_b(agents, rate * duration), summary.blocked, delta=0.005
+        )
+        self.assertEqual(0.0, summary.mean_wait)
+        self.assertLessEqual(summary.max_occupancy, agents)